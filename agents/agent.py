@@ -1,6 +1,11 @@
+import os
 import datetime
 from zoneinfo import ZoneInfo
-from google.adk.agents import Agent
+
+# Agent definitions are kept as plain keyword specs so that importing this
+# module does not pull in google.adk; the ADK Agent objects are built on
+# first use (see get_agent below).
+_AGENT_SPECS = {}
 
 # Define a tool for the agent to use (optional, for more advanced actions)
 def send_command_to_game(command: str) -> dict:
@@ -9,8 +14,20 @@ def send_command_to_game(command: str) -> dict:
     return {"status": "success", "command_sent": command}
 
 
+# Get room map configuration from environment (GOTO commands need the map)
+ROOM_MAP = os.getenv('ROOM_MAP', 'true').lower() == 'true'
+
+# Part of the game agent's instruction, left out when no room map is kept
+_GOTO_INSTRUCTION = """        To travel to a room listed in the known map, use "GOTO <room name>" as the command; the route is walked for you:
+        {
+            "command": "GOTO Kitchen",
+            "explanation": "Returning to the kitchen to use the knife"
+        }
+        
+"""
+
 # Define the agent
-game_agent = Agent(
+_AGENT_SPECS["game_agent"] = dict(
     name="if_game_agent",
     model="gemini-2.0-flash",  # Or another supported model
     description="An agent that plays interactive fiction games by reading the log and suggesting the next command.",
@@ -36,7 +53,9 @@ game_agent = Agent(
             "explanation": "Pressing ENTER to continue reading the text"
         }
         
-        IMPORTANT: Output ONLY the raw JSON object, with no markdown, no explanation, and no extra text. Do not use triple backticks or the word 'json'. Do not add any comments or preamble. Only output the JSON object.
+"""
+        + _GOTO_INSTRUCTION +
+        """        IMPORTANT: Output ONLY the raw JSON object, with no markdown, no explanation, and no extra text. Do not use triple backticks or the word 'json'. Do not add any comments or preamble. Only output the JSON object.
         
         You can rely on the following guide to learn how to play the game: 
         =========================================
@@ -138,7 +157,7 @@ examples:
 )
 
 # Define the story narration agent
-story_agent = Agent(
+_AGENT_SPECS["story_agent"] = dict(
     name="story_narration_agent",
     model="gemini-2.0-flash",
     description="An agent that narrates the story based on the game's output and previous narration.",
@@ -160,7 +179,7 @@ story_agent = Agent(
 )
 
 # Define the update decider agent
-update_decidor_agent = Agent(
+_AGENT_SPECS["update_decidor_agent"] = dict(
     name="update_decidor_agent",
     model="gemini-2.0-flash",
     description="An agent that evaluates story progression in an interactive fiction game.",
@@ -179,4 +198,122 @@ update_decidor_agent = Agent(
         "IMPORTANT: Return ONLY the raw JSON object, nothing else. No markdown formatting, no code blocks, no additional text."
     ),
     tools=[]
-)
\ No newline at end of file
+)
+
+# Define the combined decide-and-narrate agent, used instead of the update
+# decider and story agents when NARRATION_MODE=combined
+_AGENT_SPECS["narration_agent"] = dict(
+    name="decide_and_narrate_agent",
+    model="gemini-2.0-flash",
+    description="An agent that decides whether the story advanced and, if so, narrates it.",
+    instruction=(
+        "You are the story narrator for an interactive fiction game. "
+        "First determine if there has been significant story advancement since the last narration. "
+        "Consider the following criteria for story advancement:\n"
+        "1. New locations discovered or visited\n"
+        "2. New items found or used\n"
+        "3. New characters encountered or interacted with\n"
+        "4. Important dialogue or revelations\n"
+        "5. Significant changes in the game state\n"
+        "6. Progress towards game objectives\n\n"
+        "If there has, write a new narration following these guidelines:\n"
+        "1. Only narrate new events that haven't been described in the story so far\n"
+        "2. Maintain continuity with previous narrations\n"
+        "3. Keep your style concise and direct\n"
+        "4. Include all dialogue and important details\n"
+        "5. Never repeat information that was already narrated\n"
+        "6. Ignore error messages from the game engine\n"
+        "7. Don't mention that this is a game or break character\n"
+        "8. Don't invent details not present in the game output\n"
+        "9. Focus on describing actions, changes, and important discoveries\n\n"
+        "You must respond with ONLY a JSON object in the following exact format (no markdown, no code blocks, just the raw JSON):\n"
+        '{"should_update": true/false, "narration": "The new narration, or an empty string if should_update is false"}'
+    ),
+    tools=[]
+)
+
+# Environment variable prefix used to configure each agent,
+# e.g. DECIDER_AGENT_BACKEND=http and DECIDER_AGENT_MODEL=qwen2.5-3b
+AGENT_CONFIG_PREFIXES = {
+    "game_agent": "GAME_AGENT",
+    "story_agent": "STORY_AGENT",
+    "update_decidor_agent": "DECIDER_AGENT",
+    "narration_agent": "NARRATION_AGENT",
+}
+
+# JSON schemas for agents that answer with a JSON object
+RESPONSE_SCHEMAS = {
+    "game_agent": {
+        "type": "object",
+        "properties": {
+            "command": {"type": "string"},
+            "explanation": {"type": "string"}
+        },
+        "required": ["command", "explanation"]
+    },
+    "update_decidor_agent": {
+        "type": "object",
+        "properties": {
+            "should_update": {"type": "boolean"},
+            "reason": {"type": "string"}
+        },
+        "required": ["should_update", "reason"]
+    },
+    "narration_agent": {
+        "type": "object",
+        "properties": {
+            "should_update": {"type": "boolean"},
+            "narration": {"type": "string"}
+        },
+        "required": ["should_update", "narration"]
+    },
+}
+
+# Structured output is on by default only where it does not conflict with
+# tools: Gemini cannot combine function calling with a JSON response type.
+# <PREFIX>_STRUCTURED_OUTPUT=true on the game agent drops its placeholder tool.
+_STRUCTURED_OUTPUT_DEFAULTS = {
+    "game_agent": "false",
+    "update_decidor_agent": "true",
+    "narration_agent": "true",
+}
+
+def get_response_schema(agent_key: str) -> dict:
+    """Get the JSON schema to constrain an agent's output to, or None."""
+    if agent_key not in RESPONSE_SCHEMAS:
+        return None
+    prefix = AGENT_CONFIG_PREFIXES[agent_key]
+    enabled = os.getenv(f'{prefix}_STRUCTURED_OUTPUT', _STRUCTURED_OUTPUT_DEFAULTS[agent_key])
+    return RESPONSE_SCHEMAS[agent_key] if enabled.lower() == 'true' else None
+
+# Cache of constructed ADK agents, keyed like _AGENT_SPECS
+_agents = {}
+
+def get_agent_instruction(agent_key: str) -> str:
+    """Get the system instruction for an agent without constructing it."""
+    instruction = _AGENT_SPECS[agent_key]["instruction"]
+    return instruction if ROOM_MAP else instruction.replace(_GOTO_INSTRUCTION, '')
+
+def get_agent(agent_key: str):
+    """Get the ADK agent for a key, importing google.adk on first use."""
+    if agent_key not in _agents:
+        from google.adk.agents import Agent
+        spec = dict(_AGENT_SPECS[agent_key], instruction=get_agent_instruction(agent_key))
+        schema = get_response_schema(agent_key)
+        if schema is not None:
+            # ADK takes the schema as a pydantic model (pydantic ships with ADK)
+            from pydantic import create_model
+            field_types = {"string": str, "boolean": bool}
+            spec["tools"] = []
+            spec["output_schema"] = create_model(
+                f"{agent_key}_response",
+                **{name: (field_types[field["type"]], ...) for name, field in schema["properties"].items()}
+            )
+        _agents[agent_key] = Agent(**spec)
+    return _agents[agent_key]
+
+def __getattr__(name: str):
+    # Keep `from agents.agent import game_agent` working lazily
+    if name in _AGENT_SPECS:
+        return get_agent(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,131 +1,153 @@
+import os
 import json
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
-from google.genai import types
 from utils.logging_utils import main_logger as logger, log_agent_interaction
-from utils.text_utils import clean_log_text, extract_json
-from agents.agent import game_agent, update_decidor_agent
-
-# Define constants for identifying the interaction context
-APP_NAME = "text_game_app"
-USER_ID = "game_user"
-SESSION_ID = "game_session_001"
-
-# Create a session service for the agent
-session_service = InMemorySessionService()
-
-async def get_agent_command(log_file: str) -> dict:
-    """Get the next command from the agent based on the game log."""
-    # Create the specific session where the conversation will happen
-    session = await session_service.create_session(
-        app_name=APP_NAME,
-        user_id=USER_ID,
-        session_id=SESSION_ID
-    )
-    logger.info(f"Session created: App='{APP_NAME}', User='{USER_ID}', Session='{SESSION_ID}'")
-
-    runner = Runner(
-        agent=game_agent,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
-    logger.info(f"Runner created for agent '{runner.agent.name}'")
-
-    # Read the entire log file
-    try:
+from utils.file_utils import get_updates_since_last_story
+from utils.text_utils import clean_log_text, extract_json, IncrementalJSONParser, parse_json_fields
+from utils.tracing import traced
+from utils.retrieval import GameHistory
+from agents.agent import get_agent_instruction
+from agents.agent_runner import SESSION_ID, AgentTimeoutError, run_agent, agent_fallbacks
+
+# Game agent context: the last GAME_AGENT_RECENT_TURNS turns verbatim plus the
+# GAME_AGENT_RETRIEVED_TURNS earlier turns most relevant to the current screen.
+# GAME_AGENT_RECENT_TURNS=0 sends the entire log instead.
+GAME_AGENT_RECENT_TURNS = int(os.getenv('GAME_AGENT_RECENT_TURNS', '10'))
+GAME_AGENT_RETRIEVED_TURNS = int(os.getenv('GAME_AGENT_RETRIEVED_TURNS', '5'))
+
+# Indexed history per game log file
+_histories = {}
+
+def get_game_history(log_file: str) -> GameHistory:
+    """Get the indexed history of a game log, reading only what was appended since the last call."""
+    history = _histories.get(log_file)
+    if history is None:
+        history = _histories[log_file] = GameHistory(log_file, GAME_AGENT_RECENT_TURNS)
+    history.update()
+    return history
+
+def build_game_context(log_file: str) -> str:
+    """Build the game log section of the game agent prompt."""
+    if GAME_AGENT_RECENT_TURNS <= 0:
+        # Read the entire log file
         with open(log_file, 'r', encoding='utf-8') as f:
-            log_text = f.read()
+            return "Here is the current game log. What should the next command be?\n\n" + clean_log_text(f.read())
+
+    history = get_game_history(log_file)
+    recent = '\n'.join(list(history.recent) + [history.current_screen])
+    relevant = history.relevant_turns(GAME_AGENT_RETRIEVED_TURNS)
+    context = ""
+    if relevant:
+        context = "Earlier game events that may be relevant now:\n\n" + '\n\n'.join(relevant) + "\n\n"
+    return context + "Here is the recent game log. What should the next command be?\n\n" + recent
+
+def describe_position(turn) -> str:
+    """Describe the player's position from a parsed screen's status line."""
+    details = [f"score {turn.score}"] if turn.score is not None else []
+    if turn.moves is not None:
+        details.append(f"moves {turn.moves}")
+    if turn.time is not None:
+        details.append(f"time {turn.time}")
+    return f"Current location: {turn.room}" + (f" ({', '.join(details)})" if details else "") + "."
+
+def json_field_ready(field: str):
+    """Build a stop_when callback that is satisfied once a top-level JSON field is complete."""
+    parser = IncrementalJSONParser()
+
+    def ready(text: str) -> bool:
+        nonlocal parser
+        # Each call gets the full text so far; only parse what is new
+        if not text.startswith(parser.buffer):
+            parser = IncrementalJSONParser()
+        parser.feed(text[len(parser.buffer):])
+        return field in parser.fields
+    return ready
+
+@traced('agent.game_command')
+async def get_agent_command(log_file: str, turn=None, map_summary: str = None, vocabulary=None,
+                            feedback: str = None) -> dict:
+    """Get the next command from the agent based on the game log.
+
+    The parsed current screen, known map, game vocabulary and feedback on a
+    rejected command are added to the prompt when given.
+    """
+    try:
+        context = build_game_context(log_file)
+        if vocabulary is not None:
+            context = "Words the game understands: " + ', '.join(vocabulary.words) + "\n\n" + context
+        if map_summary:
+            context = "Known map (GOTO <room> walks there):\n" + map_summary + "\n\n" + context
+        if turn is not None and turn.room:
+            context = describe_position(turn) + "\n\n" + context
     except Exception as e:
         logger.error(f"Error reading log file: {e}")
+        agent_fallbacks.inc(agent='game_agent', reason='log_error')
         return {"command": "look", "explanation": "Default command due to error reading log file"}
 
-    # Clean the log text
-    clean_text = clean_log_text(log_text)
+    # Prepare the user's message
+    if feedback:
+        context += "\n\n" + feedback
+    query = context + "\n\nRespond with ONLY the raw JSON object, nothing else. Do not use markdown or any extra text."
 
-    # Prepare the user's message in ADK format
-    query = (
-        "Here is the current game log. What should the next command be?\n\n" + clean_text + "\n\nRespond with ONLY the raw JSON object, nothing else. Do not use markdown or any extra text."
-    )
-    content = types.Content(role='user', parts=[types.Part(text=query)])
-
-    final_response_text = "Agent did not produce a final response."  # Default
-
-    # Run the agent and process events
-    async for event in runner.run_async(user_id=USER_ID, session_id=SESSION_ID, new_message=content):
-        if event.is_final_response():
-            if event.content and event.content.parts:
-                final_response_text = event.content.parts[0].text
-            elif event.actions and event.actions.escalate:
-                final_response_text = f"Agent escalated: {event.error_message or 'No specific message.'}"
-            break
+    try:
+        final_response_text = await run_agent(
+            "game_agent",
+            SESSION_ID,
+            query,
+            "Agent did not produce a final response.",
+            # Act as soon as the command is known instead of waiting for the explanation
+            stop_when=json_field_ready("command")
+        )
+    except AgentTimeoutError as e:
+        logger.error(f"Game agent timed out: {e}")
+        agent_fallbacks.inc(agent='game_agent', reason='timeout')
+        return {"command": "look", "explanation": "Default command due to agent timeout"}
 
     # Log the agent interaction
     log_agent_interaction(
         "game_agent",
-        game_agent.instruction,
+        get_agent_instruction("game_agent"),
         query,
         final_response_text
     )
 
-    try:
-        # Parse the JSON response, cleaning up markdown if needed
-        raw_json = extract_json(final_response_text)
-        response = json.loads(raw_json)
-        if not isinstance(response, dict) or 'command' not in response or 'explanation' not in response:
-            raise ValueError("Invalid response format")
-        return response
-    except (json.JSONDecodeError, ValueError) as e:
-        logger.error(f"Error parsing agent response: {e}")
+    # Parse the first JSON object in the response; preamble, markdown and
+    # trailing text are ignored and a streamed response may stop after the command
+    fields = parse_json_fields(final_response_text)
+    if not isinstance(fields.get('command'), str):
+        logger.error(f"Error parsing agent response: no command in {final_response_text[:200]!r}")
+        agent_fallbacks.inc(agent='game_agent', reason='invalid_response')
         return {"command": "look", "explanation": "Default command due to invalid response format"}
+    return {"command": fields['command'], "explanation": str(fields.get('explanation', ''))}
 
+@traced('agent.update_decision')
 async def get_update_decision(json_log_file: str) -> dict:
     """Get a decision from the update decider agent about whether to update the story."""
-    # Create the specific session where the conversation will happen
-    session = await session_service.create_session(
-        app_name=APP_NAME,
-        user_id=USER_ID,
-        session_id=f"{SESSION_ID}_update"
-    )
-    logger.info(f"Update session created: App='{APP_NAME}', User='{USER_ID}', Session='{SESSION_ID}_update'")
+    # Get all updates since the last story update
+    updates_text = get_updates_since_last_story(json_log_file)
 
-    runner = Runner(
-        agent=update_decidor_agent,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
-    logger.info(f"Runner created for update decider agent '{runner.agent.name}'")
-
-    # Read the last few updates
-    try:
-        with open(json_log_file, 'r', encoding='utf-8') as f:
-            entries = json.load(f)
-            last_updates = entries[-3:]  # Get last 3 updates
-    except (FileNotFoundError, json.JSONDecodeError):
-        last_updates = []
-
-    # Prepare the user's message in ADK format
+    # Prepare the user's message
     query = (
-        "Here are the last few game updates. Should the story be updated?\n\n" +
-        json.dumps(last_updates, indent=2) + "\n\n" +
-        "Respond with ONLY a JSON object containing a 'should_update' boolean and a 'reason' string."
+        "Evaluate if there has been significant story progression since the last narration update.\n\n"
+        f"Game events since last story update:\n{updates_text}\n\n"
+        "Respond with a JSON object indicating if a story update is needed and why."
     )
-    content = types.Content(role='user', parts=[types.Part(text=query)])
-
-    final_response_text = "Update decider did not produce a final response."  # Default
 
-    # Run the agent and process events
-    async for event in runner.run_async(user_id=USER_ID, session_id=f"{SESSION_ID}_update", new_message=content):
-        if event.is_final_response():
-            if event.content and event.content.parts:
-                final_response_text = event.content.parts[0].text
-            elif event.actions and event.actions.escalate:
-                final_response_text = f"Update decider escalated: {event.error_message or 'No specific message.'}"
-            break
+    try:
+        final_response_text = await run_agent(
+            "update_decidor_agent",
+            f"{SESSION_ID}_update_decider",
+            query,
+            "Update decider did not produce a final response."
+        )
+    except AgentTimeoutError as e:
+        logger.error(f"Update decider timed out: {e}")
+        agent_fallbacks.inc(agent='update_decidor_agent', reason='timeout')
+        return {"should_update": False, "reason": "Default decision due to agent timeout"}
 
     # Log the agent interaction
     log_agent_interaction(
         "update_decider",
-        update_decidor_agent.instruction,
+        get_agent_instruction("update_decidor_agent"),
         query,
         final_response_text
     )
@@ -139,4 +161,5 @@ async def get_update_decision(json_log_file: str) -> dict:
         return response
     except (json.JSONDecodeError, ValueError) as e:
         logger.error(f"Error parsing update decider response: {e}")
-        return {"should_update": False, "reason": "Default decision due to invalid response format"} 
\ No newline at end of file
+        agent_fallbacks.inc(agent='update_decidor_agent', reason='invalid_response')
+        return {"should_update": False, "reason": "Default decision due to invalid response format"}
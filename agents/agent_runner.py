@@ -0,0 +1,348 @@
+import os
+import time
+import asyncio
+from collections import deque
+from utils.logging_utils import main_logger as logger
+from agents.agent import AGENT_CONFIG_PREFIXES, get_agent
+from utils.tracing import span, percentile
+from utils.run_store import get_run_store
+from utils.metrics import registry
+from agents.scheduler import get_scheduler
+from agents.session_compaction import compact_session
+
+# Define constants for identifying the interaction context
+APP_NAME = "text_game_app"
+USER_ID = "game_user"
+SESSION_ID = "game_session_001"
+
+# Session service shared by all agents, created on first use so that
+# importing this module does not import google.adk
+_session_service = None
+
+def get_session_service():
+    """Get the shared ADK session service, creating it on first use."""
+    global _session_service
+    if _session_service is None:
+        from google.adk.sessions import InMemorySessionService
+        _session_service = InMemorySessionService()
+    return _session_service
+
+async def get_or_create_session(session_id: str):
+    """Get an existing ADK session or create it if it does not exist yet."""
+    session_service = get_session_service()
+    session = await session_service.get_session(
+        app_name=APP_NAME,
+        user_id=USER_ID,
+        session_id=session_id
+    )
+    if session is None:
+        session = await session_service.create_session(
+            app_name=APP_NAME,
+            user_id=USER_ID,
+            session_id=session_id
+        )
+        logger.info(f"Session created: App='{APP_NAME}', User='{USER_ID}', Session='{session_id}'")
+    return session
+
+async def reset_session(session_id: str):
+    """Delete an ADK session (if ADK was used) so its next call starts from an empty history."""
+    if _session_service is None:
+        return
+    if await _session_service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id):
+        await _session_service.delete_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+
+async def export_sessions() -> list:
+    """Get the ADK sessions of this run as JSON-serialisable dicts (empty if ADK was never used)."""
+    if _session_service is None:
+        return []
+    response = await _session_service.list_sessions(app_name=APP_NAME, user_id=USER_ID)
+    sessions = []
+    for listed in response.sessions:
+        session = await _session_service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=listed.id)
+        if session is not None:
+            sessions.append(session.model_dump(mode='json'))
+    return sessions
+
+async def import_sessions(sessions: list):
+    """Recreate ADK sessions exported by export_sessions, replacing existing ones with the same id."""
+    if not sessions:
+        return
+    from google.adk.events import Event
+    session_service = get_session_service()
+    for data in sessions:
+        session_id = data['id']
+        if await session_service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id):
+            await session_service.delete_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+        session = await session_service.create_session(
+            app_name=APP_NAME,
+            user_id=USER_ID,
+            state=data.get('state') or {},
+            session_id=session_id
+        )
+        for event in data.get('events', []):
+            await session_service.append_event(session, Event.model_validate(event))
+    logger.info(f"Restored {len(sessions)} agent sessions")
+
+class AdkBackend:
+    """Agent backend running the ADK agent (Gemini) with a persistent session.
+
+    The session is compacted after every call so its history stays bounded.
+    """
+    supports_streaming = True
+
+    async def __call__(self, agent_key: str, session_id: str, query: str, default_response: str,
+                       stop_when=None) -> str:
+        from google.adk.runners import Runner
+        from google.adk.agents.run_config import RunConfig, StreamingMode
+        from google.genai import types
+
+        agent = get_agent(agent_key)
+        await get_or_create_session(session_id)
+
+        runner = Runner(
+            agent=agent,
+            app_name=APP_NAME,
+            session_service=get_session_service()
+        )
+        logger.info(f"Runner created for agent '{runner.agent.name}'")
+
+        # Prepare the user's message in ADK format
+        content = types.Content(role='user', parts=[types.Part(text=query)])
+
+        final_response_text = default_response
+
+        # Stream partial responses when the caller can act on an incomplete answer
+        run_config = RunConfig(streaming_mode=StreamingMode.SSE) if stop_when else None
+        partial_text = ''
+
+        # Run the agent and process events
+        events = runner.run_async(user_id=USER_ID, session_id=session_id, new_message=content,
+                                  run_config=run_config)
+        stopped_early = None
+        try:
+            async for event in events:
+                if event.partial:
+                    if event.content and event.content.parts:
+                        partial_text += ''.join(part.text or '' for part in event.content.parts)
+                        if stop_when(partial_text):
+                            final_response_text = partial_text
+                            stopped_early = event
+                            break
+                    continue
+                if event.is_final_response():
+                    if event.content and event.content.parts:
+                        final_response_text = event.content.parts[0].text
+                    elif event.actions and event.actions.escalate:
+                        final_response_text = f"Agent escalated: {event.error_message or 'No specific message.'}"
+                    break
+        finally:
+            # Close the stream so the invocation (and its model request) ends now
+            await events.aclose()
+
+        if stopped_early is not None:
+            # Partial events are not stored and the final one never came: record the answer
+            # the caller acts on, so the next turn's context has it
+            from google.adk.events import Event
+            session = await get_or_create_session(session_id)
+            await get_session_service().append_event(session, Event(
+                author=stopped_early.author,
+                invocation_id=stopped_early.invocation_id,
+                content=types.Content(role='model', parts=[types.Part(text=partial_text)])
+            ))
+
+        # Keep the last exchanges verbatim and fold older ones into a summary
+        await compact_session(get_session_service(), APP_NAME, USER_ID, session_id)
+
+        return final_response_text
+
+def create_backend(name: str, agent_key: str = None):
+    """Create an agent backend by name: 'adk', 'http' or 'policy'."""
+    prefix = AGENT_CONFIG_PREFIXES.get(agent_key, '')
+    if name == 'adk':
+        return AdkBackend()
+    if name == 'http':
+        from agents.backends import HttpBackend
+        return HttpBackend(
+            base_url=os.getenv(f'{prefix}_URL'),
+            model=os.getenv(f'{prefix}_MODEL')
+        )
+    if name == 'policy':
+        from agents.backends import PolicyBackend
+        return PolicyBackend()
+    raise ValueError(f"Unknown agent backend '{name}' (expected adk, http or policy)")
+
+# Backends by agent key, created from configuration on first use or set explicitly
+_backends = {}
+
+def get_agent_backend(agent_key: str):
+    """Get the backend for an agent, as configured by <PREFIX>_BACKEND (default adk)."""
+    if agent_key not in _backends:
+        prefix = AGENT_CONFIG_PREFIXES.get(agent_key, '')
+        name = os.getenv(f'{prefix}_BACKEND', os.getenv('AGENT_BACKEND', 'adk')).lower()
+        _backends[agent_key] = create_backend(name, agent_key)
+        logger.info(f"Using '{name}' backend for {agent_key}")
+    return _backends[agent_key]
+
+def get_agent_config() -> dict:
+    """Describe the configured backend (and model, if set) of each agent, e.g. {'game_agent': 'http:qwen2.5-3b'}."""
+    config = {}
+    for agent_key, prefix in AGENT_CONFIG_PREFIXES.items():
+        name = os.getenv(f'{prefix}_BACKEND', os.getenv('AGENT_BACKEND', 'adk')).lower()
+        model = os.getenv(f'{prefix}_MODEL')
+        config[agent_key] = f"{name}:{model}" if model else name
+    return config
+
+def set_agent_backend(backend, agent_key: str = None):
+    """Route one agent (or all agents) to a backend; None restores the configured backend.
+
+    A backend is an async callable (agent_key, session_id, query, default_response) -> str.
+    """
+    keys = [agent_key] if agent_key else list(AGENT_CONFIG_PREFIXES)
+    for key in keys:
+        if backend is None:
+            _backends.pop(key, None)
+        else:
+            _backends[key] = backend
+
+def close_agent_backends():
+    """Close the backends that hold resources (e.g. HTTP threads) and forget them."""
+    for backend in {id(backend): backend for backend in _backends.values()}.values():
+        close = getattr(backend, 'close', None)
+        if close is not None:
+            close()
+    _backends.clear()
+
+class AgentTimeoutError(Exception):
+    """Raised when an agent does not answer before its deadline."""
+
+# Default deadline in seconds per agent, overridable with <PREFIX>_TIMEOUT (0 disables)
+DEFAULT_AGENT_TIMEOUTS = {
+    "game_agent": 60.0,
+    "update_decidor_agent": 20.0,
+    "story_agent": 45.0,
+    "narration_agent": 45.0,
+}
+
+# Hedging: after the agent's p95 latency, send a duplicate request and take
+# whichever answers first. Enabled per agent with <PREFIX>_HEDGE=true.
+HEDGE_MIN_SAMPLES = 10
+DEFAULT_HEDGE_DELAY = 10.0
+
+# Recent successful call latencies per agent, used for the hedge delay
+_latencies = {}
+
+# Metrics of agent calls
+_llm_calls = registry.counter('llm_calls_total', 'Agent calls by agent and outcome', ('agent', 'status'))
+_llm_seconds = registry.histogram('llm_call_seconds', 'Agent call latency', ('agent',))
+_llm_prompt_bytes = registry.counter('llm_prompt_bytes_total', 'Bytes of prompts sent to agents', ('agent',))
+_llm_response_bytes = registry.counter('llm_response_bytes_total', 'Bytes of agent responses', ('agent',))
+agent_fallbacks = registry.counter('agent_fallbacks_total', 'Default answers used instead of an agent response',
+                                   ('agent', 'reason'))
+
+def get_agent_timeout(agent_key: str) -> float:
+    """Get the deadline in seconds for an agent call, or None for no deadline."""
+    prefix = AGENT_CONFIG_PREFIXES.get(agent_key, '')
+    timeout = float(os.getenv(f'{prefix}_TIMEOUT', DEFAULT_AGENT_TIMEOUTS.get(agent_key, 0)))
+    return timeout or None
+
+def get_hedge_delay(agent_key: str) -> float:
+    """Get how long to wait before hedging a call, or None if hedging is disabled."""
+    prefix = AGENT_CONFIG_PREFIXES.get(agent_key, '')
+    if os.getenv(f'{prefix}_HEDGE', 'false').lower() != 'true':
+        return None
+    history = _latencies.get(agent_key)
+    if history and len(history) >= HEDGE_MIN_SAMPLES:
+        return percentile(sorted(history), 95)
+    return float(os.getenv(f'{prefix}_HEDGE_DELAY', DEFAULT_HEDGE_DELAY))
+
+def is_streaming_enabled(agent_key: str) -> bool:
+    """Check whether an agent's responses may be streamed (<PREFIX>_STREAMING, default true)."""
+    prefix = AGENT_CONFIG_PREFIXES.get(agent_key, '')
+    return os.getenv(f'{prefix}_STREAMING', 'true').lower() == 'true'
+
+async def _call_backend(agent_key: str, session_id: str, query: str, default_response: str,
+                        stop_when=None) -> str:
+    """Call the agent's backend through the shared scheduler."""
+    backend = get_agent_backend(agent_key)
+    kwargs = {}
+    if stop_when and getattr(backend, 'supports_streaming', False) and is_streaming_enabled(agent_key):
+        kwargs['stop_when'] = stop_when
+    # Rate limiting, prioritisation and quota retries are shared by all sessions
+    return await get_scheduler().run(
+        agent_key,
+        lambda: backend(agent_key, session_id, query, default_response, **kwargs),
+        query
+    )
+
+async def _call_hedged(agent_key: str, session_id: str, query: str, default_response: str, hedge_delay: float,
+                       stop_when=None) -> str:
+    """Call the backend, sending a duplicate request if the first one is slower than hedge_delay."""
+    primary = asyncio.ensure_future(_call_backend(agent_key, session_id, query, default_response, stop_when))
+    done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+    if done:
+        return primary.result()
+
+    # The duplicate uses its own session so the primary's history is not doubled
+    logger.info(f"Hedging {agent_key} call after {hedge_delay:.1f}s")
+    hedge_session = f"{session_id}_hedge"
+    hedge = asyncio.ensure_future(_call_backend(agent_key, hedge_session, query, default_response, stop_when))
+    pending = {primary, hedge}
+    try:
+        # Take the first successful answer (both may finish together); fail only if both fail
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                failed = task
+        return failed.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        # Let the losing call finish cancelling (releasing its scheduler slot), and
+        # empty the hedge session so it does not grow by one exchange per hedge
+        await asyncio.gather(*pending, return_exceptions=True)
+        await reset_session(hedge_session)
+
+async def run_agent(agent_key: str, session_id: str, query: str, default_response: str,
+                    stop_when=None) -> str:
+    """Send a query to an agent and return the text of its final response.
+
+    If stop_when is given and the backend streams, it is called with the text
+    received so far and the response is returned as soon as it returns True.
+    Raises AgentTimeoutError if the agent misses its deadline.
+    """
+    timeout = get_agent_timeout(agent_key)
+    hedge_delay = get_hedge_delay(agent_key)
+    start = time.perf_counter()
+    store = get_run_store()
+    _llm_prompt_bytes.inc(len(query.encode('utf-8')), agent=agent_key)
+    with span(f'llm.{agent_key}'):
+        if hedge_delay is not None:
+            call = _call_hedged(agent_key, session_id, query, default_response, hedge_delay, stop_when)
+        else:
+            call = _call_backend(agent_key, session_id, query, default_response, stop_when)
+        try:
+            result = await asyncio.wait_for(call, timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{agent_key} did not answer within {timeout:g}s")
+            _llm_calls.inc(agent=agent_key, status='timeout')
+            if store:
+                store.record_agent_call(agent_key, 'timeout', (time.perf_counter() - start) * 1000,
+                                        len(query.encode('utf-8')))
+            raise AgentTimeoutError(f"{agent_key} timed out after {timeout:g}s")
+        except Exception:
+            _llm_calls.inc(agent=agent_key, status='error')
+            if store:
+                store.record_agent_call(agent_key, 'error', (time.perf_counter() - start) * 1000,
+                                        len(query.encode('utf-8')))
+            raise
+    latency = time.perf_counter() - start
+    _latencies.setdefault(agent_key, deque(maxlen=100)).append(latency)
+    _llm_calls.inc(agent=agent_key, status='ok')
+    _llm_seconds.observe(latency, agent=agent_key)
+    _llm_response_bytes.inc(len((result or '').encode('utf-8')), agent=agent_key)
+    if store:
+        store.record_agent_call(agent_key, 'ok', latency * 1000, len(query.encode('utf-8')),
+                                len((result or '').encode('utf-8')))
+    return result
@@ -0,0 +1,165 @@
+import os
+import re
+import json
+import asyncio
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from agents.agent import get_agent_instruction, get_response_schema
+from utils.text_utils import clean_log_text
+
+# Local OpenAI-compatible server configuration (llama.cpp, vLLM, Ollama, ...)
+LOCAL_LLM_URL = os.getenv('LOCAL_LLM_URL', 'http://localhost:8000/v1')
+LOCAL_LLM_MODEL = os.getenv('LOCAL_LLM_MODEL', 'local-model')
+LOCAL_LLM_API_KEY = os.getenv('LOCAL_LLM_API_KEY', '')
+LOCAL_LLM_TIMEOUT = float(os.getenv('LOCAL_LLM_TIMEOUT', '120'))
+
+# Threads per backend for blocking HTTP calls
+HTTP_THREADS = 8
+
+class HttpBackend:
+    """Agent backend calling an OpenAI-compatible chat completions endpoint.
+
+    The agent's instruction is sent as the system message and every query is
+    sent on its own; the prompts already carry the game context.
+    """
+    supports_streaming = True
+
+    def __init__(self, base_url: str = None, model: str = None, api_key: str = None, timeout: float = None):
+        self.base_url = (base_url or LOCAL_LLM_URL).rstrip('/')
+        self.model = model or LOCAL_LLM_MODEL
+        self.api_key = api_key if api_key is not None else LOCAL_LLM_API_KEY
+        self.timeout = timeout or LOCAL_LLM_TIMEOUT
+        # Not the event loop's default executor: asyncio.run waits for that one
+        # on exit, which would block on requests abandoned after a timeout or a hedge
+        self._executor = ThreadPoolExecutor(max_workers=HTTP_THREADS, thread_name_prefix='llm-http')
+
+    def close(self):
+        """Stop the HTTP threads; requests still running are abandoned."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _post(self, payload: dict) -> dict:
+        """POST a JSON payload to the chat completions endpoint."""
+        headers = {'Content-Type': 'application/json'}
+        if self.api_key:
+            headers['Authorization'] = f'Bearer {self.api_key}'
+        request = urllib.request.Request(
+            f'{self.base_url}/chat/completions',
+            data=json.dumps(payload).encode('utf-8'),
+            headers=headers,
+            method='POST'
+        )
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def _complete(self, payload: dict) -> str:
+        """Request a full completion and return its text."""
+        with self._post(payload) as response:
+            result = json.loads(response.read().decode('utf-8'))
+        try:
+            return result['choices'][0]['message']['content']
+        except (KeyError, IndexError, TypeError):
+            return None
+
+    def _stream(self, payload: dict, stop_when) -> str:
+        """Stream a completion (server-sent events), stopping early once stop_when is satisfied."""
+        text = ''
+        with self._post(dict(payload, stream=True)) as response:
+            for raw_line in response:
+                line = raw_line.decode('utf-8').strip()
+                if not line.startswith('data:'):
+                    continue
+                data = line[len('data:'):].strip()
+                if data == '[DONE]':
+                    break
+                try:
+                    delta = json.loads(data)['choices'][0].get('delta', {}).get('content') or ''
+                except (ValueError, KeyError, IndexError):
+                    continue
+                text += delta
+                if stop_when(text):
+                    break
+        return text
+
+    async def __call__(self, agent_key: str, session_id: str, query: str, default_response: str,
+                       stop_when=None) -> str:
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": get_agent_instruction(agent_key)},
+                {"role": "user", "content": query}
+            ]
+        }
+        schema = get_response_schema(agent_key)
+        if schema is not None:
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": f"{agent_key}_response", "schema": schema}
+            }
+        # Run the blocking HTTP call off the event loop
+        loop = asyncio.get_running_loop()
+        if stop_when:
+            text = await loop.run_in_executor(self._executor, self._stream, payload, stop_when)
+        else:
+            text = await loop.run_in_executor(self._executor, self._complete, payload)
+        return text or default_response
+
+# Commands the deterministic policy cycles through when no exits are listed
+POLICY_COMMANDS = ["look", "north", "east", "south", "west", "up", "down", "inventory"]
+
+# Exit lists such as "Exits: north, east." or "You can go north or south."
+_EXITS_PATTERN = re.compile(r'(?:exits?(?: are)?|you can go)[:\s]+([a-z ,]+)', re.IGNORECASE)
+_STORY_EVENTS_PATTERN = re.compile(r'Latest game events to narrate:\n(.*?)\n\nCreate a new narration', re.DOTALL)
+_NARRATION_EVENTS_PATTERN = re.compile(r'Game events since last story update:\n(.*?)\n\nDecide if', re.DOTALL)
+_DIRECTIONS = ('north', 'south', 'east', 'west', 'northeast', 'northwest',
+               'southeast', 'southwest', 'up', 'down', 'in', 'out')
+
+class PolicyBackend:
+    """Deterministic in-process stand-in for the agents; makes no model calls.
+
+    The game agent presses ENTER on ***MORE*** prompts and otherwise walks
+    through the exits mentioned in the latest screen; the update decider asks
+    for a narration every `update_every` calls; the narrator repeats the
+    latest game text.
+    """
+
+    def __init__(self, update_every: int = 5):
+        self.update_every = update_every
+        self.calls = {}
+
+    def _game_command(self, query: str, count: int) -> dict:
+        """Pick the next command from the end of the transcript."""
+        tail = query[-2000:]
+        if '***MORE***' in tail[-200:]:
+            return {"command": "ENTER", "explanation": "Policy: continue reading"}
+        exits = []
+        for match in _EXITS_PATTERN.finditer(tail):
+            exits = [word for word in re.split(r'[\s,]+', match.group(1).lower()) if word in _DIRECTIONS]
+        if exits:
+            command = exits[count % len(exits)]
+            return {"command": command, "explanation": "Policy: explore a listed exit"}
+        command = POLICY_COMMANDS[count % len(POLICY_COMMANDS)]
+        return {"command": command, "explanation": "Policy: cycle through basic commands"}
+
+    async def __call__(self, agent_key: str, session_id: str, query: str, default_response: str) -> str:
+        count = self.calls.get(agent_key, 0)
+        self.calls[agent_key] = count + 1
+        if agent_key == "game_agent":
+            return json.dumps(self._game_command(query, count))
+        if agent_key == "update_decidor_agent":
+            should_update = self.update_every > 0 and (count + 1) % self.update_every == 0
+            return json.dumps({"should_update": should_update, "reason": "Policy: periodic narration"})
+        if agent_key == "narration_agent":
+            should_update = self.update_every > 0 and (count + 1) % self.update_every == 0
+            match = _NARRATION_EVENTS_PATTERN.search(query)
+            narration = self._narrate(match.group(1)) if should_update and match else ''
+            return json.dumps({"should_update": bool(narration), "narration": narration})
+        # Narrate the last few lines of the latest game events
+        match = _STORY_EVENTS_PATTERN.search(query)
+        if not match:
+            return default_response
+        return self._narrate(match.group(1)) or default_response
+
+    def _narrate(self, events: str) -> str:
+        """Narrate the last few lines of the given game events."""
+        events = '\n'.join(line for line in events.split('\n') if not line.startswith('[AGENT]'))
+        lines = [line for line in clean_log_text(events).split('\n') if line != '>']
+        return ' '.join(lines[-3:])
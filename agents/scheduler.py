@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import random
+import asyncio
+import itertools
+import threading
+import fcntl
+from contextlib import contextmanager
+from utils.logging_utils import main_logger as logger
+from utils.metrics import registry
+
+# Get scheduler configuration from environment (0 means unlimited)
+LLM_MAX_RPM = float(os.getenv('LLM_MAX_RPM', '0'))
+LLM_MAX_TPM = float(os.getenv('LLM_MAX_TPM', '0'))
+LLM_MAX_IN_FLIGHT = int(os.getenv('LLM_MAX_IN_FLIGHT', '0'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '4'))
+LLM_BACKOFF_BASE = float(os.getenv('LLM_BACKOFF_BASE', '1.0'))
+LLM_BACKOFF_MAX = float(os.getenv('LLM_BACKOFF_MAX', '60.0'))
+# File holding the shared limiter state so several game processes share one quota
+LLM_SCHEDULER_STATE_FILE = os.getenv('LLM_SCHEDULER_STATE_FILE', '')
+
+# Lower value runs first: game commands block the turn, narration can wait
+AGENT_PRIORITIES = {
+    "game_agent": 0,
+    "update_decidor_agent": 1,
+    "narration_agent": 1,
+    "story_agent": 2,
+}
+
+# Characters per token assumed when estimating token counts
+CHARS_PER_TOKEN = 4
+
+# Tokens assumed for a model response when reserving token budget
+EXPECTED_RESPONSE_TOKENS = 256
+
+# How often waiting calls re-check the limiter
+_POLL_INTERVAL = 0.05
+# Waiting calls that stopped polling this long ago (e.g. a frozen process) lose their place
+_TICKET_TTL = 30.0
+
+_quota_retries = registry.counter('llm_quota_retries_total', 'Agent calls retried after a quota error', ('agent',))
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the token count of a text (about 4 characters per token)."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def is_quota_error(error: Exception) -> bool:
+    """Check whether an exception is a rate limit / quota / overload error."""
+    code = getattr(error, 'code', None) or getattr(error, 'status_code', None)
+    if code in (429, 503):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in ('429', 'resource_exhausted', 'quota', 'rate limit', 'overloaded'))
+
+class _LocalState:
+    """Limiter state shared by the sessions of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = {}
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            yield self._state
+
+class _FileState:
+    """Limiter state shared between processes through a locked JSON file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    @contextmanager
+    def transaction(self):
+        with self._lock, open(self.path, 'a+', encoding='utf-8') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or '{}')
+                except json.JSONDecodeError:
+                    state = {}
+                # Forget the in-flight and waiting calls of processes that have died
+                in_flight = state.get('in_flight', {})
+                waiting = state.get('waiting', {})
+                for pid in set(in_flight) | {ticket.split(':')[0] for ticket in waiting}:
+                    try:
+                        os.kill(int(pid), 0)
+                    except (ProcessLookupError, ValueError):
+                        in_flight.pop(pid, None)
+                        for ticket in [ticket for ticket in waiting if ticket.split(':')[0] == pid]:
+                            del waiting[ticket]
+                    except PermissionError:
+                        pass
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+class LLMScheduler:
+    """Schedules agent calls across sessions.
+
+    Applies token-bucket limits on requests and tokens per minute, caps the
+    number of calls in flight, lets higher-priority agents go first, and
+    retries quota errors with exponential backoff and full jitter. A quota
+    error pauses every caller sharing the state, not just the one that hit
+    it, so sessions back off together instead of storming the API.
+
+    Waiting calls queue in the shared state too, so with a state file the
+    priorities order the calls of every session, not only this process's.
+    """
+
+    def __init__(self, max_rpm: float = 0, max_tpm: float = 0, max_in_flight: int = 0,
+                 max_retries: int = 4, backoff_base: float = 1.0, backoff_max: float = 60.0,
+                 state_file: str = ''):
+        self.max_rpm = max_rpm
+        self.max_tpm = max_tpm
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.state = _FileState(state_file) if state_file else _LocalState()
+        self._waiting = 0
+        self._waiting_lock = threading.Lock()
+        self._sequence = itertools.count()
+        self._pid = str(os.getpid())
+
+    def _refill(self, state: dict, now: float):
+        """Refill both token buckets for the time elapsed since the last update."""
+        elapsed = max(0.0, now - state.get('updated', now))
+        state['updated'] = now
+        if self.max_rpm:
+            state['requests'] = min(self.max_rpm, state.get('requests', self.max_rpm) + elapsed * self.max_rpm / 60)
+        if self.max_tpm:
+            state['tokens'] = min(self.max_tpm, state.get('tokens', self.max_tpm) + elapsed * self.max_tpm / 60)
+
+    def _try_acquire(self, ticket: str, priority: int, tokens: int) -> float:
+        """Take a slot if the ticket is first in line and limits allow. Returns 0 on success, else seconds to wait."""
+        now = time.time()
+        with self.state.transaction() as state:
+            # Queue the ticket, or mark it as still polling, and drop abandoned tickets
+            waiting = state.setdefault('waiting', {})
+            waiting.setdefault(ticket, [priority, now, now])[2] = now
+            for stale in [key for key, (_, _, seen) in waiting.items() if now - seen > _TICKET_TTL]:
+                del waiting[stale]
+            # Highest priority first, then first come first served
+            if min(waiting, key=lambda key: (waiting[key][0], waiting[key][1], key)) != ticket:
+                return _POLL_INTERVAL
+            self._refill(state, now)
+            paused_until = state.get('paused_until', 0)
+            if paused_until > now:
+                return paused_until - now
+            in_flight = state.setdefault('in_flight', {})
+            if self.max_in_flight and sum(in_flight.values()) >= self.max_in_flight:
+                return _POLL_INTERVAL
+            if self.max_rpm and state['requests'] < 1:
+                return (1 - state['requests']) * 60 / self.max_rpm
+            # A call larger than the whole bucket may go once the bucket is full
+            needed = min(tokens, self.max_tpm)
+            if self.max_tpm and state['tokens'] < needed:
+                return (needed - state['tokens']) * 60 / self.max_tpm
+            if self.max_rpm:
+                state['requests'] -= 1
+            if self.max_tpm:
+                state['tokens'] -= needed
+            in_flight[self._pid] = in_flight.get(self._pid, 0) + 1
+            del waiting[ticket]
+            return 0
+
+    def _leave_queue(self, ticket: str):
+        with self.state.transaction() as state:
+            state.setdefault('waiting', {}).pop(ticket, None)
+
+    def _release(self):
+        with self.state.transaction() as state:
+            in_flight = state.setdefault('in_flight', {})
+            in_flight[self._pid] = max(0, in_flight.get(self._pid, 0) - 1)
+            if not in_flight[self._pid]:
+                del in_flight[self._pid]
+
+    def _pause(self, delay: float):
+        """Make every caller sharing the state wait at least `delay` seconds."""
+        with self.state.transaction() as state:
+            state['paused_until'] = max(state.get('paused_until', 0), time.time() + delay)
+
+    async def _acquire(self, priority: int, tokens: int):
+        """Wait until this call is the highest-priority waiter and the limits allow it."""
+        ticket = f"{self._pid}:{next(self._sequence)}"
+        with self._waiting_lock:
+            self._waiting += 1
+        waited = 0.0
+        acquired = False
+        try:
+            while True:
+                wait = self._try_acquire(ticket, priority, tokens)
+                if wait <= 0:
+                    acquired = True
+                    break
+                # Poll rather than use asyncio primitives: every turn runs its
+                # agent calls in a fresh event loop (asyncio.run), and the queue
+                # may be shared with other processes
+                delay = min(wait, 1.0)
+                await asyncio.sleep(delay)
+                waited += delay
+        finally:
+            with self._waiting_lock:
+                self._waiting -= 1
+            if not acquired:
+                self._leave_queue(ticket)
+        if waited >= 1.0:
+            logger.info(f"LLM call waited {waited:.1f}s for the rate limiter")
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter for the given retry attempt."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def waiting(self) -> int:
+        """Get the number of this process's calls waiting for the rate limiter."""
+        with self._waiting_lock:
+            return self._waiting
+
+    async def run(self, agent_key: str, call, prompt: str = ''):
+        """Run `call` (a zero-argument coroutine factory) under the scheduler's limits."""
+        priority = AGENT_PRIORITIES.get(agent_key, len(AGENT_PRIORITIES))
+        tokens = estimate_tokens(prompt) + EXPECTED_RESPONSE_TOKENS
+        attempt = 0
+        while True:
+            await self._acquire(priority, tokens)
+            try:
+                return await call()
+            except Exception as e:
+                if not is_quota_error(e) or attempt >= self.max_retries:
+                    raise
+                delay = self.backoff_delay(attempt)
+                attempt += 1
+                _quota_retries.inc(agent=agent_key)
+                logger.warning(f"Quota error from {agent_key} ({e}); retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                self._pause(delay)
+            finally:
+                self._release()
+
+# Scheduler shared by every agent call in this process
+_scheduler = None
+
+def get_scheduler() -> LLMScheduler:
+    """Get the process-wide scheduler configured from the environment."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LLMScheduler(
+            max_rpm=LLM_MAX_RPM,
+            max_tpm=LLM_MAX_TPM,
+            max_in_flight=LLM_MAX_IN_FLIGHT,
+            max_retries=LLM_MAX_RETRIES,
+            backoff_base=LLM_BACKOFF_BASE,
+            backoff_max=LLM_BACKOFF_MAX,
+            state_file=LLM_SCHEDULER_STATE_FILE
+        )
+        registry.gauge('llm_scheduler_waiting', 'Agent calls waiting for the rate limiter').set_function(
+            _scheduler.waiting)
+    return _scheduler
@@ -0,0 +1,147 @@
+import os
+import time
+from utils.logging_utils import main_logger as logger
+from utils.tracing import tracer
+
+# Get session compaction configuration from environment
+SESSION_COMPACTION = os.getenv('SESSION_COMPACTION', 'true').lower() == 'true'
+# Exchanges (a query and the agent's answer) kept verbatim in each session
+SESSION_KEEP_EXCHANGES = int(os.getenv('SESSION_KEEP_EXCHANGES', '4'))
+# Text bytes allowed per session, summary included (0 = no cap)
+SESSION_MAX_BYTES = int(os.getenv('SESSION_MAX_BYTES', '200000'))
+# Characters of the rolling summary of older exchanges
+SESSION_SUMMARY_MAX_CHARS = int(os.getenv('SESSION_SUMMARY_MAX_CHARS', '4000'))
+
+# Characters of each folded answer kept in the summary
+SUMMARY_ENTRY_CHARS = 300
+SUMMARY_PREFIX = "Summary of earlier exchanges in this session:\n"
+# Session state key holding the rolling summary
+SUMMARY_STATE_KEY = 'history_summary'
+
+# Size metrics per session id
+_session_stats = {}
+
+def event_text(event) -> str:
+    """Get the text carried by a session event."""
+    if not event.content or not event.content.parts:
+        return ''
+    return ''.join(part.text or '' for part in event.content.parts)
+
+def event_bytes(event) -> int:
+    """Get the size in bytes of the text carried by a session event."""
+    return len(event_text(event).encode('utf-8'))
+
+def split_exchanges(events: list) -> tuple:
+    """Split session events into the leading summary event (or None) and exchanges.
+
+    An exchange starts with a user message and holds the agent events that answer it.
+    """
+    summary_event = None
+    exchanges = []
+    for event in events:
+        if event.author == 'user':
+            if not exchanges and summary_event is None and event_text(event).startswith(SUMMARY_PREFIX):
+                summary_event = event
+                continue
+            exchanges.append([event])
+        elif exchanges:
+            exchanges[-1].append(event)
+    return summary_event, exchanges
+
+def summarize_exchanges(exchanges: list, summary: str = '', max_chars: int = SESSION_SUMMARY_MAX_CHARS) -> str:
+    """Fold exchanges into the rolling summary, keeping each agent answer in short form.
+
+    The queries are not kept: each one repeats the game transcript the next
+    query will carry anyway. The oldest lines are dropped past max_chars.
+    """
+    lines = summary.split('\n') if summary else []
+    for exchange in exchanges:
+        answer = ' '.join(' '.join(event_text(event).split()) for event in exchange[1:]).strip()
+        if answer:
+            lines.append(f"- {answer[:SUMMARY_ENTRY_CHARS]}")
+    while lines and len('\n'.join(lines)) > max_chars:
+        lines.pop(0)
+    return '\n'.join(lines)
+
+def record_session_size(session_id: str, events: list, compacted_from: int = None) -> dict:
+    """Update the size metrics of a session and return them.
+
+    compacted_from is the session's size in bytes before a compaction.
+    """
+    size = sum(event_bytes(event) for event in events)
+    stats = _session_stats.setdefault(session_id, {"events": 0, "bytes": 0, "peak_bytes": 0, "compactions": 0})
+    stats["events"] = len(events)
+    stats["bytes"] = size
+    stats["peak_bytes"] = max(stats["peak_bytes"], size, compacted_from or 0)
+    if compacted_from is not None:
+        stats["compactions"] += 1
+    return stats
+
+def get_session_stats() -> dict:
+    """Get the size metrics (events, bytes, peak bytes, compactions) per session id."""
+    return {session_id: dict(stats) for session_id, stats in _session_stats.items()}
+
+async def compact_session(session_service, app_name: str, user_id: str, session_id: str,
+                          keep_exchanges: int = None, max_bytes: int = None) -> dict:
+    """Compact an ADK session so its size stays flat over a long game.
+
+    Keeps the last keep_exchanges exchanges verbatim and folds older ones into
+    a rolling summary sent as the session's first message. Folds more
+    exchanges (keeping at least the last one) while the session exceeds
+    max_bytes. Returns the session's size metrics.
+    """
+    keep_exchanges = SESSION_KEEP_EXCHANGES if keep_exchanges is None else keep_exchanges
+    max_bytes = SESSION_MAX_BYTES if max_bytes is None else max_bytes
+
+    session = await session_service.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+    if session is None:
+        return {}
+    events = list(session.events)
+    if not SESSION_COMPACTION:
+        return record_session_size(session_id, events)
+
+    summary_event, exchanges = split_exchanges(events)
+    summary = session.state.get(SUMMARY_STATE_KEY, '')
+    keep = max(1, keep_exchanges)
+    size = sum(event_bytes(event) for event in events)
+    if len(exchanges) <= keep and (not max_bytes or size <= max_bytes):
+        return record_session_size(session_id, events)
+
+    start = time.perf_counter()
+    folded, kept = exchanges[:-keep], exchanges[-keep:]
+
+    # Fold further exchanges while the kept ones exceed the byte cap
+    def kept_bytes():
+        return sum(event_bytes(event) for exchange in kept for event in exchange)
+    while max_bytes and len(kept) > 1 and kept_bytes() + len(summary) > max_bytes:
+        folded.append(kept.pop(0))
+    summary_chars = SESSION_SUMMARY_MAX_CHARS
+    if max_bytes:
+        summary_chars = min(summary_chars, max(0, max_bytes - kept_bytes() - len(SUMMARY_PREFIX)))
+    summary = summarize_exchanges(folded, summary, summary_chars)
+
+    # Recreate the session with the summary followed by the kept exchanges
+    from google.adk.events import Event
+    from google.genai import types
+    state = {key: value for key, value in session.state.items() if key != SUMMARY_STATE_KEY}
+    if summary:
+        state[SUMMARY_STATE_KEY] = summary
+    await session_service.delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+    session = await session_service.create_session(app_name=app_name, user_id=user_id, state=state,
+                                                   session_id=session_id)
+    new_events = [event for exchange in kept for event in exchange]
+    if summary:
+        new_events.insert(0, Event(
+            author='user',
+            invocation_id=(summary_event.invocation_id if summary_event else kept[0][0].invocation_id),
+            content=types.Content(role='user', parts=[types.Part(text=SUMMARY_PREFIX + summary)])
+        ))
+    for event in new_events:
+        await session_service.append_event(session, event)
+
+    if tracer.enabled:
+        tracer.record('session.compact', start, time.perf_counter() - start)
+    stats = record_session_size(session_id, new_events, compacted_from=size)
+    logger.info(f"Compacted session '{session_id}': {len(events)} -> {len(new_events)} events, "
+                f"{size} -> {stats['bytes']} bytes")
+    return stats
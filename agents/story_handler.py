@@ -1,35 +1,26 @@
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
-from google.genai import types
+import json
 from utils.logging_utils import main_logger as logger, log_agent_interaction
-from agents.agent import story_agent
+from utils.file_utils import get_updates_since_last_story, get_last_n_updates
+from utils.text_utils import extract_json
+from utils.tracing import traced
+from agents.agent import get_agent_instruction
+from agents.agent_runner import SESSION_ID, AgentTimeoutError, run_agent, agent_fallbacks
 
-# Define constants for identifying the interaction context
-APP_NAME = "text_game_app"
-USER_ID = "game_user"
-SESSION_ID = "game_session_001"
-
-# Create a session service for the agent
-session_service = InMemorySessionService()
+def _parse_should_update(value) -> bool:
+    """Read a should_update field: a JSON boolean, or the strings "true" and "false"."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ('true', 'false'):
+        return value.strip().lower() == 'true'
+    raise ValueError(f"Invalid should_update value: {value!r}")
 
+@traced('agent.story_narration')
 async def get_story_narration(log_text: str, story_log: str) -> str:
-    """Get story narration from the agent based on the game log and previous story."""
-    # Create the specific session where the conversation will happen
-    session = await session_service.create_session(
-        app_name=APP_NAME,
-        user_id=USER_ID,
-        session_id=f"{SESSION_ID}_story"
-    )
-    logger.info(f"Story session created: App='{APP_NAME}', User='{USER_ID}', Session='{SESSION_ID}_story'")
-
-    runner = Runner(
-        agent=story_agent,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
-    logger.info(f"Runner created for story agent '{runner.agent.name}'")
+    """Get story narration from the agent based on the game log and previous story.
 
-    # Prepare the user's message in ADK format
+    Returns an empty string if the agent timed out, in which case narration is skipped.
+    """
+    # Prepare the user's message
     query = (
         "You are narrating an interactive fiction story. Here are the last 3 narrations and the latest game events:\n\n"
         f"Previous narrations:\n{story_log}\n\n"
@@ -42,25 +33,83 @@ async def get_story_narration(log_text: str, story_log: str) -> str:
         "5. Does not repeat information already narrated\n\n"
         "Respond with the new narration only."
     )
-    content = types.Content(role='user', parts=[types.Part(text=query)])
-
-    final_response_text = "Story agent did not produce a final response."  # Default
 
-    # Run the agent and process events
-    async for event in runner.run_async(user_id=USER_ID, session_id=f"{SESSION_ID}_story", new_message=content):
-        if event.is_final_response():
-            if event.content and event.content.parts:
-                final_response_text = event.content.parts[0].text
-            elif event.actions and event.actions.escalate:
-                final_response_text = f"Story agent escalated: {event.error_message or 'No specific message.'}"
-            break
+    try:
+        final_response_text = await run_agent(
+            "story_agent",
+            f"{SESSION_ID}_story",
+            query,
+            "Story agent did not produce a final response."
+        )
+    except AgentTimeoutError as e:
+        logger.error(f"Story agent timed out, skipping narration: {e}")
+        agent_fallbacks.inc(agent='story_agent', reason='timeout')
+        return ""
 
     # Log the agent interaction
     log_agent_interaction(
         "story_narration",
-        story_agent.instruction,
+        get_agent_instruction("story_agent"),
+        query,
+        final_response_text
+    )
+
+    return final_response_text.strip()
+
+@traced('agent.update_and_narration')
+async def get_update_and_narration(json_log_file: str, story_log_file: str) -> dict:
+    """Decide whether to update the story and narrate it in a single agent call.
+
+    Returns a dict with should_update and narration; should_update is False
+    if the agent timed out or its response could not be parsed.
+    """
+    # Get all updates since the last story update and the latest narrations
+    updates_text = get_updates_since_last_story(json_log_file)
+    story_log = get_last_n_updates(story_log_file)
+
+    # Prepare the user's message
+    query = (
+        "You are narrating an interactive fiction story. Here are the last 3 narrations and the game events since the last narration:\n\n"
+        f"Previous narrations:\n{story_log}\n\n"
+        f"Game events since last story update:\n{updates_text}\n\n"
+        "Decide if there has been significant story progression. If there has, create a new narration that:\n"
+        "1. Only describes the new events that haven't been narrated yet\n"
+        "2. Maintains continuity with previous narrations\n"
+        "3. Is concise and engaging\n"
+        "4. Includes any dialogue or important details\n"
+        "5. Does not repeat information already narrated\n\n"
+        "Respond with a JSON object containing should_update and narration."
+    )
+
+    try:
+        final_response_text = await run_agent(
+            "narration_agent",
+            f"{SESSION_ID}_narration",
+            query,
+            "Narration agent did not produce a final response."
+        )
+    except AgentTimeoutError as e:
+        logger.error(f"Narration agent timed out, skipping narration: {e}")
+        agent_fallbacks.inc(agent='narration_agent', reason='timeout')
+        return {"should_update": False, "narration": ""}
+
+    # Log the agent interaction
+    log_agent_interaction(
+        "decide_and_narrate",
+        get_agent_instruction("narration_agent"),
         query,
         final_response_text
     )
 
-    return final_response_text 
\ No newline at end of file
+    try:
+        # Parse the JSON response, cleaning up markdown if needed
+        response = json.loads(extract_json(final_response_text))
+        if not isinstance(response, dict) or 'should_update' not in response:
+            raise ValueError("Invalid response format")
+        should_update = _parse_should_update(response['should_update'])
+        narration = str(response.get('narration') or '').strip() if should_update else ''
+        return {"should_update": should_update, "narration": narration}
+    except (json.JSONDecodeError, ValueError) as e:
+        logger.error(f"Error parsing narration agent response: {e}")
+        agent_fallbacks.inc(agent='narration_agent', reason='invalid_response')
+        return {"should_update": False, "narration": ""}
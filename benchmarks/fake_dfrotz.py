@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Scripted stand-in for dfrotz used by the benchmarks.
+
+Invoked like dfrotz (`fake_dfrotz.py <story file>`; the story file is
+ignored). Prints an intro screen, then answers every line read from stdin
+with a dfrotz-style screen: status line, room name, description and a `>`
+prompt. SAVE and RESTORE ask for a file name like dfrotz and store the
+position as JSON. Behaviour is controlled through environment variables:
+
+    FAKE_DFROTZ_DELAY         seconds to wait before each screen (default 0)
+    FAKE_DFROTZ_STARTUP_DELAY seconds to wait before the intro, like loading a story (default 0)
+    FAKE_DFROTZ_SCREEN_LINES  description lines per screen (default 4)
+    FAKE_DFROTZ_MAX_MOVES     exit after this many commands (default: never)
+    FAKE_DFROTZ_FAIL_AT       crash or hang on reaching this move (default: never)
+    FAKE_DFROTZ_FAIL_MODE     'crash' (exit with status 1) or 'hang' (default crash)
+    FAKE_DFROTZ_FAIL_ONCE     marker file; when set, fail only if it does not exist yet
+    FAKE_DFROTZ_MORE          'true' to show a ***MORE*** screen, still headed by the previous
+                              room's status line, before entering another room (default false)
+"""
+import os
+import json
+import sys
+import time
+
+ROOMS = [
+    ("Kitchen", {"north": 1, "east": 2}),
+    ("Hallway", {"south": 0, "up": 3}),
+    ("Garden", {"west": 0}),
+    ("Attic", {"down": 1}),
+]
+
+FILLER = (
+    "Dust motes drift through a thin shaft of light, and somewhere a clock "
+    "ticks with patient indifference to your presence."
+)
+
+def render_screen(room_index: int, moves: int, score: int, reply: str, lines: int) -> str:
+    """Render one dfrotz screen for the current room."""
+    name, exits = ROOMS[room_index]
+    status = f" {name:<40}Score: {score:<8}Moves: {moves}"
+    description = '\n'.join(FILLER for _ in range(lines))
+    return (
+        f"{status}\n\n{reply}\n\n{name}\n{description}\n"
+        f"Exits: {', '.join(exits)}.\n\n>"
+    )
+
+def main():
+    delay = float(os.getenv('FAKE_DFROTZ_DELAY', '0'))
+    lines = int(os.getenv('FAKE_DFROTZ_SCREEN_LINES', '4'))
+    max_moves = int(os.getenv('FAKE_DFROTZ_MAX_MOVES', '0'))
+    fail_at = int(os.getenv('FAKE_DFROTZ_FAIL_AT', '0'))
+    fail_mode = os.getenv('FAKE_DFROTZ_FAIL_MODE', 'crash')
+    fail_once = os.getenv('FAKE_DFROTZ_FAIL_ONCE', '')
+    more = os.getenv('FAKE_DFROTZ_MORE', 'false').lower() == 'true'
+
+    room, moves, score = 0, 0, 0
+    time.sleep(float(os.getenv('FAKE_DFROTZ_STARTUP_DELAY', '0')))
+    sys.stdout.write("FAKE STORY\nAn interactive benchmark\nRelease 1 / Serial number 000000\n\n")
+    sys.stdout.write(render_screen(room, moves, score, "You wake up.", lines))
+    sys.stdout.flush()
+
+    for line in sys.stdin:
+        command = line.strip().lower()
+        if command in ('save', 'restore'):
+            sys.stdout.write("\nPlease enter a filename [fake.qzl]: ")
+            sys.stdout.flush()
+            path = sys.stdin.readline().strip() or 'fake.qzl'
+            try:
+                if command == 'save':
+                    with open(path, 'w') as f:
+                        json.dump({"room": room, "moves": moves, "score": score}, f)
+                else:
+                    with open(path) as f:
+                        position = json.load(f)
+                    room, moves, score = position["room"], position["moves"], position["score"]
+                sys.stdout.write("Ok.\n\n>")
+            except (OSError, ValueError, KeyError):
+                sys.stdout.write(f"{command.capitalize()} failed.\n\n>")
+            sys.stdout.flush()
+            continue
+        moves += 1
+        exits = ROOMS[room][1]
+        if command in exits:
+            reply = f"You go {command}."
+            if more:
+                sys.stdout.write(f" {ROOMS[room][0]:<40}Score: {score:<8}Moves: {moves}\n\n{reply}\n***MORE***")
+                sys.stdout.flush()
+                sys.stdin.readline()
+            room = exits[command]
+        elif command.startswith('take'):
+            score += 1
+            reply = "Taken."
+        elif command in ('', 'look', 'l'):
+            reply = "You look around."
+        else:
+            reply = "I don't know the word \"" + command.split()[0] + "\"."
+        if fail_at and moves == fail_at and not (fail_once and os.path.exists(fail_once)):
+            if fail_once:
+                open(fail_once, 'w').close()
+            if fail_mode == 'hang':
+                time.sleep(3600)
+            sys.exit(1)
+        if delay:
+            time.sleep(delay)
+        sys.stdout.write(render_screen(room, moves, score, reply, lines))
+        sys.stdout.flush()
+        if max_moves and moves >= max_moves:
+            break
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+End-to-end throughput benchmark for the main game loop.
+
+Drives main.run_game against the scripted fake interpreter
+(benchmarks/fake_dfrotz.py) with the stub LLM standing in for the agents,
+and reports, per window of turns: turns/sec, mean time per stage, log I/O
+bytes per turn and the size of the game agent prompt. Growth of these
+numbers with transcript length exposes per-turn costs that scale with the
+whole history (e.g. rewriting the JSON log, re-sending the full transcript).
+
+Usage:
+    python -m benchmarks.game_loop --turns 1000
+    python -m benchmarks.game_loop --turns 2000 --output bench.json
+    python -m benchmarks.game_loop --turns 2000 --baseline bench.json
+    python -m benchmarks.game_loop --turns 2000 --profile profile/
+"""
+import os
+
+# The benchmark never waits for a key press; set before game.game_io reads it
+os.environ['WAIT_FOR_KEY'] = 'false'
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from main import init_log_files, run_game
+from runner.frotz_runner import FrotzRunner
+from agents.agent_runner import set_agent_backend
+from utils.tracing import tracer
+from utils.log_rotation import RunLogs, wait_for_compression
+from utils.profiling import TurnProfiler
+from benchmarks.stub_llm import StubLLM
+
+FAKE_DFROTZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_dfrotz.py')
+
+def read_process_io() -> int:
+    """Get the bytes read plus written by this process so far (Linux only)."""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            counters = dict(line.split(': ') for line in f.read().splitlines())
+        return int(counters['rchar']) + int(counters['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+def get_window_ends(turns: int, windows: int) -> list:
+    """Split the run into equally sized windows of turns."""
+    size = max(1, turns // windows)
+    ends = list(range(size, turns + 1, size))
+    if ends[-1] != turns:
+        ends.append(turns)
+    return ends
+
+def run_benchmark(turns: int, latency: float = 0.0, windows: int = 10, screen_lines: int = 4,
+                  update_every: int = 5, narration_mode: str = 'separate', commands: list = None,
+                  profiler: TurnProfiler = None) -> dict:
+    """Play `turns` turns against the fake interpreter and stub LLM and collect per-window stats.
+
+    A profiler, if given, is started with the game loop and stopped after it.
+    """
+    stub = StubLLM(latency=latency, update_every=update_every, commands=commands)
+    samples = {}
+
+    # The game agent is called once per turn, after all logging for the turn
+    def on_game_call(turn):
+        samples[turn] = (time.perf_counter(), read_process_io(), stub.last_prompt_bytes["game_agent"])
+    stub.on_game_call = on_game_call
+
+    set_agent_backend(stub)
+    tracer.enabled = True
+    tracer.reset()
+    os.environ['FAKE_DFROTZ_SCREEN_LINES'] = str(screen_lines)
+
+    work_dir = tempfile.mkdtemp(prefix="bench_")
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        story_log_file, json_log_file = init_log_files('fake.z5')
+        runner = FrotzRunner('fake.z5', frotz_path=FAKE_DFROTZ)
+        run_logs = RunLogs(json_log_file, story_log_file, runner.log_file)
+        runner.start()
+        samples[0] = (time.perf_counter(), read_process_io(), 0)
+        if profiler:
+            profiler.start()
+        try:
+            with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                played = run_game(runner, story_log_file, json_log_file, max_turns=turns, poll_interval=0.001,
+                                  narration_mode=narration_mode, run_logs=run_logs, profiler=profiler)
+        finally:
+            if profiler:
+                profiler.stop()
+            runner.quit()
+            wait_for_compression()
+        log_bytes = sum(os.path.getsize(os.path.join('logs', name)) for name in os.listdir('logs'))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+        set_agent_backend(None)
+
+    breakdown = tracer.turn_breakdown()
+    results = {"turns": played, "latency": latency, "narration_mode": narration_mode, "log_bytes": log_bytes, "calls": stub.calls, "windows": []}
+    start = 0
+    for end in get_window_ends(played, windows):
+        if start not in samples or end not in samples:
+            start = end
+            continue
+        t0, io0, _ = samples[start]
+        t1, io1, prompt_bytes = samples[end]
+        count = end - start
+        stages = {}
+        for turn in range(start + 1, end + 1):
+            for stage, ms in breakdown.get(turn, {}).items():
+                stages[stage] = stages.get(stage, 0.0) + ms / count
+        results["windows"].append({
+            "first_turn": start + 1,
+            "last_turn": end,
+            "turns_per_sec": count / (t1 - t0) if t1 > t0 else None,
+            "io_bytes_per_turn": (io1 - io0) / count if io0 is not None and io1 is not None else None,
+            "game_prompt_bytes": prompt_bytes,
+            "stage_ms_per_turn": stages
+        })
+        start = end
+
+    first, last = samples[0], samples[max(samples)]
+    results["turns_per_sec"] = max(samples) / (last[0] - first[0]) if last[0] > first[0] else None
+    return results
+
+def print_results(results: dict):
+    """Print per-window throughput, I/O and the slowest stages."""
+    print(f"{results['turns']} turns, {results['turns_per_sec']:.1f} turns/sec overall, "
+          f"{results['log_bytes'] / 1024:.0f} KiB of logs, LLM calls: {results['calls']}")
+    print(f"\n{'turns':>13} {'turns/s':>8} {'I/O KiB/turn':>13} {'prompt KiB':>11}  slowest stages (ms/turn)")
+    for window in results["windows"]:
+        io = window['io_bytes_per_turn']
+        io_text = f"{io / 1024:13.1f}" if io is not None else f"{'-':>13}"
+        stages = sorted(
+            ((stage, ms) for stage, ms in window["stage_ms_per_turn"].items() if stage != 'turn'),
+            key=lambda item: item[1], reverse=True
+        )[:3]
+        stage_text = ', '.join(f"{stage} {ms:.2f}" for stage, ms in stages)
+        print(f"{window['first_turn']:>6}-{window['last_turn']:<6} {window['turns_per_sec']:8.1f} "
+              f"{io_text} {window['game_prompt_bytes'] / 1024:11.1f}  {stage_text}")
+
+    windows = results["windows"]
+    if len(windows) >= 2 and windows[0]["turns_per_sec"] and windows[-1]["turns_per_sec"]:
+        slowdown = windows[0]["turns_per_sec"] / windows[-1]["turns_per_sec"]
+        print(f"\nLast window is {slowdown:.1f}x slower per turn than the first")
+
+def check_regression(results: dict, baseline: dict, tolerance: float) -> bool:
+    """Compare overall throughput with a baseline. Returns False on a regression."""
+    before = baseline.get("turns_per_sec")
+    after = results.get("turns_per_sec")
+    if not before or not after:
+        return True
+    change = (after - before) / before
+    print(f"\nThroughput vs baseline: {before:.1f} -> {after:.1f} turns/sec ({change:+.1%})")
+    if change < -tolerance:
+        print(f"REGRESSION: throughput dropped by more than {tolerance:.0%}")
+        return False
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the main game loop with a fake interpreter and stub LLM')
+    parser.add_argument('--turns', type=int, default=1000, help='Number of turns to play (default: 1000)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Stub LLM latency per call in seconds')
+    parser.add_argument('--windows', type=int, default=10, help='Number of reporting windows')
+    parser.add_argument('--screen-lines', type=int, default=4, help='Description lines per fake screen')
+    parser.add_argument('--update-every', type=int, default=5, help='Narrate every N turns (0 to never narrate)')
+    parser.add_argument('--narration-mode', choices=['separate', 'combined'], default='separate',
+                        help='Narration agents to benchmark (default: separate)')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--baseline', help='Results JSON to compare against; exits 1 on regression')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed throughput drop vs baseline as a fraction (default: 0.2)')
+    parser.add_argument('--profile', metavar='DIR',
+                        help='Write CPU and memory profiles per window of turns to this directory '
+                             '(profiling slows the loop, so throughput is not comparable)')
+    args = parser.parse_args()
+
+    profiler = None
+    if args.profile:
+        profiler = TurnProfiler(os.path.abspath(args.profile), every=max(1, args.turns // args.windows))
+    results = run_benchmark(args.turns, args.latency, args.windows, args.screen_lines, args.update_every,
+                            args.narration_mode, profiler=profiler)
+    print_results(results)
+    if profiler:
+        print(f"Profile reports written to {profiler.report_dir}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if not check_regression(results, baseline, args.tolerance):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
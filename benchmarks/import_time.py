@@ -0,0 +1,153 @@
+"""
+Startup import-time benchmark.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter,
+summarises the slowest imports and flags heavy optional dependencies that
+were loaded. Each run is appended to a JSON-lines history file so startup
+time can be tracked over time.
+
+Usage:
+    python -m benchmarks.import_time [--module main] [--runs 5] [--check]
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from datetime import datetime
+
+# Modules that should only be imported when their feature is enabled
+HEAVY_MODULES = ['TTS', 'torch', 'pygame', 'google.adk', 'google.genai', 'numpy', 'sqlite3',
+                 'cProfile', 'pstats', 'tracemalloc']
+
+# Default location of the startup-time history
+HISTORY_FILE = os.path.join('logs', 'benchmarks', 'import_time.jsonl')
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+def measure_imports(module: str, env: dict = None) -> dict:
+    """Import a module in a fresh interpreter and parse the -X importtime report."""
+    run_env = dict(os.environ)
+    run_env.update(env or {})
+    start = datetime.now()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True,
+        text=True,
+        env=run_env
+    )
+    wall_ms = (datetime.now() - start).total_seconds() * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            imports.append({
+                "name": match.group(4),
+                "self_us": int(match.group(1)),
+                "cumulative_us": int(match.group(2)),
+                "depth": len(match.group(3)) // 2
+            })
+
+    # The target module is reported last at depth 0
+    target = next((i for i in reversed(imports) if i['name'] == module), None)
+    loaded = {i['name'] for i in imports}
+    heavy = [h for h in HEAVY_MODULES if h in loaded]
+    return {
+        "module": module,
+        "wall_ms": round(wall_ms, 1),
+        "import_ms": round(target['cumulative_us'] / 1000, 1) if target else None,
+        "heavy_modules": heavy,
+        "imports": imports
+    }
+
+def get_git_revision() -> str:
+    """Get the current git revision, or an empty string outside a checkout."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+def load_history(history_file: str) -> list:
+    """Load previous benchmark records from the history file."""
+    try:
+        with open(history_file, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+def append_history(history_file: str, record: dict):
+    """Append a benchmark record to the history file."""
+    os.makedirs(os.path.dirname(history_file) or '.', exist_ok=True)
+    with open(history_file, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + '\n')
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure startup import time')
+    parser.add_argument('--module', default='main', help='Module to import (default: main)')
+    parser.add_argument('--runs', type=int, default=5, help='Number of fresh interpreters to measure')
+    parser.add_argument('--top', type=int, default=15, help='Number of slowest imports to show')
+    parser.add_argument('--history', default=HISTORY_FILE, help='JSON-lines file to append results to')
+    parser.add_argument('--no-history', action='store_true', help='Do not record this run')
+    parser.add_argument('--check', action='store_true', help='Exit with an error if heavy modules were loaded')
+    args = parser.parse_args()
+
+    # Measure the default (non-TTS) configuration our batch workers use
+    env = {'USE_TTS': 'false'}
+    results = [measure_imports(args.module, env) for _ in range(args.runs)]
+    import_times = sorted(r['import_ms'] for r in results if r['import_ms'] is not None)
+    wall_times = sorted(r['wall_ms'] for r in results)
+    median_import = import_times[len(import_times) // 2] if import_times else None
+    median_wall = wall_times[len(wall_times) // 2]
+
+    print(f"import {args.module}: median {median_import} ms "
+          f"(process wall {median_wall} ms, {args.runs} runs)")
+
+    # Show the slowest top-level imports from the last run
+    last = results[-1]
+    top = sorted(
+        (i for i in last['imports'] if i['depth'] <= 1 and i['name'] != args.module),
+        key=lambda i: i['cumulative_us'],
+        reverse=True
+    )[:args.top]
+    print("\nSlowest imports (cumulative):")
+    for i in top:
+        print(f"  {i['cumulative_us'] / 1000:9.1f} ms  {i['name']}")
+
+    if last['heavy_modules']:
+        print(f"\nHeavy modules loaded at startup: {', '.join(last['heavy_modules'])}")
+    else:
+        print("\nNo heavy optional modules loaded at startup.")
+
+    record = {
+        "timestamp": datetime.now().isoformat(timespec='seconds'),
+        "revision": get_git_revision(),
+        "module": args.module,
+        "runs": args.runs,
+        "median_import_ms": median_import,
+        "median_wall_ms": median_wall,
+        "heavy_modules": last['heavy_modules']
+    }
+
+    # Compare with the previous record for the same module
+    previous = [r for r in load_history(args.history) if r.get('module') == args.module]
+    if previous and previous[-1].get('median_import_ms') and median_import:
+        before = previous[-1]['median_import_ms']
+        change = (median_import - before) / before * 100
+        print(f"Previous run ({previous[-1].get('revision') or 'unknown'}): {before} ms ({change:+.1f}%)")
+
+    if not args.no_history:
+        append_history(args.history, record)
+        print(f"Recorded in {args.history}")
+
+    if args.check and last['heavy_modules']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
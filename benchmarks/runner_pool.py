@@ -0,0 +1,93 @@
+"""
+Episode start latency benchmark for the interpreter warm pool.
+
+Measures the time from asking for an interpreter to holding the first
+screen an agent can act on, for cold starts (a new FrotzRunner per
+episode) and for runners handed out by a RunnerPool. Uses the scripted
+fake interpreter (benchmarks/fake_dfrotz.py) with a startup delay standing
+in for the story file load.
+
+Usage:
+    python -m benchmarks.runner_pool --episodes 20 --startup-delay 0.3
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from runner.frotz_runner import FrotzRunner
+from runner.pool import RunnerPool
+
+FAKE_DFROTZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_dfrotz.py')
+
+def first_screen(runner: FrotzRunner, timeout: float = 30.0) -> str:
+    """Poll the runner like the game loop until its first prompt."""
+    output = ''
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        output += runner.get_output()
+        if output.rstrip().endswith('>'):
+            return output
+        time.sleep(0.001)
+    raise TimeoutError("No prompt from the interpreter")
+
+def measure(acquire, episodes: int, episode_seconds: float) -> list:
+    """Start `episodes` episodes one after another. Returns the start latency of each in ms."""
+    latencies = []
+    for _ in range(episodes):
+        start = time.perf_counter()
+        runner = acquire()
+        first_screen(runner)
+        latencies.append((time.perf_counter() - start) * 1000)
+        # The episode itself, during which the pool refills
+        runner.send_command('look')
+        time.sleep(episode_seconds)
+        runner.quit()
+    return latencies
+
+def run_benchmark(episodes: int, startup_delay: float, pool_size: int, episode_seconds: float) -> dict:
+    """Compare cold and pooled episode start latency."""
+    os.environ['FAKE_DFROTZ_STARTUP_DELAY'] = str(startup_delay)
+    work_dir = tempfile.mkdtemp(prefix="bench_")
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        def cold():
+            runner = FrotzRunner('fake.z5', frotz_path=FAKE_DFROTZ)
+            runner.start()
+            return runner
+        results = {"cold": measure(cold, episodes, episode_seconds)}
+
+        with RunnerPool('fake.z5', size=pool_size, frotz_path=FAKE_DFROTZ) as pool:
+            # Let the pool fill before the first episode, as in a batch run
+            deadline = time.monotonic() + 30
+            while pool._ready.qsize() < pool_size and time.monotonic() < deadline:
+                time.sleep(0.01)
+            results["pooled"] = measure(pool.acquire, episodes, episode_seconds)
+            results["pool_stats"] = dict(pool.stats)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark episode start latency with and without a warm pool')
+    parser.add_argument('--episodes', type=int, default=20, help='Episodes to start per mode (default: 20)')
+    parser.add_argument('--startup-delay', type=float, default=0.3,
+                        help='Fake story load time in seconds (default: 0.3)')
+    parser.add_argument('--pool-size', type=int, default=2, help='Warm interpreters kept ready (default: 2)')
+    parser.add_argument('--episode-seconds', type=float, default=0.5,
+                        help='Length of each episode in seconds (default: 0.5)')
+    args = parser.parse_args()
+
+    results = run_benchmark(args.episodes, args.startup_delay, args.pool_size, args.episode_seconds)
+    for mode in ('cold', 'pooled'):
+        latencies = sorted(results[mode])
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"{mode:>7}: median {statistics.median(latencies):8.1f} ms, p95 {p95:8.1f} ms")
+    print(f"Pool: {results['pool_stats']}")
+
+if __name__ == "__main__":
+    main()
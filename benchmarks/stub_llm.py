@@ -0,0 +1,47 @@
+"""
+Local stand-in for the ADK/Gemini agents used by the benchmarks.
+
+Answers each agent with canned responses after a configurable latency and
+records the prompt and response sizes so prompt growth can be reported.
+"""
+import asyncio
+import json
+
+# Commands the stub game agent cycles through (valid exits of the fake interpreter)
+DEFAULT_COMMANDS = ["north", "up", "down", "south", "east", "take leaf", "west", "look"]
+
+class StubLLM:
+    """Async agent backend returning canned JSON without network access."""
+
+    def __init__(self, latency: float = 0.0, update_every: int = 5, commands: list = None):
+        self.latency = latency
+        self.update_every = update_every
+        self.commands = commands or DEFAULT_COMMANDS
+        self.calls = {}
+        self.prompt_bytes = {}
+        self.last_prompt_bytes = {}
+        self.on_game_call = None
+
+    async def __call__(self, agent_key: str, session_id: str, query: str, default_response: str) -> str:
+        count = self.calls.get(agent_key, 0)
+        self.calls[agent_key] = count + 1
+        size = len(query.encode('utf-8'))
+        self.prompt_bytes[agent_key] = self.prompt_bytes.get(agent_key, 0) + size
+        self.last_prompt_bytes[agent_key] = size
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if agent_key == "game_agent":
+            if self.on_game_call:
+                self.on_game_call(count + 1)
+            command = self.commands[count % len(self.commands)]
+            return json.dumps({"command": command, "explanation": "Scripted benchmark command"})
+        if agent_key == "update_decidor_agent":
+            should_update = self.update_every > 0 and (count + 1) % self.update_every == 0
+            return json.dumps({"should_update": should_update, "reason": "Scripted benchmark decision"})
+        if agent_key == "narration_agent":
+            should_update = self.update_every > 0 and (count + 1) % self.update_every == 0
+            narration = "The story moves on, one scripted step at a time." if should_update else ""
+            return json.dumps({"should_update": should_update, "narration": narration})
+        return "The story moves on, one scripted step at a time."
@@ -0,0 +1,82 @@
+"""
+Real-time factor benchmark for the registered TTS engines.
+
+The real-time factor (RTF) is synthesis time divided by the duration of the
+audio produced; an engine keeps up with the game when its RTF is below 1.
+
+Usage:
+    python -m benchmarks.tts_rtf [--engines vits fast-pitch espeak]
+"""
+import argparse
+import os
+import tempfile
+import time
+import wave
+
+from tts_engines import create_engine, list_engines
+
+# Sentences of typical narration length
+SAMPLE_TEXTS = [
+    "You stand in a dim hallway, the floorboards creaking beneath your feet.",
+    "A brass lantern rests on the table, its glass cracked but the wick still dry.",
+    "The old man looks up from his book and says, \"You are late. The others left at dawn.\"",
+]
+
+def get_wav_duration(file_path: str) -> float:
+    """Get the duration of a WAV file in seconds."""
+    with wave.open(file_path, 'rb') as wav:
+        return wav.getnframes() / float(wav.getframerate())
+
+def benchmark_engine(name: str, texts: list) -> dict:
+    """Load an engine and measure load time and real-time factor over the texts."""
+    result = {"engine": name}
+    engine = create_engine(name)
+    result["tier"] = engine.tier
+
+    start = time.perf_counter()
+    try:
+        engine.load()
+    except Exception as e:
+        result["error"] = str(e)
+        return result
+    result["load_s"] = time.perf_counter() - start
+
+    synth_time = 0.0
+    audio_time = 0.0
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for i, text in enumerate(texts):
+            file_path = os.path.join(temp_dir, f"sample_{i}.wav")
+            start = time.perf_counter()
+            try:
+                produced = engine.synthesize_to_file(text, file_path)
+            except Exception as e:
+                result["error"] = str(e)
+                return result
+            synth_time += time.perf_counter() - start
+            if produced:
+                audio_time += get_wav_duration(file_path)
+
+    result["synth_s"] = synth_time
+    result["audio_s"] = audio_time
+    result["rtf"] = synth_time / audio_time if audio_time else None
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure TTS real-time factor per engine')
+    parser.add_argument('--engines', nargs='*', help='Engines to benchmark (default: all registered)')
+    args = parser.parse_args()
+
+    names = args.engines or [name for name, _, _ in list_engines()]
+
+    print(f"{'engine':<15} {'tier':<9} {'load s':>8} {'synth s':>8} {'audio s':>8} {'RTF':>6}")
+    for name in names:
+        result = benchmark_engine(name, SAMPLE_TEXTS)
+        if "error" in result:
+            print(f"{name:<15} {result.get('tier', ''):<9} unavailable: {result['error']}")
+            continue
+        rtf = f"{result['rtf']:.2f}" if result['rtf'] is not None else "-"
+        print(f"{name:<15} {result['tier']:<9} {result['load_s']:8.2f} {result['synth_s']:8.2f} "
+              f"{result['audio_s']:8.2f} {rtf:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import os
+import sys
+import argparse
+import shutil
+import tempfile
+import time
+import wave
+from concurrent.futures import as_completed
+
+from tts_pool import SynthesisPool
+from utils.file_utils import read_story_narrations, read_json_narrations
+from utils.text_utils import split_sentences
+
+def load_narrations(log_path: str) -> list:
+    """Load narrations from a story log (.log) or a JSON game log (.json)."""
+    if log_path.endswith('.json'):
+        return read_json_narrations(log_path)
+    return read_story_narrations(log_path)
+
+def split_narrations(narrations: list, pause: float) -> tuple:
+    """Split narrations into sentence chunks. Returns (chunks, {index of a narration's last chunk: pause})."""
+    chunks = []
+    pauses = {}
+    for narration in narrations:
+        narration_chunks = split_sentences(narration)
+        # A narration without sentences adds no chunk to pause after
+        if narration_chunks:
+            chunks.extend(narration_chunks)
+            pauses[len(chunks) - 1] = pause
+    return chunks, pauses
+
+def print_progress(done: int, total: int, start_time: float):
+    """Print a single-line progress indicator."""
+    elapsed = time.time() - start_time
+    rate = done / elapsed if elapsed > 0 else 0
+    remaining = (total - done) / rate if rate > 0 else 0
+    print(f"\rSynthesized {done}/{total} chunks ({rate:.1f}/s, ~{remaining:.0f}s left)", end='', flush=True)
+
+def concatenate_wavs(file_paths: list, output_path: str, pauses: dict = None):
+    """Concatenate WAV files into one, inserting silence after the given indices.
+
+    pauses maps a chunk index to the number of seconds of silence to add after it.
+    """
+    pauses = pauses or {}
+    params = None
+    with wave.open(output_path, 'wb') as output:
+        for i, file_path in enumerate(file_paths):
+            if not os.path.exists(file_path):
+                continue
+            with wave.open(file_path, 'rb') as chunk:
+                if params is None:
+                    params = chunk.getparams()
+                    output.setparams(params)
+                elif chunk.getparams()[:3] != params[:3]:
+                    raise ValueError(f"Audio format of {file_path} does not match the first chunk")
+                output.writeframes(chunk.readframes(chunk.getnframes()))
+            if i in pauses and params is not None:
+                silence_frames = int(params.framerate * pauses[i])
+                output.writeframes(b'\x00' * silence_frames * params.sampwidth * params.nchannels)
+
+def main():
+    parser = argparse.ArgumentParser(description='Render a finished story log to a single audio file')
+    parser.add_argument('log_path', help='Story log (logs/*_story.log) or JSON game log (logs/*.json)')
+    parser.add_argument('-o', '--output', help='Output WAV file (default: log path with .wav extension)')
+    parser.add_argument('--engine', default=None, help='TTS engine (default: TTS_ENGINE or tacotron2-ddc)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Synthesis worker processes (default: TTS_WORKERS or half the CPU cores)')
+    parser.add_argument('--torch-threads', type=int, default=None,
+                        help='Torch intra-op threads per worker (default: split cores between workers)')
+    parser.add_argument('--pause', type=float, default=0.8, help='Seconds of silence between narrations')
+    args = parser.parse_args()
+
+    output_path = args.output or os.path.splitext(args.log_path)[0] + '.wav'
+
+    narrations = load_narrations(args.log_path)
+    if not narrations:
+        print(f"No narrations found in {args.log_path}")
+        sys.exit(1)
+
+    # Split every narration into sentence chunks, remembering where each narration ends
+    chunks, pauses = split_narrations(narrations, args.pause)
+
+    print(f"Rendering {len(narrations)} narrations ({len(chunks)} chunks) to {output_path}")
+
+    temp_dir = tempfile.mkdtemp(prefix="audiobook_")
+    pool = SynthesisPool(args.engine, workers=args.workers, torch_threads=args.torch_threads)
+    try:
+        file_paths = [os.path.join(temp_dir, f"chunk_{i:06d}.wav") for i in range(len(chunks))]
+        futures = pool.map(chunks, file_paths)
+
+        start_time = time.time()
+        done = 0
+        produced = 0
+        for future in as_completed(futures):
+            if future.result():
+                produced += 1
+            done += 1
+            print_progress(done, len(chunks), start_time)
+        print()
+
+        if not produced:
+            print(f"Engine '{pool.engine_name or 'default'}' produced no audio")
+            sys.exit(1)
+
+        concatenate_wavs(file_paths, output_path, pauses)
+        print(f"Audiobook written to {output_path} in {time.time() - start_time:.1f}s")
+    finally:
+        pool.shutdown()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import os
+import json
+from utils.logging_utils import main_logger as logger
+
+# Get checkpoint configuration from environment (0 disables checkpoints)
+CHECKPOINT_EVERY = int(os.getenv('CHECKPOINT_EVERY', '25'))
+
+CHECKPOINT_VERSION = 1
+
+def get_checkpoint_filename(json_log_file: str) -> str:
+    """Get the checkpoint file of a run, next to its JSON log."""
+    return json_log_file[:-len('.json')] + '_checkpoint.json'
+
+def write_checkpoint(checkpoint_file: str, runner, state: dict) -> dict:
+    """Save the interpreter and write the run state, replacing the previous checkpoint atomically.
+
+    `state` holds the turn counter, the screen about to be played, the log
+    files and anything else the game loop needs to continue. If the game
+    cannot be saved, resuming replays the recorded commands instead.
+    """
+    save_file = f"{checkpoint_file[:-len('.json')]}_t{state['turn']}.sav"
+    saved = runner.save_game(save_file)
+    if not saved:
+        logger.warning("Interpreter save failed; the checkpoint will resume by replaying commands")
+
+    checkpoint = dict(
+        state,
+        version=CHECKPOINT_VERSION,
+        game_path=runner.game_path,
+        runner_log_file=runner.log_file,
+        save_file=save_file if saved else None,
+        command_history=list(runner.command_history),
+        log_offsets={path: os.path.getsize(path) for path in (state['story_log_file'], runner.log_file)
+                     if os.path.exists(path)}
+    )
+    previous = load_checkpoint(checkpoint_file) if os.path.exists(checkpoint_file) else None
+
+    temp_file = checkpoint_file + '.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_file, checkpoint_file)
+
+    # The previous save is no longer referenced
+    if previous and previous.get('save_file') not in (None, checkpoint['save_file']):
+        try:
+            os.remove(previous['save_file'])
+        except OSError:
+            pass
+    logger.info(f"Checkpoint written at turn {state['turn']}: {checkpoint_file}")
+    return checkpoint
+
+def load_checkpoint(checkpoint_file: str) -> dict:
+    """Load a checkpoint written by write_checkpoint."""
+    with open(checkpoint_file, 'r', encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version {checkpoint.get('version')} in {checkpoint_file}")
+    return checkpoint
+
+def truncate_logs(checkpoint: dict, run_logs=None):
+    """Cut the run's logs back to their state at the checkpoint; later turns are replayed.
+
+    run_logs reopens the log segment that was open at the checkpoint if the
+    logs were rotated since.
+    """
+    closed_entries = 0
+    if run_logs is not None:
+        run_logs.rollback(checkpoint.get('log_segments', 0))
+        closed_entries = run_logs.closed_entries()
+    for path, size in checkpoint['log_offsets'].items():
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            os.truncate(path, size)
+    json_log_file = checkpoint['json_log_file']
+    try:
+        with open(json_log_file, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        entries = []
+    with open(json_log_file, 'w', encoding='utf-8') as f:
+        json.dump(entries[:checkpoint['json_entries'] - closed_entries], f, indent=2)
+
+def restore_interpreter(runner, checkpoint: dict) -> bool:
+    """Bring a freshly started interpreter to the checkpoint's game state.
+
+    Loads the checkpoint's save file, or replays the recorded commands if
+    there is none or it cannot be loaded.
+    """
+    if runner.wait_for_prompt() is None:
+        logger.warning("No prompt from the interpreter before restoring")
+    history = checkpoint['command_history']
+    # The save covers the whole command history
+    runner.command_history = list(history)
+    restored = bool(checkpoint.get('save_file')) and runner.restore_game(checkpoint['save_file'])
+    if not restored:
+        logger.info(f"Replaying {len(history)} commands")
+        runner.command_history = []
+        restored = runner.replay(history)
+    runner.command_history = list(history)
+    return restored
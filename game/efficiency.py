@@ -0,0 +1,190 @@
+"""
+Efficiency scoring of game runs.
+
+Tracks how much score a run gains for the agent calls, tokens and time it
+spends, and how many turns it wastes on fallback commands or on repeating
+itself, and writes the result next to the run's logs
+(logs/<game>_<timestamp>_efficiency.json). Reports of several runs can be
+compared per configuration.
+
+Usage:
+    python -m game.efficiency logs/*_efficiency.json
+"""
+import os
+import sys
+import json
+import time
+import glob
+import zlib
+import argparse
+from agents.scheduler import CHARS_PER_TOKEN
+from agents.agent_runner import agent_fallbacks
+from game.screen_parser import Turn, PROMPT_GAME_OVER, PROMPT_MORE
+from utils.metrics import registry
+from utils.logging_utils import main_logger as logger
+
+def _llm_usage() -> tuple:
+    """Get the agent calls made and prompt plus response bytes sent so far in this process."""
+    # Registered by agents.agent_runner, which counts every agent call
+    calls = registry.counter('llm_calls_total', '').total()
+    prompt_bytes = registry.counter('llm_prompt_bytes_total', '').total()
+    response_bytes = registry.counter('llm_response_bytes_total', '').total()
+    return calls, prompt_bytes + response_bytes
+
+def _game_agent_fallbacks() -> float:
+    return agent_fallbacks.total(agent='game_agent')
+
+def _per(score: int, amount: float):
+    return round(score / amount, 6) if amount else None
+
+class EfficiencyTracker:
+    """Follows a run turn by turn and scores its progress against its cost.
+
+    Agent calls and tokens are read from the metrics registry, so calls made
+    by any agent during the run count. Tokens are estimated from the bytes
+    of prompts and responses. A turn is wasted when the game agent's answer
+    was replaced by a fallback command, or when the same command is sent on
+    a screen it was already sent on since the score last changed.
+    """
+
+    def __init__(self, start_score: int = 0):
+        """start_score is the score the run starts from: 0 for a new game, None to take the first status line's."""
+        self.turns = 0
+        self.first_score = start_score
+        self.score = None
+        self.moves = None
+        self.game_over = False
+        self.fallback_turns = 0
+        self.loop_turns = 0
+        self._seen = set()
+        self._start_time = time.perf_counter()
+        self._start_calls, self._start_bytes = _llm_usage()
+        self._fallbacks = _game_agent_fallbacks()
+
+    def observe(self, turn: Turn, command: str):
+        """Record a played turn: its parsed screen and the command sent in answer."""
+        self.turns += 1
+        if turn.score is not None:
+            if self.first_score is None:
+                self.first_score = turn.score
+            if turn.score != self.score:
+                # Progress (or a loss) changes the game; earlier screens may come back legitimately
+                self._seen.clear()
+            self.score = turn.score
+        if turn.moves is not None:
+            self.moves = turn.moves
+        self.game_over = self.game_over or turn.prompt == PROMPT_GAME_OVER
+
+        fallbacks = _game_agent_fallbacks()
+        if fallbacks > self._fallbacks:
+            self.fallback_turns += 1
+        elif turn.prompt != PROMPT_MORE and command:
+            # The status line changes every move, so screens are compared by room and body
+            key = (turn.room, zlib.crc32(turn.body.encode('utf-8')), command.strip().lower())
+            if key in self._seen:
+                self.loop_turns += 1
+            self._seen.add(key)
+        self._fallbacks = fallbacks
+
+    def report(self) -> dict:
+        """Get the run's efficiency so far."""
+        calls, llm_bytes = _llm_usage()
+        calls -= self._start_calls
+        tokens = int((llm_bytes - self._start_bytes) / CHARS_PER_TOKEN)
+        wall_seconds = time.perf_counter() - self._start_time
+        gained = (self.score - self.first_score) if self.score is not None else 0
+        wasted = self.fallback_turns + self.loop_turns
+        return {
+            "turns": self.turns,
+            "moves": self.moves,
+            "score": self.score,
+            "score_gained": gained,
+            "game_over": self.game_over,
+            "llm_calls": int(calls),
+            "estimated_tokens": tokens,
+            "wall_seconds": round(wall_seconds, 3),
+            "score_per_llm_call": _per(gained, calls),
+            "score_per_1k_tokens": _per(gained, tokens / 1000),
+            "score_per_wall_second": _per(gained, wall_seconds),
+            "fallback_turns": self.fallback_turns,
+            "loop_turns": self.loop_turns,
+            "wasted_turns": wasted,
+            "wasted_turn_ratio": round(wasted / self.turns, 4) if self.turns else None
+        }
+
+def get_efficiency_filename(json_log_file: str) -> str:
+    """Get the efficiency report of a run, next to its JSON log."""
+    return json_log_file[:-len('.json')] + '_efficiency.json'
+
+def write_efficiency_report(tracker: EfficiencyTracker, json_log_file: str, config: dict = None) -> dict:
+    """Write the run's efficiency report next to its JSON log. Returns the report."""
+    report = dict(run=os.path.splitext(os.path.basename(json_log_file))[0], config=config or {}, **tracker.report())
+    with open(get_efficiency_filename(json_log_file), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Efficiency: {format_report(report)}")
+    return report
+
+def format_report(report: dict) -> str:
+    """Summarize a report on one line."""
+    def number(value, digits=3):
+        return f"{value:.{digits}f}" if value is not None else '-'
+    return (f"score {report['score']} (+{report['score_gained']}) in {report['turns']} turns, "
+            f"{report['llm_calls']} calls, ~{report['estimated_tokens']} tokens, {report['wall_seconds']:.0f}s; "
+            f"per call {number(report['score_per_llm_call'])}, per 1k tokens {number(report['score_per_1k_tokens'])}, "
+            f"per second {number(report['score_per_wall_second'], 4)}; "
+            f"wasted {report['wasted_turns']} turns ({report['fallback_turns']} fallbacks, {report['loop_turns']} loops)")
+
+def aggregate_reports(reports: list) -> list:
+    """Combine reports by configuration. Returns one summary per configuration, most score per call first.
+
+    Ratios are computed from the summed score and costs, so long runs weigh more than short ones.
+    """
+    groups = {}
+    for report in reports:
+        key = json.dumps(report.get('config') or {}, sort_keys=True)
+        group = groups.setdefault(key, {"config": report.get('config') or {}, "runs": 0, "turns": 0,
+                                        "score_gained": 0, "llm_calls": 0, "estimated_tokens": 0,
+                                        "wall_seconds": 0.0, "wasted_turns": 0, "games_over": 0})
+        group["runs"] += 1
+        group["games_over"] += int(bool(report.get('game_over')))
+        for field in ("turns", "score_gained", "llm_calls", "estimated_tokens", "wall_seconds", "wasted_turns"):
+            group[field] += report.get(field) or 0
+    summaries = []
+    for group in groups.values():
+        group["score_per_llm_call"] = _per(group["score_gained"], group["llm_calls"])
+        group["score_per_1k_tokens"] = _per(group["score_gained"], group["estimated_tokens"] / 1000)
+        group["score_per_wall_second"] = _per(group["score_gained"], group["wall_seconds"])
+        group["wasted_turn_ratio"] = round(group["wasted_turns"] / group["turns"], 4) if group["turns"] else None
+        summaries.append(group)
+    return sorted(summaries, key=lambda group: group["score_per_llm_call"] or 0, reverse=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the efficiency of runs by configuration')
+    parser.add_argument('paths', nargs='*', help='Efficiency reports (default: logs/*_efficiency.json)')
+    parser.add_argument('--runs', action='store_true', help='Also list every run')
+    args = parser.parse_args()
+
+    reports = []
+    for path in args.paths or sorted(glob.glob(os.path.join('logs', '*_efficiency.json'))):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                reports.append(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Skipped {path}: {e}")
+    if not reports:
+        print("No efficiency reports found")
+        sys.exit(1)
+
+    if args.runs:
+        for report in reports:
+            print(f"{report['run']}: {format_report(report)}")
+        print()
+    for group in aggregate_reports(reports):
+        config = ', '.join(f"{name}={value}" for name, value in sorted(group['config'].items())) or '(no config)'
+        print(f"{config}\n  {group['runs']} runs, {group['turns']} turns, +{group['score_gained']} score, "
+              f"{group['llm_calls']} calls, ~{group['estimated_tokens']} tokens, {group['wall_seconds']:.0f}s\n"
+              f"  score/call {group['score_per_llm_call']}  score/1k tokens {group['score_per_1k_tokens']}  "
+              f"score/s {group['score_per_wall_second']}  wasted turns {group['wasted_turn_ratio']}")
+
+if __name__ == "__main__":
+    main()
@@ -25,4 +25,9 @@ def print_agent_response(command: str):
     # Remove any leading/trailing whitespace
     command = command.strip()
     # Print with a single newline prefix and [AGENT] tag
-    print(f"\n[AGENT] {command}") 
\ No newline at end of file
+    print(f"\n[AGENT] {command}")
+
+def print_story_narration(narration: str):
+    """Print story narration in a clean format."""
+    # Print with a single newline prefix and [STORY] tag
+    print(f"\n[STORY] {narration}")
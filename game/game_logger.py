@@ -1,7 +1,13 @@
 import json
 from datetime import datetime
-from utils.text_utils import clean_log_text
+from utils.tracing import traced
+from utils.metrics import registry
 
+# Bytes written per log, rewrites included: the JSON log is rewritten on every update
+_log_bytes = registry.counter('log_bytes_written_total', 'Bytes written to the game logs', ('log',))
+_log_entries = registry.gauge('game_log_entries', 'Entries in the open segment of the JSON game log')
+
+@traced('log.agent_command')
 def log_agent_command(log_file: str, command_data: dict):
     """Add the agent's command and explanation to the log file with a timestamp."""
     timestamp = datetime.now().strftime('%H:%M:%S.%f')[:-3]
@@ -11,28 +17,34 @@ def log_agent_command(log_file: str, command_data: dict):
     
     with open(log_file, 'a', encoding='utf-8') as f:
         f.write(log_entry)
+    _log_bytes.inc(len(log_entry.encode('utf-8')), log='transcript')
 
+@traced('log.story_narration')
 def log_story_narration(story_log_file: str, narration: str, update_decision: dict = None):
-    """Add the story narration to the log file with a timestamp."""
-    timestamp = datetime.now().strftime('%H:%M:%S.%f')[:-3]
-    log_entry = f"[{timestamp}] [STORY] {narration}\n"
+    """Add the story narration to the log file."""
+    # Remove any leading/trailing whitespace
+    narration = narration.strip()
     
+    # Write to log file with double newline for readability
     with open(story_log_file, 'a', encoding='utf-8') as f:
-        f.write(log_entry)
+        f.write(f"{narration}\n\n")
+    _log_bytes.inc(len(narration.encode('utf-8')) + 2, log='story')
 
-def log_game_update(json_log_file: str, game_output: str, if_agent_action: dict = None, story_updated: bool = False):
-    """Log a game update to the JSON log file."""
+@traced('log.game_update')
+def log_game_update(json_log_file: str, game_output: str, if_agent_action: dict = None, story_updated: bool = False,
+                    turn=None):
+    """Log a game update to the JSON log file, with the parsed screen fields if a Turn is given."""
     timestamp = datetime.now().strftime('%H:%M:%S.%f')[:-3]
     
     # Create the update entry
     update = {
         "timestamp": timestamp,
-        "game_output": clean_log_text(game_output),
+        "game_output": game_output,
+        "if_agent_action": if_agent_action,
         "story_updated": story_updated
     }
-    
-    if if_agent_action:
-        update["agent_action"] = if_agent_action
+    if turn is not None:
+        update.update(turn.summary())
     
     # Read existing entries or create new list
     try:
@@ -47,7 +59,10 @@ def log_game_update(json_log_file: str, game_output: str, if_agent_action: dict
     # Write back to file
     with open(json_log_file, 'w', encoding='utf-8') as f:
         json.dump(entries, f, indent=2)
+        _log_bytes.inc(f.tell(), log='json')
+    _log_entries.set(len(entries))
 
+@traced('log.update_last_json_entry')
 def update_last_json_entry(json_log_file: str, **kwargs):
     """Update the last entry in the JSON log file with additional fields."""
     try:
@@ -62,4 +77,5 @@ def update_last_json_entry(json_log_file: str, **kwargs):
         
         # Write back to file
         with open(json_log_file, 'w', encoding='utf-8') as f:
-            json.dump(entries, f, indent=2) 
\ No newline at end of file
+            json.dump(entries, f, indent=2)
+            _log_bytes.inc(f.tell(), log='json') 
\ No newline at end of file
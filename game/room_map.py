@@ -0,0 +1,117 @@
+import re
+from collections import deque
+
+# Movement commands and their abbreviations, mapped to a canonical direction
+DIRECTIONS = {
+    'n': 'north', 's': 'south', 'e': 'east', 'w': 'west',
+    'ne': 'northeast', 'nw': 'northwest', 'se': 'southeast', 'sw': 'southwest',
+    'u': 'up', 'd': 'down', 'in': 'in', 'out': 'out',
+}
+DIRECTIONS.update({direction: direction for direction in list(DIRECTIONS.values())})
+
+_MOVE_PATTERN = re.compile(r'^(?:go |walk |run )?(?P<direction>[a-z]+)$')
+_GOTO_PATTERN = re.compile(r'^goto\s+(?P<room>.+?)\s*$', re.IGNORECASE)
+
+def normalize_direction(command: str) -> str:
+    """Get the canonical direction of a movement command, or None if it is not one."""
+    if not command:
+        return None
+    match = _MOVE_PATTERN.match(command.strip().lower())
+    return DIRECTIONS.get(match.group('direction')) if match else None
+
+def parse_goto(command: str) -> str:
+    """Get the target room of a GOTO <room> macro command, or None."""
+    match = _GOTO_PATTERN.match(command.strip()) if command else None
+    return match.group('room') if match else None
+
+class RoomMap:
+    """Directed graph of the rooms seen so far, built from status-line room names and movement commands."""
+
+    def __init__(self):
+        self.exits = {}
+        self.visits = {}
+        self.blocked = {}
+        self.current = None
+
+    def to_dict(self) -> dict:
+        """Get the map as JSON-serialisable data."""
+        return {
+            "exits": self.exits,
+            "visits": self.visits,
+            "blocked": {room: sorted(directions) for room, directions in self.blocked.items()},
+            "current": self.current
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'RoomMap':
+        """Rebuild a map from to_dict data."""
+        room_map = cls()
+        room_map.exits = {room: dict(exits) for room, exits in data.get("exits", {}).items()}
+        room_map.visits = dict(data.get("visits", {}))
+        room_map.blocked = {room: set(directions) for room, directions in data.get("blocked", {}).items()}
+        room_map.current = data.get("current")
+        return room_map
+
+    def observe(self, room: str, command: str = None):
+        """Record the room shown after `command` was sent."""
+        if not room:
+            return
+        direction = normalize_direction(command)
+        previous = self.current
+        if previous is not None and direction:
+            if room != previous:
+                self.exits.setdefault(previous, {})[direction] = room
+                self.blocked.get(previous, set()).discard(direction)
+            elif direction not in self.exits.get(previous, {}):
+                self.blocked.setdefault(previous, set()).add(direction)
+        if room != previous:
+            self.visits[room] = self.visits.get(room, 0) + 1
+        self.exits.setdefault(room, {})
+        self.current = room
+
+    def find_room(self, name: str) -> str:
+        """Get the known room matching a name (case-insensitive), or None."""
+        name = name.strip().lower()
+        for room in self.exits:
+            if room.lower() == name:
+                return room
+        return None
+
+    def shortest_path(self, source: str, target: str) -> list:
+        """Get the moves from source to target as [(direction, room), ...], or None if no route is known."""
+        if source == target:
+            return []
+        previous = {source: None}
+        queue = deque([source])
+        while queue:
+            room = queue.popleft()
+            for direction, neighbour in self.exits.get(room, {}).items():
+                if neighbour in previous:
+                    continue
+                previous[neighbour] = (room, direction)
+                if neighbour == target:
+                    path = []
+                    while previous[neighbour] is not None:
+                        room, direction = previous[neighbour]
+                        path.append((direction, neighbour))
+                        neighbour = room
+                    return path[::-1]
+                queue.append(neighbour)
+        return None
+
+    def summary(self, max_rooms: int = 20) -> str:
+        """Describe the known map compactly, most visited rooms first."""
+        if not self.exits:
+            return ''
+        rooms = sorted(self.exits, key=lambda room: (room != self.current, -self.visits.get(room, 0)))
+        lines = []
+        for room in rooms[:max_rooms]:
+            exits = ', '.join(f"{direction} -> {neighbour}" for direction, neighbour in self.exits[room].items())
+            line = f"- {room} (visited {self.visits.get(room, 0)}x): {exits or 'no known exits'}"
+            blocked = self.blocked.get(room)
+            if blocked:
+                line += f"; blocked: {', '.join(sorted(blocked))}"
+            lines.append(line)
+        if len(rooms) > max_rooms:
+            lines.append(f"- ... and {len(rooms) - max_rooms} more rooms")
+        return '\n'.join(lines)
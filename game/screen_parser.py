@@ -0,0 +1,88 @@
+import re
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+# dfrotz status line: room name padded with spaces, then score and moves
+# (or turns), e.g. " West of House                  Score: 0        Moves: 1"
+STATUS_LINE_PATTERN = re.compile(
+    r'^\s?(?P<room>\S.*?)\s{2,}Score:\s*(?P<score>-?\d+)\s+(?:Moves|Turns):\s*(?P<moves>\d+)\s*$'
+)
+# Status line of time-based games, e.g. " Bedroom                Time: 9:05 am"
+TIME_STATUS_LINE_PATTERN = re.compile(
+    r'^\s?(?P<room>\S.*?)\s{2,}Time:\s*(?P<time>\d{1,2}:\d{2}(?:\s*[ap]\.?m\.?)?)\s*$', re.IGNORECASE
+)
+MORE_PATTERN = re.compile(r'\*{3}\s*MORE\s*\*{3}\s*$')
+COMMAND_PROMPT_PATTERN = re.compile(r'(?:^|\n)\s*>\s*$')
+GAME_OVER_PATTERN = re.compile(
+    r'\*{2,}\s*You have (?:died|won)\s*\*{2,}'
+    r'|Would you like to (?:RESTART|RESTORE)'
+    r'|\[Hit any key to exit\.?\]',
+    re.IGNORECASE
+)
+
+# Prompt types: what the game is waiting for at the end of the screen
+PROMPT_COMMAND = 'command'
+PROMPT_MORE = 'more'
+PROMPT_GAME_OVER = 'game_over'
+PROMPT_NONE = 'none'
+
+@dataclass(frozen=True)
+class Turn:
+    """One parsed game screen."""
+    raw: str
+    body: str
+    prompt: str
+    status_line: Optional[str] = None
+    room: Optional[str] = None
+    score: Optional[int] = None
+    moves: Optional[int] = None
+    time: Optional[str] = None
+
+    def summary(self) -> dict:
+        """Get the structured fields, without the raw and body text."""
+        fields = asdict(self)
+        del fields['raw'], fields['body']
+        return fields
+
+def _status(line: str):
+    """Match a line against the status line patterns."""
+    return STATUS_LINE_PATTERN.match(line) or TIME_STATUS_LINE_PATTERN.match(line)
+
+def parse_screen(text: str) -> Turn:
+    """Parse a chunk of dfrotz output into a Turn record."""
+    lines = text.split('\n')
+
+    # The status line is the first non-empty line, when the game shows one
+    status_line = match = None
+    for i, line in enumerate(lines):
+        if not line.strip():
+            continue
+        match = _status(line)
+        if match:
+            status_line = line.strip()
+            lines = lines[i + 1:]
+        break
+
+    body = '\n'.join(lines).strip()
+    if GAME_OVER_PATTERN.search(body):
+        prompt = PROMPT_GAME_OVER
+    elif MORE_PATTERN.search(body):
+        prompt = PROMPT_MORE
+        body = MORE_PATTERN.sub('', body).rstrip()
+    elif COMMAND_PROMPT_PATTERN.search(body):
+        prompt = PROMPT_COMMAND
+        body = COMMAND_PROMPT_PATTERN.sub('', body).rstrip()
+    else:
+        prompt = PROMPT_NONE
+
+    fields = match.groupdict() if match else {}
+    return Turn(
+        raw=text,
+        body=body,
+        prompt=prompt,
+        status_line=status_line,
+        room=fields.get('room'),
+        score=int(fields['score']) if fields.get('score') is not None else None,
+        moves=int(fields['moves']) if fields.get('moves') is not None else None,
+        time=fields.get('time')
+    )
@@ -0,0 +1,188 @@
+import os
+import re
+import json
+import difflib
+import hashlib
+from utils.logging_utils import main_logger as logger
+
+# Directory holding the vocabulary extracted from each story file, by content hash
+VOCABULARY_CACHE_DIR = os.getenv('VOCABULARY_CACHE_DIR', os.path.join('logs', 'vocabulary'))
+
+# Default Z-character alphabets (A0 lower case, A1 upper case, A2 punctuation)
+_ALPHABETS = (
+    'abcdefghijklmnopqrstuvwxyz',
+    'ABCDEFGHIJKLMNOPQRSTUVWXYZ',
+    ' \n0123456789.,!?_#\'"/\\-:()',
+)
+
+class ZMachineError(Exception):
+    """Raised when a story file cannot be parsed."""
+
+def _word(data: bytes, address: int) -> int:
+    return int.from_bytes(data[address:address + 2], 'big')
+
+def _alphabets(data: bytes, version: int) -> tuple:
+    """Get the story's alphabets: the defaults, or the custom table of version 5+ games."""
+    table = _word(data, 0x34) if version >= 5 else 0
+    if not table:
+        return _ALPHABETS
+    chars = data[table:table + 78].decode('latin-1')
+    # Positions 0 and 1 of A2 are always the ZSCII escape and newline
+    return chars[0:26], chars[26:52], ' \n' + chars[54:78]
+
+def decode_zstring(data: bytes, address: int, length: int, version: int, alphabets: tuple = _ALPHABETS) -> str:
+    """Decode `length` bytes of Z-encoded text (dictionary entries use no abbreviations)."""
+    zchars = []
+    for offset in range(address, address + length, 2):
+        word = _word(data, offset)
+        zchars += [(word >> 10) & 0x1f, (word >> 5) & 0x1f, word & 0x1f]
+
+    text = []
+    alphabet = 0
+    i = 0
+    while i < len(zchars):
+        zchar = zchars[i]
+        i += 1
+        if zchar == 0:
+            text.append(' ')
+        elif zchar in (4, 5) and version >= 3:
+            alphabet = zchar - 3
+            continue
+        elif zchar in (1, 2, 3):
+            # Abbreviation reference: skip its index
+            i += 1
+        elif alphabet == 2 and zchar == 6:
+            # 10-bit ZSCII character
+            if i + 1 < len(zchars):
+                text.append(chr((zchars[i] << 5) | zchars[i + 1]))
+            i += 2
+        elif zchar >= 6:
+            text.append(alphabets[alphabet][zchar - 6])
+        alphabet = 0
+    return ''.join(text).rstrip()
+
+def parse_dictionary(data: bytes) -> dict:
+    """Parse a story file's header and dictionary table.
+
+    Returns the version, the number of characters a dictionary word keeps
+    (6 before version 4, 9 after), the word separators and the words.
+    """
+    if len(data) < 64:
+        raise ZMachineError("File too short to be a Z-machine story")
+    version = data[0]
+    if version not in range(1, 9):
+        raise ZMachineError(f"Unsupported Z-machine version {version}")
+    address = _word(data, 0x08)
+    if not address or address >= len(data):
+        raise ZMachineError("Dictionary address out of range")
+
+    separator_count = data[address]
+    separators = data[address + 1:address + 1 + separator_count].decode('latin-1')
+    address += 1 + separator_count
+    entry_length = data[address]
+    # A negative count marks an unsorted dictionary
+    entry_count = abs(int.from_bytes(data[address + 1:address + 3], 'big', signed=True))
+    address += 3
+
+    text_length = 4 if version <= 3 else 6
+    if entry_length < text_length or address + entry_count * entry_length > len(data):
+        raise ZMachineError("Dictionary table out of range")
+    alphabets = _alphabets(data, version)
+    words = [
+        decode_zstring(data, address + i * entry_length, text_length, version, alphabets)
+        for i in range(entry_count)
+    ]
+    return {
+        "version": version,
+        "word_length": 6 if version <= 3 else 9,
+        "separators": separators,
+        "words": [word for word in words if word]
+    }
+
+class Vocabulary:
+    """Words a story file's parser knows, with the story's truncation rule."""
+
+    def __init__(self, words: list, word_length: int = 9, separators: str = '.,"', version: int = 5):
+        self.words = sorted(set(words))
+        self.word_length = word_length
+        self.separators = separators
+        self.version = version
+        self._known = set(self.words)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def is_known(self, word: str) -> bool:
+        """Check whether the game knows a word, as it does: only the first word_length characters count."""
+        word = word.lower()
+        return word.isdigit() or word[:self.word_length] in self._known
+
+    def correct(self, word: str) -> str:
+        """Get the closest known word, or None if nothing is close."""
+        matches = difflib.get_close_matches(word.lower()[:self.word_length], self.words, n=1, cutoff=0.8)
+        return matches[0] if matches else None
+
+    def tokenize(self, command: str) -> list:
+        """Split a command into words the way the game does, leaving out quoted text."""
+        command = re.sub(r'"[^"]*"?', ' ', command.lower())
+        separators = ''.join(re.escape(char) for char in self.separators if char != '"')
+        pattern = f"[{separators}]|[^\\s{separators}]+" if separators else r"\S+"
+        return [token for token in re.findall(pattern, command) if token not in self.separators]
+
+def _file_hash(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+# Vocabularies loaded in this process, by story file hash
+_vocabularies = {}
+
+def load_vocabulary(story_path: str) -> Vocabulary:
+    """Load a story file's vocabulary, cached per file content hash in memory and on disk."""
+    digest = _file_hash(story_path)
+    if digest in _vocabularies:
+        return _vocabularies[digest]
+
+    cache_file = os.path.join(VOCABULARY_CACHE_DIR, f'{digest[:16]}.json')
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            table = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        with open(story_path, 'rb') as f:
+            table = parse_dictionary(f.read())
+        os.makedirs(VOCABULARY_CACHE_DIR, exist_ok=True)
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump(table, f)
+        logger.info(f"Extracted {len(table['words'])} words from {story_path} (Z-machine v{table['version']})")
+
+    vocabulary = Vocabulary(table['words'], table['word_length'], table['separators'], table['version'])
+    _vocabularies[digest] = vocabulary
+    return vocabulary
+
+class CommandValidator:
+    """Checks commands against the game's vocabulary before they are sent.
+
+    Unknown words close to a known one are corrected; the rest are reported
+    so the command can be replaced before it costs an interpreter turn.
+    """
+
+    # Commands handled by the runner rather than the game's parser
+    PASSTHROUGH = {'enter', ''}
+
+    def __init__(self, vocabulary: Vocabulary):
+        self.vocabulary = vocabulary
+
+    def validate(self, command: str) -> tuple:
+        """Check a command. Returns (command with corrections applied, unknown words)."""
+        if command.strip().lower() in self.PASSTHROUGH:
+            return command, []
+        corrected = command
+        unknown = []
+        for word in self.vocabulary.tokenize(command):
+            if self.vocabulary.is_known(word):
+                continue
+            replacement = self.vocabulary.correct(word)
+            if replacement:
+                corrected = re.sub(rf'(?i)\b{re.escape(word)}\b', replacement, corrected, count=1)
+            else:
+                unknown.append(word)
+        return corrected, unknown
@@ -1,495 +1,297 @@
-from runner.frotz_runner import FrotzRunner
 import sys
 import traceback
-import logging
 import os
 import argparse
 import asyncio
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
-from agents.agent import game_agent, story_agent, update_decidor_agent
-from datetime import datetime
-import select
 import time
-from google.genai import types
-from dotenv import load_dotenv
-from collections import deque
 import json
-from tts_handler import TTSHandler
-import re
+from collections import deque
+from dotenv import load_dotenv
 
-# Import from new modules
-from utils.logging_utils import main_logger as logger, log_agent_interaction
+# Load environment variables from .env file before any module reads its configuration
+load_dotenv()
+
+from runner.frotz_runner import FrotzRunner
+from runner.watchdog import WATCHDOG, InterpreterWatchdog, exited_cleanly
+from utils.logging_utils import main_logger as logger
+from utils.tracing import tracer
+from utils.log_rotation import RunLogs, wait_for_compression
+from utils.run_store import open_run_store, get_run_store, close_run_store
+from utils.metrics import registry, start_metrics
+from utils.profiling import TurnProfiler, create_profiler, get_profile_dir
 from utils.file_utils import get_story_log_filename, get_json_log_filename, get_last_n_updates, get_last_n_json_updates
-from utils.text_utils import clean_log_text
-from game.game_io import wait_for_key, print_game_output, print_agent_response
+from game.game_io import wait_for_key, print_game_output, print_agent_response, print_story_narration
+from game.screen_parser import parse_screen, PROMPT_MORE, PROMPT_COMMAND, PROMPT_GAME_OVER
+from game.room_map import RoomMap, parse_goto
+from game.checkpoint import (CHECKPOINT_EVERY, get_checkpoint_filename, write_checkpoint, load_checkpoint,
+                              truncate_logs, restore_interpreter)
+from game.zmachine import CommandValidator, ZMachineError, load_vocabulary
 from game.game_logger import log_agent_command, log_story_narration, log_game_update, update_last_json_entry
+from game.efficiency import EfficiencyTracker, write_efficiency_report, format_report
 from agents.agent_interactions import get_agent_command, get_update_decision
-from agents.story_handler import get_story_narration
-
-# Load environment variables from .env file
-load_dotenv()
+from agents.session_compaction import get_session_stats
+from agents.agent_runner import (export_sessions, import_sessions, agent_fallbacks, get_agent_config,
+                                 close_agent_backends)
+from agents.story_handler import get_story_narration, get_update_and_narration
 
 # Get TTS configuration from environment
 USE_TTS = os.getenv('USE_TTS', 'false').lower() == 'true'
-# Get wait for key configuration from environment
-WAIT_FOR_KEY = os.getenv('WAIT_FOR_KEY', 'true').lower() == 'true'
-
-# Set up logging to file only
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filename='game.log',
-    filemode='a'
-)
-
-# Create a logger that only writes to file
-logger = logging.getLogger('main')
-logger.propagate = False  # Prevent propagation to root logger
-
-# Define constants for identifying the interaction context
-APP_NAME = "text_game_app"
-USER_ID = "game_user"
-SESSION_ID = "game_session_001"
-
-# Create a session service for the agent
-session_service = InMemorySessionService()
-
-def wait_for_key():
-    """Wait for any key press to continue if enabled in environment."""
-    if not WAIT_FOR_KEY:
-        return
-    print("\nPress any key to continue...", end='', flush=True)
-    # Use select to wait for input without blocking
-    select.select([sys.stdin], [], [], None)
-    sys.stdin.readline()
-    print("\r" + " " * 40 + "\r", end='', flush=True)  # Clear the prompt line
-
-def print_game_output(text: str):
-    """Print game output in a clean format."""
-    # Print exactly as received, preserving all formatting
-    print(text, end='', flush=True)
-
-def print_agent_response(command: str):
-    """Print agent response in a clean format."""
-    # Remove any leading/trailing whitespace
-    command = command.strip()
-    # Print with a single newline prefix and [AGENT] tag
-    print(f"\n[AGENT] {command}")
-
-def clean_log_text(log_text: str) -> str:
-    """Remove timestamps and clean up the log text."""
-    # Split into lines and remove timestamps
-    lines = []
-    for line in log_text.split('\n'):
-        # Remove timestamp pattern [HH:MM:SS.mmm]
-        if line.strip():
-            # Find the first ']' after a timestamp
-            if ']' in line:
-                timestamp_end = line.find(']') + 1
-                line = line[timestamp_end:].strip()
-            lines.append(line)
-    
-    return '\n'.join(lines)
-
-def log_agent_interaction(agent_name: str, system_message: str, prompt: str, response: str):
-    """Log agent interactions to a JSON file."""
-    timestamp = datetime.now().strftime('%H:%M:%S.%f')[:-3]
-    
-    # Create logs directory if it doesn't exist
-    os.makedirs('logs', exist_ok=True)
-    
-    # Create the log entry
-    log_entry = {
-        "timestamp": timestamp,
-        "system_message": system_message,
-        "prompt": prompt,
-        "response": response
-    }
-    
-    # Get the log file path
-    log_file = f'logs/{agent_name}_interactions.json'
-    
-    # Read existing entries or create new list
-    try:
-        with open(log_file, 'r', encoding='utf-8') as f:
-            entries = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        entries = []
-    
-    # Append new entry
-    entries.append(log_entry)
-    
-    # Write back to file
-    with open(log_file, 'w', encoding='utf-8') as f:
-        json.dump(entries, f, indent=2)
-
-async def get_agent_command(log_file: str) -> dict:
-    """Get the next command from the agent based on the game log."""
-    # Create the specific session where the conversation will happen
-    session = await session_service.create_session(
-        app_name=APP_NAME,
-        user_id=USER_ID,
-        session_id=SESSION_ID
-    )
-    logger.info(f"Session created: App='{APP_NAME}', User='{USER_ID}', Session='{SESSION_ID}'")
-
-    runner = Runner(
-        agent=game_agent,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
-    logger.info(f"Runner created for agent '{runner.agent.name}'")
-
-    # Read the entire log file
-    try:
-        with open(log_file, 'r', encoding='utf-8') as f:
-            log_text = f.read()
-    except Exception as e:
-        logger.error(f"Error reading log file: {e}")
-        return {"command": "look", "explanation": "Default command due to error reading log file"}
-
-    # Clean the log text
-    clean_text = clean_log_text(log_text)
-
-    # Prepare the user's message in ADK format
-    query = (
-        "Here is the current game log. What should the next command be?\n\n" + clean_text + "\n\nRespond with ONLY the raw JSON object, nothing else. Do not use markdown or any extra text."
-    )
-    content = types.Content(role='user', parts=[types.Part(text=query)])
-
-    final_response_text = "Agent did not produce a final response."  # Default
-
-    # Run the agent and process events
-    async for event in runner.run_async(user_id=USER_ID, session_id=SESSION_ID, new_message=content):
-        if event.is_final_response():
-            if event.content and event.content.parts:
-                final_response_text = event.content.parts[0].text
-            elif event.actions and event.actions.escalate:
-                final_response_text = f"Agent escalated: {event.error_message or 'No specific message.'}"
-            break
 
-    # Log the agent interaction
-    log_agent_interaction(
-        "game_agent",
-        game_agent.instruction,
-        query,
-        final_response_text
-    )
-
-    def extract_json(text):
-        text = text.strip()
-        # Remove triple backticks and optional 'json'
-        text = re.sub(r'^```json\s*|^```|```$', '', text, flags=re.MULTILINE).strip()
-        # Extract the first {...} block if extra text is present
-        match = re.search(r'\{[\s\S]*\}', text)
-        if match:
-            return match.group(0)
-        return text
-
-    try:
-        # Parse the JSON response, cleaning up markdown if needed
-        raw_json = extract_json(final_response_text)
-        response = json.loads(raw_json)
-        if not isinstance(response, dict) or 'command' not in response or 'explanation' not in response:
-            raise ValueError("Invalid response format")
-        return response
-    except (json.JSONDecodeError, ValueError) as e:
-        logger.error(f"Error parsing agent response: {e}")
-        return {"command": "look", "explanation": "Default command due to invalid response format"}
-
-def log_agent_command(log_file: str, command_data: dict):
-    """Add the agent's command and explanation to the log file with a timestamp."""
-    timestamp = datetime.now().strftime('%H:%M:%S.%f')[:-3]
-    command = command_data['command']
-    explanation = command_data['explanation']
-    log_entry = f"[{timestamp}] [AGENT] {command}\n"
-    
-    with open(log_file, 'a', encoding='utf-8') as f:
-        f.write(log_entry)
-    
-    # Print agent response in clean format
-    print_agent_response(command)
-
-async def get_story_narration(log_text: str, story_log: str) -> str:
-    """Get story narration from the agent based on the game log and previous story."""
-    # Create the specific session where the conversation will happen
-    session = await session_service.create_session(
-        app_name=APP_NAME,
-        user_id=USER_ID,
-        session_id=f"{SESSION_ID}_story"
-    )
-    logger.info(f"Story session created: App='{APP_NAME}', User='{USER_ID}', Session='{SESSION_ID}_story'")
-
-    runner = Runner(
-        agent=story_agent,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
-    logger.info(f"Runner created for story agent '{runner.agent.name}'")
-
-    # Prepare the user's message in ADK format
-    query = (
-        "You are narrating an interactive fiction story. Here are the last 3 narrations and the latest game events:\n\n"
-        f"Previous narrations:\n{story_log}\n\n"
-        f"Latest game events to narrate:\n{log_text}\n\n"
-        "Create a new narration that:\n"
-        "1. Only describes the new events that haven't been narrated yet\n"
-        "2. Maintains continuity with previous narrations\n"
-        "3. Is concise and engaging\n"
-        "4. Includes any dialogue or important details\n"
-        "5. Does not repeat information already narrated\n\n"
-        "Respond with the new narration only."
-    )
-    content = types.Content(role='user', parts=[types.Part(text=query)])
-
-    final_response_text = "Story agent did not produce a final response."  # Default
-
-    # Run the agent and process events
-    async for event in runner.run_async(user_id=USER_ID, session_id=f"{SESSION_ID}_story", new_message=content):
-        if event.is_final_response():
-            if event.content and event.content.parts:
-                final_response_text = event.content.parts[0].text
-            elif event.actions and event.actions.escalate:
-                final_response_text = f"Story agent escalated: {event.error_message or 'No specific message.'}"
-            break
+# Get narration mode: 'separate' asks the update decider then the story agent,
+# 'combined' decides and narrates in a single agent call
+NARRATION_MODE = os.getenv('NARRATION_MODE', 'separate').lower()
+
+# Get room map configuration: track rooms and exits, show the map to the game
+# agent and let it travel with GOTO <room> macros
+ROOM_MAP = os.getenv('ROOM_MAP', 'true').lower() == 'true'
+ROOM_MAP_SUMMARY_ROOMS = int(os.getenv('ROOM_MAP_SUMMARY_ROOMS', '20'))
+
+# Get command validation configuration: check the game agent's words against
+# the story file's dictionary, asking again up to COMMAND_RETRIES times
+VALIDATE_COMMANDS = os.getenv('VALIDATE_COMMANDS', 'true').lower() == 'true'
+COMMAND_RETRIES = int(os.getenv('COMMAND_RETRIES', '1'))
+# Include the game's vocabulary in every game agent prompt
+GAME_AGENT_VOCABULARY = os.getenv('GAME_AGENT_VOCABULARY', 'false').lower() == 'true'
+
+# Metrics of the game loop
+_turns = registry.counter('game_turns_total', 'Game turns played')
+_turn_seconds = registry.histogram('game_turn_seconds', 'Time per turn, agent calls included')
+_narrations = registry.counter('game_narrations_total', 'Story narrations produced')
+_score = registry.gauge('game_score', 'Score shown on the status line')
+_moves = registry.gauge('game_moves', 'Moves shown on the status line')
+
+def init_log_files(game_path: str) -> tuple:
+    """Create empty story and JSON log files for a new run. Returns their paths."""
+    # Get log file paths
+    story_log_file = get_story_log_filename(game_path)
+    json_log_file = get_json_log_filename(game_path)
 
-    # Log the agent interaction
-    log_agent_interaction(
-        "story_narration",
-        story_agent.instruction,
-        query,
-        final_response_text
-    )
-
-    return final_response_text.strip()
-
-def log_story_narration(story_log_file: str, narration: str, update_decision: dict = None):
-    """Add the story narration to the log file."""
-    # Remove any leading/trailing whitespace
-    narration = narration.strip()
-    
-    # Write to log file with double newline for readability
-    with open(story_log_file, 'a', encoding='utf-8') as f:
-        f.write(f"{narration}\n\n")
-    
-    # Print story narration with a single newline prefix and [STORY] tag
-    print(f"\n[STORY] {narration}")
-
-def get_story_log_filename(game_path: str) -> str:
-    """Generate a story log filename based on game name and current timestamp."""
-    # Extract game name from path (remove extension and path)
-    game_name = os.path.splitext(os.path.basename(game_path))[0]
-    
-    # Create timestamp
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    
-    # Create logs directory if it doesn't exist
-    os.makedirs('logs', exist_ok=True)
-    
-    # Return the full path
-    return f'logs/{game_name}_{timestamp}_story.log'
-
-def get_json_log_filename(game_path: str) -> str:
-    """Generate a JSON log filename based on game name and current timestamp."""
-    # Extract game name from path (remove extension and path)
-    game_name = os.path.splitext(os.path.basename(game_path))[0]
-    
-    # Create timestamp
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    
-    # Create logs directory if it doesn't exist
-    os.makedirs('logs', exist_ok=True)
-    
-    # Return the full path
-    return f'logs/{game_name}_{timestamp}.json'
-
-def log_game_update(json_log_file: str, game_output: str, if_agent_action: dict = None, story_updated: bool = False):
-    """Log game updates to a JSON file."""
-    timestamp = datetime.now().strftime('%H:%M:%S.%f')[:-3]
-    
     # Create logs directory if it doesn't exist
     os.makedirs('logs', exist_ok=True)
-    
-    # Create the log entry
-    log_entry = {
-        "timestamp": timestamp,
-        "game_output": game_output,
-        "if_agent_action": if_agent_action,
-        "story_updated": story_updated
-    }
-    
-    # Read existing entries or create new list
-    try:
-        with open(json_log_file, 'r', encoding='utf-8') as f:
-            entries = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        entries = []
-    
-    # Append new entry
-    entries.append(log_entry)
-    
-    # Write back to file
+
+    # Initialize story log file
+    with open(story_log_file, 'w', encoding='utf-8') as f:
+        pass
+
+    # Initialize JSON log file
     with open(json_log_file, 'w', encoding='utf-8') as f:
-        json.dump(entries, f, indent=2)
+        json.dump([], f)
 
-def update_last_json_entry(json_log_file: str, **kwargs):
-    """Update the last entry in the JSON log file with additional information."""
+    return story_log_file, json_log_file
+
+def plan_goto(room_map: RoomMap, source: str, target: str, route: deque) -> bool:
+    """Queue the moves from source to the target room of a GOTO macro. Returns False if no route is known."""
+    room = room_map.find_room(target) if room_map else None
+    path = room_map.shortest_path(source, room) if room and source else None
+    if not path:
+        logger.warning(f"No known route from {source} to {target}")
+        return False
+    route.extend(path)
+    logger.info(f"GOTO {room}: {' '.join(direction for direction, _ in path)}")
+    return True
+
+def create_validator(game_path: str) -> CommandValidator:
+    """Create a command validator from the story file's dictionary, or None if it cannot be read."""
+    if not VALIDATE_COMMANDS:
+        return None
     try:
-        with open(json_log_file, 'r', encoding='utf-8') as f:
-            entries = json.load(f)
-        
-        if entries:
-            # Update the last entry with any provided fields
-            entries[-1].update(kwargs)
-            
-            # Write back to file
-            with open(json_log_file, 'w', encoding='utf-8') as f:
-                json.dump(entries, f, indent=2)
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        logger.error(f"Error updating last JSON entry: {e}")
-
-def get_last_n_updates(log_file: str, n: int = 3) -> str:
-    """Get the last N dfrotz updates from the log file."""
-    try:
-        with open(log_file, 'r', encoding='utf-8') as f:
-            # Read all lines
-            lines = f.readlines()
-            
-            # Find the last N updates (each update starts with a timestamp)
-            updates = []
-            current_update = []
-            update_count = 0
-            
-            # Process lines in reverse to find the last N updates
-            for line in reversed(lines):
-                if line.strip() and line[0] == '[':  # New update starts with timestamp
-                    if current_update:
-                        updates.append(''.join(reversed(current_update)))
-                        current_update = []
-                        update_count += 1
-                        if update_count >= n:
-                            break
-                current_update.append(line)
-            
-            # Add the last update if we haven't reached N yet
-            if current_update and update_count < n:
-                updates.append(''.join(reversed(current_update)))
-            
-            # Return the updates in chronological order
-            return ''.join(reversed(updates))
-    except Exception as e:
-        logger.error(f"Error reading log file: {e}")
-        return ""
+        return CommandValidator(load_vocabulary(game_path))
+    except (OSError, ZMachineError) as e:
+        logger.warning(f"Commands will not be validated, could not read the game's dictionary: {e}")
+        return None
+
+def ask_game_agent(log_file: str, turn, room_map: RoomMap = None, validator: CommandValidator = None) -> dict:
+    """Ask the game agent for a command, asking again if it uses words the game does not know."""
+    map_summary = room_map.summary(ROOM_MAP_SUMMARY_ROOMS) if room_map else None
+    vocabulary = validator.vocabulary if validator and GAME_AGENT_VOCABULARY else None
+    feedback = None
+    for attempt in range(COMMAND_RETRIES + 1):
+        command_data = asyncio.run(get_agent_command(log_file, turn, map_summary, vocabulary, feedback))
+        command = command_data['command']
+        if validator is None or parse_goto(command) is not None:
+            return command_data
+        checked, unknown = validator.validate(command)
+        if not unknown:
+            if checked != command:
+                logger.info(f"Corrected command '{command}' to '{checked}'")
+            return dict(command_data, command=checked)
+        logger.warning(f"Command '{command}' uses unknown words: {', '.join(unknown)}")
+        feedback = (f"Your last command '{command}' was not sent: the game does not know the word(s) "
+                    f"{', '.join(unknown)}. Use other words.")
+    # Out of retries; let the game answer the command
+    return command_data
+
+def run_game(runner: FrotzRunner, story_log_file: str, json_log_file: str, tts_handler=None,
+             max_turns: int = None, poll_interval: float = 0.1, narration_mode: str = None,
+             validator: CommandValidator = None, checkpoint_file: str = None, resume: dict = None,
+             watchdog: InterpreterWatchdog = None, run_logs: RunLogs = None, profiler: TurnProfiler = None,
+             efficiency: EfficiencyTracker = None) -> int:
+    """Play the game until interrupted, the game ends or max_turns turns have been played. Returns the turn count.
+
+    Writes a checkpoint to checkpoint_file every CHECKPOINT_EVERY turns;
+    `resume` is a loaded checkpoint to continue from. The watchdog, if
+    given, restarts an interpreter that died or hung. run_logs, if given,
+    rotates the run's logs into segments between turns. profiler, if given
+    and started, is told about every finished turn to report per window.
+    efficiency, if given, scores the turns played against their cost.
+    """
+    narration_mode = narration_mode or NARRATION_MODE
+    room_map = RoomMap() if ROOM_MAP else None
+    # Remaining (direction, expected room) moves of a GOTO macro
+    route = deque()
+    expected_room = None
+    last_command = None
+    turns = 0
+    # Screen received before the checkpoint we resume from, played first
+    pending_output = None
+    if resume:
+        turns = last_checkpoint = resume['turn']
+        last_command = resume.get('last_command')
+        pending_output = resume['game_output']
+        if room_map is not None and resume.get('room_map'):
+            room_map = RoomMap.from_dict(resume['room_map'])
+    else:
+        last_checkpoint = 0
+    game_over = False
+    store = get_run_store()
+    while max_turns is None or turns < max_turns:
+        # Get game output (non-blocking)
+        game_output = pending_output or runner.get_output()
+        pending_output = None
+        if game_output:
+            turns += 1
+            tracer.start_turn(turns)
+            turn_start = time.perf_counter()
+            if store:
+                store.begin_turn(turns)
+
+            # Print game output
+            print_game_output(game_output)
+
+            # Parse the screen once; logging and the agents share the result
+            turn = parse_screen(game_output)
+            game_over = turn.prompt == PROMPT_GAME_OVER
+            if turn.score is not None:
+                _score.set(turn.score)
+            if turn.moves is not None:
+                _moves.set(turn.moves)
+
+            # Checkpoint at a command prompt, outside GOTO routes, once enough turns have passed
+            if (checkpoint_file and CHECKPOINT_EVERY and turns - 1 - last_checkpoint >= CHECKPOINT_EVERY
+                    and turn.prompt == PROMPT_COMMAND and not route):
+                last_checkpoint = turns - 1
+                write_checkpoint(checkpoint_file, runner, {
+                    "turn": last_checkpoint,
+                    "json_entries": last_checkpoint,
+                    "game_output": game_output,
+                    "last_command": last_command,
+                    "room_map": room_map.to_dict() if room_map is not None else None,
+                    "story_log_file": story_log_file,
+                    "json_log_file": json_log_file,
+                    "log_segments": len(run_logs.segments) if run_logs is not None else 0,
+                    "sessions": asyncio.run(export_sessions())
+                })
+
+            # A ***MORE*** screen may still show the previous room; the move is
+            # recorded once the command prompt is reached
+            if room_map is not None and turn.prompt != PROMPT_MORE:
+                room_map.observe(turn.room, last_command)
+
+            # Log the game update
+            log_game_update(json_log_file, game_output, turn=turn)
+
+            narration = ''
+            if narration_mode == 'combined':
+                # Decide and narrate in a single agent call
+                update_decision = asyncio.run(get_update_and_narration(json_log_file, story_log_file))
+                narration = update_decision['narration']
+            else:
+                # Get update decision
+                update_decision = asyncio.run(get_update_decision(json_log_file))
 
-def get_last_n_json_updates(json_log_file: str, n: int = 3) -> str:
-    """Get the last N updates from the JSON log file."""
-    try:
-        with open(json_log_file, 'r', encoding='utf-8') as f:
-            updates = json.load(f)
-        
-        # Get the last N updates
-        last_updates = updates[-n:] if updates else []
-        
-        # Format each update
-        formatted_updates = []
-        for update in last_updates:
-            formatted_update = f"[{update['timestamp']}] {update['game_output']}"
-            if 'if_agent_action' in update:
-                formatted_update += f"\n[AGENT] {update['if_agent_action']}"
-            formatted_updates.append(formatted_update)
-        
-        return '\n\n'.join(formatted_updates)
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        logger.error(f"Error reading JSON log file: {e}")
-        return ""
-
-async def get_update_decision(json_log_file: str) -> dict:
-    """Get decision from update_decidor_agent about whether to update the story."""
-    # Create the specific session where the conversation will happen
-    session = await session_service.create_session(
-        app_name=APP_NAME,
-        user_id=USER_ID,
-        session_id=f"{SESSION_ID}_update_decider"
-    )
-    logger.info(f"Update decider session created: App='{APP_NAME}', User='{USER_ID}', Session='{SESSION_ID}_update_decider'")
-
-    runner = Runner(
-        agent=update_decidor_agent,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
-    logger.info(f"Runner created for update decider agent '{runner.agent.name}'")
-
-    # Get the last story update timestamp
-    try:
-        with open(json_log_file, 'r', encoding='utf-8') as f:
-            updates = json.load(f)
-        
-        # Find the last story update
-        last_story_update = None
-        for update in reversed(updates):
-            if update.get('story_updated', False):
-                last_story_update = update
-                break
-        
-        # Get all updates since the last story update
-        if last_story_update:
-            updates_since_last_story = [
-                update for update in updates 
-                if update['timestamp'] > last_story_update['timestamp']
-            ]
-        else:
-            updates_since_last_story = updates
-        
-        # Format the updates for the agent
-        formatted_updates = []
-        for update in updates_since_last_story:
-            formatted_update = f"[{update['timestamp']}] {update['game_output']}"
-            if 'if_agent_action' in update:
-                formatted_update += f"\n[AGENT] {update['if_agent_action']}"
-            formatted_updates.append(formatted_update)
-        
-        updates_text = '\n\n'.join(formatted_updates)
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        logger.error(f"Error reading JSON log file: {e}")
-        updates_text = ""
-
-    # Prepare the user's message in ADK format
-    query = (
-        "Evaluate if there has been significant story progression since the last narration update.\n\n"
-        f"Game events since last story update:\n{updates_text}\n\n"
-        "Respond with a JSON object indicating if a story update is needed and why."
-    )
-    content = types.Content(role='user', parts=[types.Part(text=query)])
-
-    final_response_text = "Update decider agent did not produce a final response."  # Default
-
-    # Run the agent and process events
-    async for event in runner.run_async(user_id=USER_ID, session_id=f"{SESSION_ID}_update_decider", new_message=content):
-        if event.is_final_response():
-            if event.content and event.content.parts:
-                final_response_text = event.content.parts[0].text
-            elif event.actions and event.actions.escalate:
-                final_response_text = f"Update decider agent escalated: {event.error_message or 'No specific message.'}"
+                if update_decision.get('should_update', False):
+                    # Get the last few updates for context
+                    last_updates = get_last_n_json_updates(json_log_file)
+                    last_story = get_last_n_updates(story_log_file)
+
+                    # Get story narration
+                    narration = asyncio.run(get_story_narration(last_updates, last_story))
+
+            # An empty narration means no update was needed or the agent timed out
+            if narration:
+                # Log the narration
+                _narrations.inc()
+                log_story_narration(story_log_file, narration, update_decision)
+                print_story_narration(narration)
+
+                # Update the last JSON entry with story info
+                update_last_json_entry(json_log_file, story_updated=True, story_narration=narration)
+
+                # Use TTS if enabled
+                if tts_handler:
+                    tts_handler.speak(narration)
+
+            # Abandon a GOTO route that did not lead where expected
+            if (route and turn.room and expected_room and turn.room != expected_room
+                    and turn.prompt != PROMPT_MORE):
+                logger.info(f"GOTO route interrupted in {turn.room} (expected {expected_room})")
+                route.clear()
+
+            # Get agent command; a ***MORE*** prompt only needs a key press and
+            # the moves of a GOTO route need no model call
+            if turn.prompt == PROMPT_MORE:
+                command_data = {"command": "ENTER", "explanation": "Continue past the ***MORE*** prompt"}
+            else:
+                if not route:
+                    command_data = ask_game_agent(runner.log_file, turn, room_map, validator)
+                    target = parse_goto(command_data['command'])
+                    if target is not None and not plan_goto(room_map, turn.room, target, route):
+                        agent_fallbacks.inc(agent='game_agent', reason='no_route')
+                        command_data = {"command": "look", "explanation": f"No known route to {target}"}
+                if route:
+                    direction, expected_room = route.popleft()
+                    command_data = {"command": direction, "explanation": f"Walking through {expected_room}"}
+            # Key presses on ***MORE*** screens keep the command that led to them
+            if turn.prompt != PROMPT_MORE:
+                last_command = command_data['command']
+
+            # Log and execute the command
+            log_agent_command(runner.log_file, command_data)
+            print_agent_response(command_data['command'])
+            runner.send_command(command_data['command'])
+            if efficiency is not None:
+                efficiency.observe(turn, command_data['command'])
+
+            # Record the turn in the run store
+            if store:
+                store.record_turn(turns, dict(turn.summary(), game_output=game_output),
+                                  command=command_data['command'], narration=narration)
+
+            # Close the log segment between turns once it is full
+            if run_logs is not None:
+                run_logs.maybe_rotate(turns)
+            _turns.inc()
+            _turn_seconds.observe(time.perf_counter() - turn_start)
+            if tracer.enabled:
+                tracer.record('turn', turn_start, time.perf_counter() - turn_start)
+            if profiler is not None:
+                profiler.on_turn(turns)
+
+            # Wait for key press if enabled
+            wait_for_key()
+        elif not runner.is_alive() and (game_over or watchdog is None or exited_cleanly(runner)):
+            # The interpreter quit: the game is over or was quit, or nothing can restart it
+            if not (game_over or exited_cleanly(runner)):
+                logger.error(f"Interpreter exited with status {runner.exit_status()}")
             break
+        else:
+            # Restart a dead or hung interpreter
+            if watchdog is not None:
+                watchdog.check()
+            # Sleep briefly to avoid busy-waiting
+            time.sleep(poll_interval)
 
-    try:
-        # Parse the JSON response
-        decision = json.loads(final_response_text)
-        
-        # Log the agent interaction
-        log_agent_interaction(
-            "update_decidor",
-            update_decidor_agent.instruction,
-            query,
-            final_response_text
-        )
-        
-        return decision
-    except json.JSONDecodeError:
-        logger.error(f"Failed to parse update decider response as JSON: {final_response_text}")
-        return {"should_update": False, "reason": "Failed to parse agent response"}
+    return turns
 
 def main():
     # Set up argument parser
@@ -497,6 +299,22 @@ def main():
     parser.add_argument('game_path', nargs='?', default='games/905.z5',
                       help='Path to the game file (default: games/905.z5)')
     parser.add_argument('--tts', action='store_true', help='Enable text-to-speech')
+    parser.add_argument('--tts-engine', default=None,
+                      help='TTS engine to use, e.g. vits, fast-pitch, espeak, null (default: TTS_ENGINE or tacotron2-ddc)')
+    parser.add_argument('--narration-mode', choices=['separate', 'combined'], default=None,
+                      help='Ask the update decider and story agent separately, or decide and narrate in one call (default: NARRATION_MODE or separate)')
+    parser.add_argument('--trace', action='store_true', help='Record per-turn latency spans and export a Chrome trace')
+    parser.add_argument('--resume', metavar='CHECKPOINT', default=None,
+                      help='Continue a run from its checkpoint file (logs/<game>_<timestamp>_checkpoint.json)')
+    parser.add_argument('--run-store', metavar='DB', default=None,
+                      help='Record the run in this SQLite database (default: RUN_STORE, disabled if unset)')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                      help='Serve Prometheus metrics on localhost at this port (default: METRICS_PORT, 0 = off)')
+    parser.add_argument('--metrics-file', default=None,
+                      help='Write the metrics to this file periodically (default: METRICS_FILE)')
+    parser.add_argument('--profile', nargs='?', const='cpu,memory', default=None, metavar='MODES',
+                      help='Profile CPU and/or memory per window of turns: cpu, memory or cpu,memory '
+                           '(default: PROFILE, off if unset)')
     args = parser.parse_args()
 
     # Override TTS setting if specified in arguments
@@ -504,85 +322,124 @@ def main():
         global USE_TTS
         USE_TTS = True
 
-    # Initialize TTS handler if enabled
-    tts_handler = TTSHandler() if USE_TTS else None
-
-    # Get log file paths
-    story_log_file = get_story_log_filename(args.game_path)
-    json_log_file = get_json_log_filename(args.game_path)
-
-    # Create logs directory if it doesn't exist
-    os.makedirs('logs', exist_ok=True)
+    # Enable tracing if specified in arguments (or TRACE=true)
+    if args.trace:
+        tracer.enabled = True
+
+    # Initialize TTS handler if enabled; the TTS stack (torch, pygame) is only
+    # imported when narration is actually spoken
+    tts_handler = None
+    if USE_TTS:
+        from tts_handler import TTSHandler
+        tts_handler = TTSHandler(args.tts_engine)
+
+    checkpoint = None
+    watchdog = None
+    if args.resume:
+        # Continue the checkpointed run in its own log files, cut back to the checkpoint
+        checkpoint = load_checkpoint(args.resume)
+        game_path = checkpoint['game_path']
+        story_log_file, json_log_file = checkpoint['story_log_file'], checkpoint['json_log_file']
+        run_logs = RunLogs(json_log_file, story_log_file, checkpoint['runner_log_file'])
+        truncate_logs(checkpoint, run_logs)
+        runner = FrotzRunner(game_path, log_file=checkpoint['runner_log_file'])
+    else:
+        # Get and initialize log files
+        game_path = args.game_path
+        story_log_file, json_log_file = init_log_files(game_path)
+
+        # Initialize the game runner
+        runner = FrotzRunner(game_path)
+        run_logs = RunLogs(json_log_file, story_log_file, runner.log_file)
+
+    run_name = os.path.splitext(os.path.basename(json_log_file))[0]
+    # Expose the live metrics of this session, if enabled
+    metrics_server, metrics_writer = start_metrics(run_name, args.metrics_port, args.metrics_file)
+    if metrics_server:
+        print(f"Metrics at http://{metrics_server.server_address[0]}:{metrics_server.server_port}/metrics")
+
+    # Configuration the run is compared by across runs
+    run_config = {
+        "narration_mode": args.narration_mode or NARRATION_MODE,
+        "room_map": ROOM_MAP,
+        "validate_commands": VALIDATE_COMMANDS,
+        "tts": USE_TTS,
+        "agents": get_agent_config()
+    }
 
-    # Initialize story log file
-    with open(story_log_file, 'w', encoding='utf-8') as f:
-        pass
+    # Record the run in the SQLite run store, if enabled
+    store = open_run_store(args.run_store)
+    if store:
+        if checkpoint:
+            store.resume_run(run_name, checkpoint['turn'])
+        else:
+            store.start_run(run_name, game_path, config=run_config)
 
-    # Initialize JSON log file
-    with open(json_log_file, 'w', encoding='utf-8') as f:
-        json.dump([], f)
+    # Profile the game loop into <run>_profile/, if enabled
+    profiler = create_profiler(get_profile_dir(json_log_file), args.profile)
+    # Score the run's progress against its agent calls, tokens and time
+    efficiency = EfficiencyTracker(start_score=None if checkpoint else 0)
 
-    # Initialize the game runner
-    runner = FrotzRunner(args.game_path)
-    
     try:
         # Start the game
         runner.start()
-        
+        watchdog = InterpreterWatchdog(runner) if WATCHDOG else None
+        if checkpoint:
+            restore_interpreter(runner, checkpoint)
+            asyncio.run(import_sessions(checkpoint.get('sessions')))
+            print(f"Resumed at turn {checkpoint['turn']} from {args.resume}")
+
         # Main game loop
-        while True:
-            # Get game output (non-blocking)
-            game_output = runner.get_output()
-            if game_output:
-                # Print game output
-                print_game_output(game_output)
-                
-                # Log the game update
-                log_game_update(json_log_file, game_output)
-                
-                # Get update decision
-                update_decision = asyncio.run(get_update_decision(json_log_file))
-                
-                if update_decision.get('should_update', False):
-                    # Get the last few updates for context
-                    last_updates = get_last_n_json_updates(json_log_file)
-                    last_story = get_last_n_updates(story_log_file)
-                    
-                    # Get story narration
-                    narration = asyncio.run(get_story_narration(last_updates, last_story))
-                    
-                    # Log the narration
-                    log_story_narration(story_log_file, narration, update_decision)
-                    
-                    # Update the last JSON entry with story info
-                    update_last_json_entry(json_log_file, story_updated=True, story_narration=narration)
-                    
-                    # Use TTS if enabled
-                    if tts_handler:
-                        tts_handler.speak(narration)
-                
-                # Get agent command
-                command_data = asyncio.run(get_agent_command(runner.log_file))
-                
-                # Log and execute the command
-                log_agent_command(runner.log_file, command_data)
-                runner.send_command(command_data['command'])
-                
-                # Wait for key press if enabled
-                wait_for_key()
-            else:
-                # Sleep briefly to avoid busy-waiting
-                time.sleep(0.1)
+        if profiler:
+            profiler.start(checkpoint['turn'] if checkpoint else 0)
+        run_game(runner, story_log_file, json_log_file, tts_handler, narration_mode=args.narration_mode,
+                 validator=create_validator(game_path), checkpoint_file=get_checkpoint_filename(json_log_file),
+                 resume=checkpoint, watchdog=watchdog, run_logs=run_logs, profiler=profiler,
+                 efficiency=efficiency)
     except KeyboardInterrupt:
         print("\nGame terminated by user.")
     except Exception as e:
         print(f"\nAn error occurred: {e}")
         traceback.print_exc()
     finally:
+        # Report the last profile window before cleanup shows up in it
+        if profiler:
+            profiler.stop()
+            if profiler.reports:
+                print(f"Profile reports written to {profiler.report_dir}")
         # Clean up
         runner.quit()
+        close_agent_backends()
         if tts_handler:
             tts_handler.cleanup()
+        # Finish compressing the closed log segments
+        wait_for_compression()
+        efficiency_report = write_efficiency_report(efficiency, json_log_file, run_config)
+        print(f"\nEfficiency: {format_report(efficiency_report)}")
+        if store:
+            store.record_efficiency(efficiency_report)
+            store.end_run()
+            close_run_store()
+        if metrics_writer:
+            metrics_writer.close()
+        if metrics_server:
+            metrics_server.shutdown()
+        if tracer.enabled:
+            write_trace(tracer, json_log_file)
+        if watchdog is not None and watchdog.restarts:
+            logger.info(f"Interpreter restarts: {watchdog.restarts} {watchdog.reasons}")
+        for session_id, stats in get_session_stats().items():
+            logger.info(f"Session '{session_id}': {stats['events']} events, {stats['bytes']} bytes "
+                        f"(peak {stats['peak_bytes']}), {stats['compactions']} compactions")
+
+def write_trace(tracer, json_log_file: str):
+    """Export the recorded spans next to the JSON log and report per-stage latency."""
+    trace_file = json_log_file[:-len('.json')] + '_trace.json'
+    tracer.export_chrome_trace(trace_file)
+    summary = tracer.format_summary()
+    logger.info(f"Latency summary per stage:\n{summary}")
+    print(f"\nLatency per stage (ms):\n{summary}")
+    print(f"Chrome trace written to {trace_file}")
 
 if __name__ == "__main__":
     main()
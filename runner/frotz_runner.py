@@ -1,5 +1,6 @@
 import subprocess
 import os
+import codecs
 import time
 import logging
 from datetime import datetime
@@ -7,33 +8,79 @@ import sys
 import json
 import select
 import fcntl
+import re
+from collections import deque
 from utils.logging_utils import get_logger
+from utils.tracing import traced
+from utils.metrics import registry
 
 # Get the Frotz logger
 logger = get_logger('frotz')
 
+# Get output reader configuration from environment
+# Bytes requested from the interpreter's stdout per read
+FROTZ_READ_SIZE = int(os.getenv('FROTZ_READ_SIZE', '65536'))
+# Output lines kept in memory by each runner (0 = unbounded)
+FROTZ_HISTORY_LINES = int(os.getenv('FROTZ_HISTORY_LINES', '1000'))
+_output_bytes = registry.counter('interpreter_output_bytes_total', 'Bytes of game output read from the interpreter')
+_commands = registry.counter('interpreter_commands_total', 'Commands sent to the interpreter')
+
+# Characters at the end of the output that read_until matches its (end-anchored) patterns against
+_PROMPT_WINDOW = 1024
+
+# End of a screen waiting for input: a command prompt or a ***MORE*** pause
+PROMPT_PATTERN = re.compile(r'(?:^|\n)\s*>\s*$|\*{3}\s*MORE\s*\*{3}\s*$')
+# The interpreter asking for a save file name, e.g. "Please enter a filename [905.qzl]: "
+FILENAME_PROMPT_PATTERN = re.compile(r'file\s?name[^\n]*:\s*$', re.IGNORECASE)
+OVERWRITE_PROMPT_PATTERN = re.compile(r'overwrite[^\n]*\?\s*$', re.IGNORECASE)
+SAVE_FAILED_PATTERN = re.compile(r'\bfail|\bcan(?:no|\')t\b|not (?:saved|restored)', re.IGNORECASE)
+
 class FrotzRunner:
-    def __init__(self, game_path: str, frotz_path: str = '/opt/homebrew/bin/dfrotz'):
+    def __init__(self, game_path: str, frotz_path: str = '/opt/homebrew/bin/dfrotz', log_file: str = None,
+                 history_lines: int = None):
         self.game_path = game_path
         self.frotz_path = frotz_path
         self.process = None
         self.log_file = None
         self.json_log_file = None
-        self.output_buffer = []
+        # Most recent output lines, oldest dropped first
+        history_lines = FROTZ_HISTORY_LINES if history_lines is None else history_lines
+        self.output_buffer = deque(maxlen=history_lines or None)
+        # End of the output not terminated by a newline yet, logged once its line is complete
         self.partial_line = ''
+        # Decodes UTF-8 across reads, so a character split between two reads stays whole
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
         self._stdout_fd = None
         self._stdin_fd = None
         self._alive = False
+        # Every command sent to the interpreter, in order (ENTER as '')
+        self.command_history = []
+        # Last successful save as (path, number of commands it covers)
+        self.last_save = None
+        # When input was last sent and output last received (time.monotonic)
+        self.last_input_time = None
+        self.last_output_time = None
+        # Output read ahead of time (e.g. a pooled runner's intro), returned by the next get_output
+        self.pending_output = ''
 
+        logger.info(f"Initialized FrotzRunner with game: {game_path}")
+        # A resumed run keeps appending to its original log file; a pooled
+        # runner (log_file='') gets its log file when it is handed out
+        if log_file != '':
+            self.set_log_file(log_file)
+
+    def set_log_file(self, log_file: str = None):
+        """Set the transcript log file (default: logs/<game>_<timestamp>.log)."""
         # Create logs directory if it doesn't exist
         os.makedirs('logs', exist_ok=True)
-        game_name = os.path.splitext(os.path.basename(game_path))[0]
+        game_name = os.path.splitext(os.path.basename(self.game_path))[0]
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        self.log_file = os.path.join('logs', f'{game_name}_{timestamp}.log')
-        self.json_log_file = os.path.join('logs', f'{game_name}_{timestamp}.json')
-        with open(self.json_log_file, 'w', encoding='utf-8') as f:
-            json.dump([], f)
-        logger.info(f"Initialized FrotzRunner with game: {game_path}")
+        self.log_file = log_file or os.path.join('logs', f'{game_name}_{timestamp}.log')
+        self.json_log_file = os.path.splitext(self.log_file)[0] + '.json'
+        # The game loop may already be logging to this file (same name); never clobber it
+        if not os.path.exists(self.json_log_file):
+            with open(self.json_log_file, 'w', encoding='utf-8') as f:
+                json.dump([], f)
         logger.info(f"Log file: {self.log_file}")
         logger.info(f"JSON log file: {self.json_log_file}")
 
@@ -53,25 +100,41 @@ class FrotzRunner:
         # Set stdout to non-blocking
         fl = fcntl.fcntl(self._stdout_fd, fcntl.F_GETFL)
         fcntl.fcntl(self._stdout_fd, fcntl.F_SETFL, fl | os.O_NONBLOCK)
+        self._decoder.reset()
+        self.partial_line = ''
         self._alive = True
+        # The intro screen is awaited like the answer to a command
+        self.last_input_time = time.monotonic()
+        self.last_output_time = None
+
+    def is_alive(self) -> bool:
+        """Check whether the interpreter process is running."""
+        return self.process is not None and self.process.poll() is None
+
+    def exit_status(self):
+        """Get the interpreter's exit status, or None while it runs."""
+        return self.process.poll() if self.process is not None else None
 
+    def awaiting_output(self) -> bool:
+        """Check whether input was sent that the interpreter has not answered yet."""
+        return self.last_input_time is not None and (
+            self.last_output_time is None or self.last_output_time < self.last_input_time)
+
+    @traced('frotz.get_output', skip_empty=True)
     def get_output(self) -> str:
         if not self.process or not self._alive:
             return ''
-        output = ''
-        try:
-            while True:
-                chunk = self.process.stdout.read(1024)
-                if not chunk:
-                    break
-                text = chunk.decode(errors='replace')
-                output += text
-        except Exception:
-            pass
+        output, self.pending_output = self.pending_output, ''
+        data, _ = self._read_available()
+        if data:
+            _output_bytes.inc(len(data))
+            output += self._decoder.decode(data)
         if output:
+            self.last_output_time = time.monotonic()
             self._log_output(output)
         return output
 
+    @traced('frotz.send_command')
     def send_command(self, command: str):
         if not self.process or not self._alive:
             return
@@ -79,19 +142,130 @@ class FrotzRunner:
             to_send = '\n'
         else:
             to_send = command.strip() + '\n'
+        # Recorded even if the write fails, so a restarted interpreter can resend it
+        self.command_history.append(to_send.rstrip('\n'))
+        self.last_input_time = time.monotonic()
+        _commands.inc()
         try:
             self.process.stdin.write(to_send.encode())
             self.process.stdin.flush()
         except Exception as e:
             logger.error(f"Failed to send command: {e}")
 
+    def _read_available(self) -> tuple:
+        """Read everything the interpreter has written so far without blocking.
+
+        Returns (bytes read, whether the interpreter closed its output).
+        """
+        data = bytearray()
+        while True:
+            try:
+                chunk = os.read(self._stdout_fd, FROTZ_READ_SIZE)
+            except BlockingIOError:
+                return data, False
+            except OSError:
+                return data, True
+            if not chunk:
+                return data, True
+            data += chunk
+
+    def _write(self, text: str):
+        """Write raw input to the interpreter without recording it as a command."""
+        self.process.stdin.write(text.encode())
+        self.process.stdin.flush()
+
+    def read_until(self, pattern: re.Pattern, timeout: float = 5.0) -> str:
+        """Read output (without logging it) until it matches pattern. Returns None on timeout."""
+        parts = []
+        tail = ''
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            ready, _, _ = select.select([self._stdout_fd], [], [], remaining)
+            if not ready:
+                continue
+            data, closed = self._read_available()
+            if data:
+                self.last_output_time = time.monotonic()
+                text = self._decoder.decode(data)
+                parts.append(text)
+                # Only the end of the output is matched, so long screens cost no repeated scans
+                tail = (tail + text)[-_PROMPT_WINDOW:]
+                if pattern.search(tail):
+                    return ''.join(parts)
+            if closed:
+                # The interpreter exited
+                return None
+
+    def _file_dialogue(self, verb: str, path: str, timeout: float) -> bool:
+        """Run the game's SAVE or RESTORE command with the given file name."""
+        self._write(f'{verb}\n')
+        output = self.read_until(FILENAME_PROMPT_PATTERN, timeout)
+        if output is None:
+            logger.warning(f"No file name prompt after '{verb}'")
+            return False
+        self._write(f'{path}\n')
+        output = self.read_until(re.compile(PROMPT_PATTERN.pattern + '|' + OVERWRITE_PROMPT_PATTERN.pattern,
+                                            re.IGNORECASE), timeout)
+        if output and OVERWRITE_PROMPT_PATTERN.search(output):
+            self._write('y\n')
+            output = self.read_until(PROMPT_PATTERN, timeout)
+        if output is None or SAVE_FAILED_PATTERN.search(output):
+            logger.warning(f"'{verb}' to {path} failed: {output!r}")
+            return False
+        return True
+
+    def save_game(self, path: str, timeout: float = 5.0) -> bool:
+        """Save the game to a file through the game's SAVE command. Call only at a command prompt."""
+        if not self.process or not self._alive:
+            return False
+        if self._file_dialogue('save', os.path.abspath(path), timeout) and os.path.exists(path):
+            self.last_save = (path, len(self.command_history))
+            return True
+        return False
+
+    def restore_game(self, path: str, timeout: float = 5.0) -> bool:
+        """Restore the game from a save file through the game's RESTORE command."""
+        if not self.process or not self._alive or not os.path.exists(path):
+            return False
+        if self._file_dialogue('restore', os.path.abspath(path), timeout):
+            self.last_save = (path, len(self.command_history))
+            return True
+        return False
+
+    def wait_for_prompt(self, timeout: float = 10.0) -> str:
+        """Read (without logging) until the interpreter waits for input. Returns None on timeout."""
+        return self.read_until(PROMPT_PATTERN, timeout)
+
+    def replay(self, commands: list, timeout: float = 5.0) -> bool:
+        """Re-send recorded commands at full speed, discarding the output, to rebuild the game state."""
+        for command in commands:
+            self._write(command + '\n')
+            if self.wait_for_prompt(timeout) is None:
+                logger.warning(f"Replay stalled at command '{command}'")
+                return False
+            self.command_history.append(command)
+        return True
+
     def _log_output(self, output: str):
+        """Log the complete lines of the output; a screen ending at a prompt is complete as a whole."""
+        text = self.partial_line + output
+        if PROMPT_PATTERN.search(text[-_PROMPT_WINDOW:]):
+            self.partial_line = ''
+            lines = text.splitlines()
+        else:
+            end = text.rfind('\n') + 1
+            self.partial_line = text[end:]
+            lines = text[:end].splitlines()
+        if not lines:
+            return
         timestamp = datetime.now().strftime('%H:%M:%S.%f')[:-3]
-        for line in output.splitlines():
-            log_entry = f"[{timestamp}] {line}\n"
+        if self.log_file:
             with open(self.log_file, 'a', encoding='utf-8') as f:
-                f.write(log_entry)
-            self.output_buffer.append(line)
+                f.writelines(f"[{timestamp}] {line}\n" for line in lines)
+        self.output_buffer.extend(lines)
 
     def quit(self):
         if self.process is not None:
@@ -0,0 +1,141 @@
+import os
+import queue
+import threading
+import time
+from runner.frotz_runner import FrotzRunner
+from utils.logging_utils import get_logger
+from utils.tracing import tracer
+
+logger = get_logger('frotz')
+
+# Get pool configuration from environment
+# Interpreters kept started and waiting for an episode
+RUNNER_POOL_SIZE = int(os.getenv('RUNNER_POOL_SIZE', '2'))
+# Seconds a pooled interpreter may take to reach its first prompt
+RUNNER_POOL_START_TIMEOUT = float(os.getenv('RUNNER_POOL_START_TIMEOUT', '30'))
+
+class RunnerPool:
+    """Keeps interpreters started ahead of time and hands them out to new episodes.
+
+    Each pooled runner has already loaded the story and read its intro (and
+    optionally played intro_commands or restored a snapshot save); the
+    screen it stopped at is returned by its first get_output(). A background
+    thread starts a replacement whenever a runner is handed out.
+    """
+
+    def __init__(self, game_path: str, size: int = None, frotz_path: str = None,
+                 intro_commands: list = None, snapshot: str = None):
+        self.game_path = game_path
+        self.size = RUNNER_POOL_SIZE if size is None else size
+        self.frotz_path = frotz_path
+        self.intro_commands = list(intro_commands or [])
+        self.snapshot = snapshot
+        self.stats = {"acquired": 0, "warm": 0, "cold": 0, "discarded": 0}
+        self._ready = queue.Queue()
+        self._refill = threading.Event()
+        self._closed = False
+        self._thread = None
+
+    def _new_runner(self, log_file: str = '') -> FrotzRunner:
+        if self.frotz_path:
+            return FrotzRunner(self.game_path, frotz_path=self.frotz_path, log_file=log_file)
+        return FrotzRunner(self.game_path, log_file=log_file)
+
+    def _warm_runner(self) -> FrotzRunner:
+        """Start an interpreter and bring it to the episode's first screen, or return None."""
+        start = time.perf_counter()
+        runner = self._new_runner()
+        runner.start()
+        screen = runner.wait_for_prompt(RUNNER_POOL_START_TIMEOUT)
+        if screen is not None and self.snapshot:
+            if runner.restore_game(self.snapshot):
+                runner.send_command('look')
+                screen = runner.wait_for_prompt(RUNNER_POOL_START_TIMEOUT)
+            else:
+                screen = None
+        if screen is not None and self.intro_commands:
+            if runner.replay(self.intro_commands[:-1]):
+                runner.send_command(self.intro_commands[-1])
+                screen = runner.wait_for_prompt(RUNNER_POOL_START_TIMEOUT)
+            else:
+                screen = None
+        if screen is None:
+            logger.warning("Pooled interpreter did not reach its first prompt; discarding it")
+            runner.quit()
+            return None
+        runner.pending_output = screen
+        if tracer.enabled:
+            tracer.record('frotz.pool_warm', start, time.perf_counter() - start)
+        return runner
+
+    def _fill(self):
+        """Start interpreters until the pool is full, then wait until one is handed out."""
+        while not self._closed:
+            while not self._closed and self._ready.qsize() < self.size:
+                runner = self._warm_runner()
+                if runner is None:
+                    # Don't spin on an interpreter that can't start
+                    time.sleep(1)
+                    continue
+                self._ready.put(runner)
+            self._refill.wait()
+            self._refill.clear()
+        self._drain()
+
+    def start(self) -> 'RunnerPool':
+        """Start filling the pool in the background."""
+        if self._thread is None and self.size > 0:
+            self._thread = threading.Thread(target=self._fill, name='runner-pool', daemon=True)
+            self._thread.start()
+        return self
+
+    def acquire(self, log_file: str = None) -> FrotzRunner:
+        """Get a started runner logging to log_file (default: a new log file).
+
+        Takes a warm runner when one is ready, otherwise starts one now.
+        """
+        start = time.perf_counter()
+        runner = None
+        while runner is None:
+            try:
+                runner = self._ready.get_nowait()
+            except queue.Empty:
+                break
+            if not runner.is_alive():
+                self.stats["discarded"] += 1
+                runner = None
+        self._refill.set()
+
+        self.stats["acquired"] += 1
+        if runner is None:
+            self.stats["cold"] += 1
+            runner = self._new_runner(log_file)
+            runner.start()
+        else:
+            self.stats["warm"] += 1
+            runner.set_log_file(log_file)
+        if tracer.enabled:
+            tracer.record('frotz.pool_acquire', start, time.perf_counter() - start)
+        return runner
+
+    def _drain(self):
+        while True:
+            try:
+                self._ready.get_nowait().quit()
+            except queue.Empty:
+                return
+
+    def close(self):
+        """Stop refilling and terminate the interpreters still waiting in the pool."""
+        self._closed = True
+        self._refill.set()
+        if self._thread is not None:
+            self._thread.join(timeout=RUNNER_POOL_START_TIMEOUT)
+            self._thread = None
+        self._drain()
+
+    def __enter__(self) -> 'RunnerPool':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,133 @@
+import os
+import time
+from utils.logging_utils import get_logger
+from utils.tracing import tracer
+from utils.metrics import registry
+
+logger = get_logger('frotz')
+
+# Get watchdog configuration from environment
+WATCHDOG = os.getenv('WATCHDOG', 'true').lower() == 'true'
+# Seconds the interpreter may take to answer a command (0 = never consider it hung)
+WATCHDOG_OUTPUT_DEADLINE = float(os.getenv('WATCHDOG_OUTPUT_DEADLINE', '30'))
+# Restarts allowed without the interpreter producing output in between
+WATCHDOG_MAX_RESTARTS = int(os.getenv('WATCHDOG_MAX_RESTARTS', '3'))
+
+_restarts = registry.counter('interpreter_restarts_total', 'Interpreter restarts by the watchdog', ('reason',))
+
+# Commands after which the interpreter exits on its own (QUIT or RESTART, then Y to confirm)
+_EXIT_COMMANDS = frozenset(('quit', 'q', 'restart'))
+
+def exited_cleanly(runner) -> bool:
+    """Check whether the interpreter ended the game itself: it exited with status 0 or after a QUIT or RESTART."""
+    status = runner.exit_status()
+    if status is None:
+        return False
+    recent = [command.strip().lower() for command in runner.command_history[-2:]]
+    return status == 0 or any(command in _EXIT_COMMANDS for command in recent)
+
+class InterpreterFailedError(Exception):
+    """Raised when the interpreter keeps failing after restarts."""
+
+class InterpreterWatchdog:
+    """Detects a dead or unresponsive interpreter and restarts it in the same game state.
+
+    The state is rebuilt from the runner's last save plus the commands sent
+    since, or by replaying every command; the unanswered command is then
+    sent again so the game loop receives its screen as usual.
+    """
+
+    def __init__(self, runner, output_deadline: float = None, max_restarts: int = None):
+        self.runner = runner
+        self.output_deadline = WATCHDOG_OUTPUT_DEADLINE if output_deadline is None else output_deadline
+        self.max_restarts = WATCHDOG_MAX_RESTARTS if max_restarts is None else max_restarts
+        self.restarts = 0
+        self.reasons = {}
+        self._failed_restarts = 0
+        self._last_output_time = None
+
+    def problem(self) -> str:
+        """Describe what is wrong with the interpreter, or None if it looks healthy."""
+        runner = self.runner
+        if runner.process is None:
+            return None
+        status = runner.exit_status()
+        if status is not None:
+            # A game that was quit is over; replaying it would only quit again
+            return None if exited_cleanly(runner) else f"exited with status {status}"
+        if (self.output_deadline and runner.awaiting_output()
+                and time.monotonic() - runner.last_input_time > self.output_deadline):
+            return f"no output for {self.output_deadline:g}s"
+        return None
+
+    def check(self) -> bool:
+        """Restart the interpreter if it died or hung. Returns True if it was restarted."""
+        # Output since the last restart means the restarted interpreter works
+        if self.runner.last_output_time != self._last_output_time:
+            self._last_output_time = self.runner.last_output_time
+            self._failed_restarts = 0
+        problem = self.problem()
+        if problem is None:
+            return False
+        history, pending = self._game_state()
+        # A restart whose replay failed counts as failed right away
+        while True:
+            if self._failed_restarts >= self.max_restarts:
+                raise InterpreterFailedError(f"Interpreter {problem} after {self._failed_restarts} restarts")
+            if self._restart(problem, history, pending):
+                return True
+            problem = "replay failed"
+
+    def _game_state(self) -> tuple:
+        """Get the commands that led to the current game state and the unanswered command, if any."""
+        history = list(self.runner.command_history)
+        pending = history.pop() if history and self.runner.awaiting_output() else None
+        return history, pending
+
+    def restart(self, reason: str) -> bool:
+        """Restart the interpreter and bring it back to the game state before the unanswered command.
+
+        Returns False if the commands could not be replayed.
+        """
+        return self._restart(reason, *self._game_state())
+
+    def _restart(self, reason: str, history: list, pending: str) -> bool:
+        runner = self.runner
+        start = time.perf_counter()
+        logger.warning(f"Interpreter {reason}; restarting it ({len(history)} commands to restore)")
+
+        runner.quit()
+        runner.start()
+        self.restarts += 1
+        self._failed_restarts += 1
+        kind = reason.split(' ')[0]
+        self.reasons[kind] = self.reasons.get(kind, 0) + 1
+        _restarts.inc(reason=kind)
+
+        if history or pending is not None:
+            # Skip the intro, then load the last save and replay the commands sent after it
+            runner.wait_for_prompt()
+            save = runner.last_save
+            replayed = history
+            runner.command_history = []
+            if save and save[1] <= len(history):
+                runner.command_history = history[:save[1]]
+                if runner.restore_game(save[0]):
+                    replayed = history[save[1]:]
+                else:
+                    runner.command_history = []
+            replayed_ok = runner.replay(replayed)
+            runner.command_history = history
+            if not replayed_ok:
+                logger.warning(f"Interpreter restart {self.restarts} could not restore the game state")
+                return False
+            if pending is not None:
+                runner.send_command(pending)
+        # Output read while restoring is not progress of the game loop
+        self._last_output_time = runner.last_output_time
+
+        if tracer.enabled:
+            tracer.record('frotz.restart', start, time.perf_counter() - start)
+        logger.info(f"Interpreter restarted in {time.perf_counter() - start:.2f}s "
+                    f"({self.restarts} restarts so far)")
+        return True
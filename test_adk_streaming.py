@@ -0,0 +1,37 @@
+import asyncio
+import google.adk.runners
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+from agents import agent_runner
+from agents.agent_runner import AdkBackend, APP_NAME, USER_ID
+
+class StreamingRunner:
+    """Stands in for the ADK runner: streams a game command in pieces, then a final event."""
+    closed = False
+
+    def __init__(self, agent, app_name, session_service):
+        self.agent = agent
+
+    async def run_async(self, user_id, session_id, new_message, run_config=None):
+        try:
+            for text in ['{"command": "nor', 'th", "explanation": "go"}', ' and more']:
+                yield Event(author=self.agent.name, invocation_id='turn-1', partial=True,
+                            content=types.Content(role='model', parts=[types.Part(text=text)]))
+            yield Event(author=self.agent.name, invocation_id='turn-1',
+                        content=types.Content(role='model', parts=[types.Part(text='full answer')]))
+        finally:
+            StreamingRunner.closed = True
+
+def test_early_stop_closes_the_stream_and_records_the_answer(monkeypatch):
+    monkeypatch.setattr(google.adk.runners, 'Runner', StreamingRunner)
+    monkeypatch.setattr(agent_runner, '_session_service', InMemorySessionService())
+    answer = asyncio.run(AdkBackend()('game_agent', 'stream_test', 'look', 'default',
+                                      stop_when=lambda text: text.endswith('}')))
+    assert answer == '{"command": "north", "explanation": "go"}'
+    assert StreamingRunner.closed
+
+    session = asyncio.run(agent_runner._session_service.get_session(
+        app_name=APP_NAME, user_id=USER_ID, session_id='stream_test'))
+    last = session.events[-1]
+    assert (last.author, last.invocation_id, last.content.parts[0].text) == ('if_game_agent', 'turn-1', answer)
@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from agents import agent_runner
+from agents.agent_runner import AgentTimeoutError, run_agent, set_agent_backend
+
+class SlowBackend:
+    """Answers with the session id after a delay per session; sessions in `fail` raise instead."""
+
+    def __init__(self, delays: dict, fail: tuple = ()):
+        self.delays = delays
+        self.fail = fail
+        self.cancelled = []
+
+    async def __call__(self, agent_key, session_id, query, default_response):
+        try:
+            await asyncio.sleep(self.delays[session_id])
+        except asyncio.CancelledError:
+            self.cancelled.append(session_id)
+            raise
+        if session_id in self.fail:
+            raise RuntimeError(f"{session_id} failed")
+        return session_id
+
+class TogetherBackend:
+    """The primary answers as soon as the hedge does, so both finish in the same wait; sessions in `fail` raise."""
+
+    def __init__(self, fail: tuple):
+        self.fail = fail
+        self.hedge_done = asyncio.Event()
+
+    async def __call__(self, agent_key, session_id, query, default_response):
+        if session_id.endswith('_hedge'):
+            self.hedge_done.set()
+        else:
+            await self.hedge_done.wait()
+        if session_id in self.fail:
+            raise RuntimeError(f"{session_id} failed")
+        return session_id
+
+class SessionService:
+    """Stands in for the ADK session service: records deleted sessions."""
+
+    def __init__(self):
+        self.deleted = []
+
+    async def get_session(self, app_name, user_id, session_id):
+        return session_id not in self.deleted
+
+    async def delete_session(self, app_name, user_id, session_id):
+        self.deleted.append(session_id)
+
+@pytest.fixture
+def hedging(monkeypatch):
+    monkeypatch.setenv('GAME_AGENT_HEDGE', 'true')
+    monkeypatch.setenv('GAME_AGENT_HEDGE_DELAY', '0.05')
+    monkeypatch.setattr(agent_runner, '_latencies', {})
+    sessions = SessionService()
+    monkeypatch.setattr(agent_runner, '_session_service', sessions)
+    yield sessions
+    set_agent_backend(None)
+
+def test_deadline_cancels_the_call(monkeypatch):
+    monkeypatch.setenv('GAME_AGENT_TIMEOUT', '0.05')
+    backend = SlowBackend({'s': 1.0})
+    set_agent_backend(backend)
+    try:
+        with pytest.raises(AgentTimeoutError):
+            asyncio.run(run_agent('game_agent', 's', 'look', 'default'))
+    finally:
+        set_agent_backend(None)
+    assert backend.cancelled == ['s']
+
+def test_first_successful_answer_wins_and_the_loser_is_cancelled(hedging):
+    backend = SlowBackend({'s': 1.0, 's_hedge': 0.01})
+    set_agent_backend(backend)
+    assert asyncio.run(run_agent('game_agent', 's', 'look', 'default')) == 's_hedge'
+    assert backend.cancelled == ['s']
+    # The hedge session is emptied after every hedged call
+    assert hedging.deleted == ['s_hedge']
+
+def test_hedge_failure_falls_back_to_the_primary(hedging):
+    set_agent_backend(SlowBackend({'s': 0.15, 's_hedge': 0.01}, fail=('s_hedge',)))
+    assert asyncio.run(run_agent('game_agent', 's', 'look', 'default')) == 's'
+
+def test_hedged_call_fails_when_both_fail(hedging):
+    set_agent_backend(SlowBackend({'s': 0.1, 's_hedge': 0.15}, fail=('s', 's_hedge')))
+    with pytest.raises(RuntimeError, match='s_hedge failed'):
+        asyncio.run(run_agent('game_agent', 's', 'look', 'default'))
+    assert hedging.deleted == ['s_hedge']
+
+@pytest.mark.parametrize("failing, answer", [('s', 's_hedge'), ('s_hedge', 's')])
+def test_answer_wins_over_a_failure_finishing_at_the_same_time(hedging, failing, answer):
+    set_agent_backend(TogetherBackend(fail=(failing,)))
+    assert asyncio.run(run_agent('game_agent', 's', 'look', 'default')) == answer
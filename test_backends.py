@@ -0,0 +1,123 @@
+import json
+import asyncio
+import threading
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from agents.agent import get_agent_instruction, get_response_schema
+from agents.agent_runner import get_agent_backend, set_agent_backend, close_agent_backends
+from agents.backends import HttpBackend, PolicyBackend
+
+@pytest.fixture
+def llm_server():
+    """OpenAI-compatible stub: answers the next queued (status, body or SSE chunks) and keeps the requests."""
+    requests, replies = [], []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            requests.append((self.path, dict(self.headers), payload))
+            status, reply = replies.pop(0)
+            self.send_response(status)
+            if isinstance(reply, list):
+                self.send_header('Content-Type', 'text/event-stream')
+                self.end_headers()
+                try:
+                    for delta in reply:
+                        chunk = {"choices": [{"delta": {"content": delta}}]}
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                    self.wfile.write(b"data: [DONE]\n\n")
+                except ConnectionError:
+                    # The client stopped reading early
+                    pass
+            else:
+                body = json.dumps(reply).encode('utf-8')
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/v1", requests, replies
+    server.shutdown()
+
+def test_http_backend_sends_chat_completions(llm_server, monkeypatch):
+    url, requests, replies = llm_server
+    monkeypatch.setenv('GAME_AGENT_STRUCTURED_OUTPUT', 'true')
+    backend = HttpBackend(base_url=url, model='qwen', api_key='secret')
+    answer = '{"command": "north", "explanation": "explore"}'
+    replies.append((200, {"choices": [{"message": {"content": answer}}]}))
+    try:
+        assert asyncio.run(backend('game_agent', 's', 'You are in a kitchen.', 'default')) == answer
+    finally:
+        backend.close()
+
+    path, headers, payload = requests[0]
+    assert path == '/v1/chat/completions' and headers['Authorization'] == 'Bearer secret'
+    assert payload['model'] == 'qwen' and 'stream' not in payload
+    assert payload['messages'] == [{"role": "system", "content": get_agent_instruction('game_agent')},
+                                   {"role": "user", "content": 'You are in a kitchen.'}]
+    assert payload['response_format'] == {"type": "json_schema", "json_schema": {
+        "name": "game_agent_response", "schema": get_response_schema('game_agent')}}
+
+def test_http_backend_streams_and_stops_early(llm_server):
+    url, requests, replies = llm_server
+    backend = HttpBackend(base_url=url, api_key='')
+    replies.append((200, ['Once ', 'upon ', 'a time.', ' Never sent.']))
+    try:
+        text = asyncio.run(backend('story_agent', 's', 'Narrate.', 'default',
+                                   stop_when=lambda text: text.endswith('.')))
+    finally:
+        backend.close()
+    assert text == 'Once upon a time.'
+    _, headers, payload = requests[0]
+    assert payload['stream'] is True and 'Authorization' not in headers
+    assert 'response_format' not in payload
+
+def test_http_backend_raises_http_errors(llm_server):
+    url, _, replies = llm_server
+    backend = HttpBackend(base_url=url)
+    replies.append((500, {"error": "overloaded"}))
+    try:
+        with pytest.raises(urllib.error.HTTPError):
+            asyncio.run(backend('game_agent', 's', 'look', 'default'))
+        # An empty answer falls back to the default response
+        replies.append((200, {"choices": []}))
+        assert asyncio.run(backend('game_agent', 's', 'look', 'default')) == 'default'
+    finally:
+        backend.close()
+
+def test_backends_are_selected_per_agent(monkeypatch):
+    monkeypatch.setenv('AGENT_BACKEND', 'policy')
+    monkeypatch.setenv('GAME_AGENT_BACKEND', 'http')
+    monkeypatch.setenv('GAME_AGENT_URL', 'http://gpu-box:8000/v1/')
+    monkeypatch.setenv('GAME_AGENT_MODEL', 'qwen2.5-7b')
+    set_agent_backend(None)
+    try:
+        game = get_agent_backend('game_agent')
+        assert isinstance(game, HttpBackend)
+        assert (game.base_url, game.model) == ('http://gpu-box:8000/v1', 'qwen2.5-7b')
+        assert isinstance(get_agent_backend('update_decidor_agent'), PolicyBackend)
+    finally:
+        close_agent_backends()
+    assert game._executor._shutdown
+
+def test_policy_backend_plays_without_a_model():
+    policy = PolicyBackend(update_every=2)
+    def ask(agent_key, query):
+        return asyncio.run(policy(agent_key, 's', query, 'default'))
+    assert json.loads(ask('game_agent', 'A long letter...\n***MORE***'))['command'] == 'ENTER'
+    screen = 'Kitchen\nExits: north, east.\n>'
+    assert [json.loads(ask('game_agent', screen))['command'] for _ in range(2)] == ['east', 'north']
+    decisions = [json.loads(ask('update_decidor_agent', 'events'))['should_update'] for _ in range(4)]
+    assert decisions == [False, True, False, True]
+    story = ask('story_agent', 'Latest game events to narrate:\nYou open the door.\n>\n\nCreate a new narration')
+    assert story == 'You open the door.'
+    events = 'Game events since last story update:\nYou open the door.\n>\n\nDecide if'
+    answers = [json.loads(ask('narration_agent', events)) for _ in range(2)]
+    assert answers == [{"should_update": False, "narration": ""},
+                       {"should_update": True, "narration": "You open the door."}]
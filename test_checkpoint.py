@@ -0,0 +1,48 @@
+import os
+import json
+# Imported first: it turns off waiting for a key press before game.game_io is loaded
+from benchmarks.game_loop import FAKE_DFROTZ
+import main
+from agents.agent_runner import set_agent_backend
+from benchmarks.stub_llm import StubLLM
+from game import checkpoint as checkpoints
+from game.checkpoint import get_checkpoint_filename, load_checkpoint, restore_interpreter, truncate_logs
+from runner.frotz_runner import FrotzRunner
+
+def _play(tmp_path, monkeypatch, replay: bool) -> list:
+    """Play 13 turns, resume from the turn 10 checkpoint and play to turn 15; returns the logged move counters."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(checkpoints, 'CHECKPOINT_EVERY', 5)
+    monkeypatch.setattr(main, 'CHECKPOINT_EVERY', 5)
+    set_agent_backend(StubLLM(commands=["north", "up", "down", "south", "east"]))
+    try:
+        story_log_file, json_log_file = main.init_log_files('fake.z5')
+        checkpoint_file = get_checkpoint_filename(json_log_file)
+        runner = FrotzRunner('fake.z5', frotz_path=FAKE_DFROTZ)
+        runner.start()
+        main.run_game(runner, story_log_file, json_log_file, max_turns=13, poll_interval=0.001,
+                      checkpoint_file=checkpoint_file)
+        runner.quit()
+
+        checkpoint = load_checkpoint(checkpoint_file)
+        assert checkpoint['turn'] == 10 and len(checkpoint['command_history']) == 10
+        if replay:
+            os.remove(checkpoint['save_file'])
+        truncate_logs(checkpoint)
+        runner = FrotzRunner('fake.z5', frotz_path=FAKE_DFROTZ, log_file=checkpoint['runner_log_file'])
+        runner.start()
+        assert restore_interpreter(runner, checkpoint)
+        played = main.run_game(runner, story_log_file, json_log_file, max_turns=15, poll_interval=0.001,
+                               checkpoint_file=checkpoint_file, resume=checkpoint)
+        runner.quit()
+    finally:
+        set_agent_backend(None)
+    assert played == 15
+    with open(json_log_file, 'r', encoding='utf-8') as f:
+        return [entry.get('moves') for entry in json.load(f)]
+
+def test_resume_from_interpreter_save(tmp_path, monkeypatch):
+    assert _play(tmp_path, monkeypatch, replay=False) == [None] + list(range(1, 15))
+
+def test_resume_by_replaying_commands(tmp_path, monkeypatch):
+    assert _play(tmp_path, monkeypatch, replay=True) == [None] + list(range(1, 15))
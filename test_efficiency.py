@@ -0,0 +1,52 @@
+import json
+# Imported first: it turns off waiting for a key press before game.game_io is loaded
+from benchmarks.game_loop import FAKE_DFROTZ
+import main
+from agents.agent_runner import set_agent_backend
+from benchmarks.stub_llm import StubLLM
+from runner.frotz_runner import FrotzRunner
+from game.efficiency import EfficiencyTracker, write_efficiency_report, get_efficiency_filename, aggregate_reports
+from utils.run_store import RunStore
+
+def test_run_is_scored_against_its_cost(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    stub = StubLLM(commands=["take lamp", "look", "look", "look", "goto Nowhere"], update_every=0)
+    set_agent_backend(stub)
+    tracker = EfficiencyTracker()
+    try:
+        story_log_file, json_log_file = main.init_log_files('fake.z5')
+        runner = FrotzRunner('fake.z5', frotz_path=FAKE_DFROTZ)
+        runner.start()
+        main.run_game(runner, story_log_file, json_log_file, max_turns=10, poll_interval=0.001, efficiency=tracker)
+        runner.quit()
+    finally:
+        set_agent_backend(None)
+
+    report = write_efficiency_report(tracker, json_log_file, {"narration_mode": "separate"})
+    assert json.load(open(get_efficiency_filename(json_log_file))) == report
+    # Each "take lamp" scores a point once the game answers it
+    assert (report['turns'], report['moves'], report['score'], report['score_gained']) == (10, 9, 2, 2)
+    assert report['llm_calls'] == sum(stub.calls.values())
+    assert report['estimated_tokens'] >= sum(stub.prompt_bytes.values()) // 4
+    assert report['score_per_llm_call'] == round(2 / report['llm_calls'], 6)
+    # The unknown GOTO target falls back to "look"; a second "look" on an unchanged screen is a loop
+    assert report['fallback_turns'] == 2
+    assert report['loop_turns'] == 2
+    assert report['wasted_turns'] == 4 and not report['game_over']
+
+    # Runs with the same configuration are combined
+    other = dict(report, turns=10, score_gained=0, llm_calls=report['llm_calls'])
+    combined, = aggregate_reports([report, other])
+    assert combined['runs'] == 2 and combined['score_per_llm_call'] == round(2 / (2 * report['llm_calls']), 6)
+
+    store = RunStore(str(tmp_path / 'runs.sqlite'))
+    # The same configuration groups together whatever the order of its keys
+    for name, config in [('scored', {"narration_mode": "separate", "room_map": True}),
+                         ('again', {"room_map": True, "narration_mode": "separate"})]:
+        store.start_run(name, 'fake.z5', config=config)
+        store.record_efficiency(report)
+        store.end_run(report['turns'])
+    (config, runs, turns, gained, per_call, _, _, wasted), = store.efficiency_by_config()
+    assert (json.loads(config), runs, turns, gained) == ({"narration_mode": "separate", "room_map": True}, 2, 20, 4)
+    assert wasted == 0.4
+    store.close()
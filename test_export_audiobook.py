@@ -0,0 +1,6 @@
+from export_audiobook import split_narrations
+
+def test_pauses_follow_narrations_that_have_chunks():
+    chunks, pauses = split_narrations(["   ", "It was dark. A lamp flickered.", "", "Morning came."], 0.8)
+    assert chunks == ["It was dark. A lamp flickered.", "Morning came."]
+    assert pauses == {0: 0.8, 1: 0.8}
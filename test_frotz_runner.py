@@ -0,0 +1,66 @@
+import sys
+import time
+from runner.frotz_runner import FrotzRunner, PROMPT_PATTERN
+
+# Stand-in interpreter writing a multi-byte character split across two writes
+SPLIT_WRITER = """
+import sys, time
+out = sys.stdout.buffer
+data = ('caf\\u00e9 ' * 3000 + '\\n').encode('utf-8')
+half = data.index(b'\\xc3') + 1
+out.write(data[:half]); out.flush()
+time.sleep(0.2)
+out.write(data[half:])
+for i in range(50):
+    out.write(f'line {i}\\n'.encode())
+out.write(b'> '); out.flush()
+sys.stdin.readline()
+"""
+
+def test_output_reader_keeps_split_characters_and_bounds_history(tmp_path):
+    script = tmp_path / 'writer.py'
+    script.write_text(SPLIT_WRITER)
+    runner = FrotzRunner(str(script), frotz_path=sys.executable, log_file=str(tmp_path / 'game.log'),
+                         history_lines=10)
+    runner.start()
+    output = ''
+    deadline = time.monotonic() + 5
+    while not PROMPT_PATTERN.search(output) and time.monotonic() < deadline:
+        output += runner.get_output()
+        time.sleep(0.01)
+    runner.quit()
+
+    assert output.startswith('café ' * 3000)
+    assert '�' not in output
+    assert len(runner.output_buffer) == 10
+    assert list(runner.output_buffer)[-2:] == ['line 49', '> ']
+    assert 'café' in (tmp_path / 'game.log').read_text(encoding='utf-8')
+
+# Stand-in interpreter writing one line in two writes
+SPLIT_LINE_WRITER = """
+import sys, time
+sys.stdout.write('The lamp glows'); sys.stdout.flush()
+time.sleep(0.2)
+sys.stdout.write(' brightly.\\n\\n> '); sys.stdout.flush()
+sys.stdin.readline()
+"""
+
+def test_line_split_across_reads_is_logged_once(tmp_path):
+    script = tmp_path / 'writer.py'
+    script.write_text(SPLIT_LINE_WRITER)
+    log_file = tmp_path / 'game.log'
+    runner = FrotzRunner(str(script), frotz_path=sys.executable, log_file=str(log_file))
+    runner.start()
+    outputs = []
+    deadline = time.monotonic() + 5
+    while not PROMPT_PATTERN.search(''.join(outputs)) and time.monotonic() < deadline:
+        output = runner.get_output()
+        if output:
+            outputs.append(output)
+        time.sleep(0.01)
+    runner.quit()
+
+    assert outputs[0] == 'The lamp glows'
+    assert list(runner.output_buffer) == ['The lamp glows brightly.', '', '> ']
+    assert [line.split('] ', 1)[1] for line in log_file.read_text(encoding='utf-8').splitlines()] == \
+        list(runner.output_buffer)
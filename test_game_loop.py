@@ -0,0 +1,16 @@
+from benchmarks.game_loop import run_benchmark
+
+def test_game_loop_with_fake_interpreter():
+    """Play a short game against the fake interpreter and stub LLM."""
+    results = run_benchmark(turns=20, windows=2, update_every=5)
+
+    assert results["turns"] == 20
+    assert results["calls"]["game_agent"] == 20
+    assert results["calls"]["update_decidor_agent"] == 20
+    assert results["calls"]["story_agent"] == 4
+    assert results["log_bytes"] > 0
+    assert [w["last_turn"] for w in results["windows"]] == [10, 20]
+
+if __name__ == "__main__":
+    test_game_loop_with_fake_interpreter()
+    print("Game loop test passed!")
@@ -0,0 +1,5 @@
+from benchmarks.import_time import measure_imports
+
+def test_main_does_not_load_heavy_modules():
+    result = measure_imports('main', {'USE_TTS': 'false'})
+    assert result['heavy_modules'] == []
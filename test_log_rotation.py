@@ -0,0 +1,108 @@
+import os
+import json
+import gzip
+# Imported first: it turns off waiting for a key press before game.game_io is loaded
+from benchmarks.game_loop import FAKE_DFROTZ
+import main
+from agents import agent_interactions
+from agents.agent_interactions import get_game_history
+from agents.agent_runner import set_agent_backend
+from benchmarks.stub_llm import StubLLM
+from game import checkpoint as checkpoints
+from game.checkpoint import get_checkpoint_filename, load_checkpoint, restore_interpreter, truncate_logs
+from runner.frotz_runner import FrotzRunner
+from game.game_logger import log_story_narration
+from utils import file_utils
+from utils.file_utils import read_json_entries, read_json_narrations, read_story_narrations, get_last_n_json_updates, \
+    get_last_n_updates
+from utils.log_rotation import RunLogs, list_segments, wait_for_compression, rotate_file, read_segment
+
+COMMANDS = ["north", "up", "down", "south", "east"]
+
+def _moves(json_log_file: str) -> list:
+    return [entry.get('moves') for entry in read_json_entries(json_log_file)]
+
+def test_logs_rotate_into_compressed_segments(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # Log file names are relative and may repeat across tests
+    monkeypatch.setattr(agent_interactions, '_histories', {})
+    set_agent_backend(StubLLM(commands=COMMANDS, update_every=2))
+    try:
+        story_log_file, json_log_file = main.init_log_files('fake.z5')
+        runner = FrotzRunner('fake.z5', frotz_path=FAKE_DFROTZ)
+        run_logs = RunLogs(json_log_file, story_log_file, runner.log_file, max_bytes=0, max_turns=4)
+        runner.start()
+        main.run_game(runner, story_log_file, json_log_file, max_turns=10, poll_interval=0.001, run_logs=run_logs)
+        runner.quit()
+    finally:
+        set_agent_backend(None)
+    wait_for_compression()
+
+    with open(run_logs.manifest_file, 'r', encoding='utf-8') as f:
+        segments = json.load(f)["segments"]
+    assert [(segment["first_turn"], segment["last_turn"]) for segment in segments] == [(1, 4), (5, 8)]
+    for path in run_logs.logs():
+        assert [name[-3:] for name in list_segments(path)] == ['.gz', '.gz']
+    with gzip.open(list_segments(json_log_file)[0], 'rt', encoding='utf-8') as f:
+        assert len(json.load(f)) == 4
+
+    # Readers see the whole run across segments
+    assert _moves(json_log_file) == [None] + list(range(1, 10))
+    assert read_json_narrations(json_log_file) == read_story_narrations(story_log_file)
+    assert len(read_story_narrations(story_log_file)) > 2
+    # The open segment holds turns 9 and 10; the other three come from the last closed one
+    last_updates = get_last_n_json_updates(json_log_file, 5)
+    assert 'Moves: 5' in last_updates and 'Moves: 9' in last_updates and 'Moves: 4' not in last_updates
+    # The game agent's history followed the transcript through rotations
+    assert len(get_game_history(runner.log_file).index) == 10
+
+def test_resume_rolls_back_segments_closed_after_the_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(checkpoints, 'CHECKPOINT_EVERY', 5)
+    monkeypatch.setattr(main, 'CHECKPOINT_EVERY', 5)
+    set_agent_backend(StubLLM(commands=COMMANDS))
+    try:
+        story_log_file, json_log_file = main.init_log_files('fake.z5')
+        checkpoint_file = get_checkpoint_filename(json_log_file)
+        runner = FrotzRunner('fake.z5', frotz_path=FAKE_DFROTZ)
+        run_logs = RunLogs(json_log_file, story_log_file, runner.log_file, max_bytes=0, max_turns=3)
+        runner.start()
+        main.run_game(runner, story_log_file, json_log_file, max_turns=13, poll_interval=0.001,
+                      checkpoint_file=checkpoint_file, run_logs=run_logs)
+        runner.quit()
+        assert len(run_logs.segments) == 4
+
+        checkpoint = load_checkpoint(checkpoint_file)
+        assert checkpoint['turn'] == 10 and checkpoint['log_segments'] == 3
+        run_logs = RunLogs(json_log_file, story_log_file, checkpoint['runner_log_file'], max_bytes=0, max_turns=3)
+        truncate_logs(checkpoint, run_logs)
+        assert len(run_logs.segments) == 3 and len(list_segments(json_log_file)) == 3
+        assert _moves(json_log_file) == [None] + list(range(1, 10))
+
+        runner = FrotzRunner('fake.z5', frotz_path=FAKE_DFROTZ, log_file=checkpoint['runner_log_file'])
+        runner.start()
+        assert restore_interpreter(runner, checkpoint)
+        main.run_game(runner, story_log_file, json_log_file, max_turns=15, poll_interval=0.001,
+                      checkpoint_file=checkpoint_file, resume=checkpoint, run_logs=run_logs)
+        runner.quit()
+    finally:
+        set_agent_backend(None)
+    wait_for_compression()
+    assert _moves(json_log_file) == [None] + list(range(1, 15))
+    assert os.path.exists(run_logs.manifest_file)
+
+def test_last_story_updates_read_a_closed_segment_only_after_a_rotation(tmp_path, monkeypatch):
+    story_log_file = str(tmp_path / 'story.log')
+    with open(story_log_file, 'w', encoding='utf-8') as f:
+        f.write("The door creaks open.\n\nA draft blows out the candle.\n\n")
+    rotate_file(story_log_file, compression='gzip')
+    wait_for_compression()
+    reads = []
+    monkeypatch.setattr(file_utils, 'read_segment', lambda path: reads.append(path) or read_segment(path))
+
+    # Nothing narrated since the rotation: the last segment stands in
+    assert get_last_n_updates(story_log_file) == "The door creaks open.\n\nA draft blows out the candle.\n\n"
+    assert len(reads) == 1
+    log_story_narration(story_log_file, "Darkness falls.")
+    assert get_last_n_updates(story_log_file) == "Darkness falls.\n\n"
+    assert len(reads) == 1
@@ -0,0 +1,58 @@
+import re
+import urllib.request
+# Imported first: it turns off waiting for a key press before game.game_io is loaded
+from benchmarks.game_loop import FAKE_DFROTZ
+import main
+from agents.agent_runner import set_agent_backend
+from benchmarks.stub_llm import StubLLM
+from runner.frotz_runner import FrotzRunner
+from utils.metrics import MetricsRegistry, registry, serve_metrics, MetricsFileWriter
+
+def test_registry_renders_prometheus_text():
+    metrics = MetricsRegistry()
+    metrics.const_labels['session'] = 'run "1"'
+    metrics.counter('calls_total', 'Calls', ('agent',)).inc(2, agent='game')
+    histogram = metrics.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 3.0):
+        histogram.observe(value)
+    text = metrics.render()
+    assert '# TYPE calls_total counter\ncalls_total{session="run \\"1\\"",agent="game"} 2\n' in text
+    assert 'latency_seconds_bucket{session="run \\"1\\"",le="0.1"} 1\n' in text
+    assert 'latency_seconds_bucket{session="run \\"1\\"",le="1"} 2\n' in text
+    assert 'latency_seconds_bucket{session="run \\"1\\"",le="+Inf"} 3\n' in text
+    assert 'latency_seconds_count{session="run \\"1\\""} 3\n' in text
+
+def _sample(text: str, name: str) -> float:
+    match = re.search(rf'^{re.escape(name)}(?:{{[^}}]*}})? (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+def _llm_ok(text: str) -> float:
+    match = re.search(r'^llm_calls_total\{[^}]*agent="game_agent",status="ok"\} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+def test_game_loop_metrics_are_served_and_written(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    server = serve_metrics(port=0)
+    writer = MetricsFileWriter(str(tmp_path / 'metrics.prom'), interval=60)
+    url = f"http://127.0.0.1:{server.server_port}/metrics"
+    before = urllib.request.urlopen(url).read().decode('utf-8')
+    set_agent_backend(StubLLM())
+    try:
+        story_log_file, json_log_file = main.init_log_files('fake.z5')
+        runner = FrotzRunner('fake.z5', frotz_path=FAKE_DFROTZ)
+        runner.start()
+        main.run_game(runner, story_log_file, json_log_file, max_turns=6, poll_interval=0.001)
+        runner.quit()
+    finally:
+        set_agent_backend(None)
+    after = urllib.request.urlopen(url).read().decode('utf-8')
+    server.shutdown()
+    writer.close()
+
+    assert _sample(after, 'game_turns_total') - _sample(before, 'game_turns_total') == 6
+    assert _llm_ok(after) - _llm_ok(before) == 6
+    assert _sample(after, 'game_moves') == 5
+    assert _sample(after, 'process_resident_memory_bytes') > 0
+    assert 'game_turn_seconds_bucket' in after
+    assert _sample((tmp_path / 'metrics.prom').read_text(), 'game_turns_total') == _sample(after, 'game_turns_total')
+    assert registry.counter('game_turns_total', '').value() == _sample(after, 'game_turns_total')
@@ -0,0 +1,40 @@
+# Imported first: it turns off waiting for a key press before game.game_io is loaded
+from benchmarks.game_loop import FAKE_DFROTZ
+import tracemalloc
+import main
+from agents.agent_runner import set_agent_backend
+from benchmarks.stub_llm import StubLLM
+from runner.frotz_runner import FrotzRunner
+from utils.profiling import TurnProfiler, parse_profile_modes, code_area
+
+def test_profile_modes_and_code_areas():
+    assert parse_profile_modes('') == set()
+    assert parse_profile_modes('true') == {'cpu', 'memory'}
+    assert parse_profile_modes(' Memory ') == {'memory'}
+    assert code_area(main.__file__) == 'main.py'
+    assert code_area(tracemalloc.__file__) == 'stdlib:tracemalloc'
+
+def test_game_loop_is_profiled_per_window(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    set_agent_backend(StubLLM())
+    profiler = TurnProfiler(str(tmp_path / 'profile'), every=3)
+    try:
+        story_log_file, json_log_file = main.init_log_files('fake.z5')
+        runner = FrotzRunner('fake.z5', frotz_path=FAKE_DFROTZ)
+        runner.start()
+        profiler.start()
+        main.run_game(runner, story_log_file, json_log_file, max_turns=7, poll_interval=0.001, profiler=profiler)
+    finally:
+        profiler.stop()
+        runner.quit()
+        set_agent_backend(None)
+
+    # Two full windows and the partial last one, each with a loadable CPU profile
+    assert [path.name for path in sorted((tmp_path / 'profile').glob('*.txt'))] == [
+        'turns_00001-00003.txt', 'turns_00004-00006.txt', 'turns_00007-00007.txt']
+    assert len(list((tmp_path / 'profile').glob('*.prof'))) == 3
+    report = (tmp_path / 'profile' / 'turns_00004-00006.txt').read_text()
+    assert report.startswith('Turns 4-6: ')
+    assert 'agents/agent_interactions.py' in report and 'get_agent_command' in report
+    assert 'Top allocation growth since the previous window:' in report
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,49 @@
+from utils.log_rotation import rotate_file, wait_for_compression
+from utils.retrieval import GameHistory, TurnIndex
+
+def test_search_ranks_matching_turn_first():
+    index = TurnIndex()
+    index.add("West of House. There is a small mailbox here.")
+    index.add("The old man whispers: the brass key is under the rug.")
+    for turn in range(50):
+        index.add(f"Kitchen. A clock ticks on the wall. Turn {turn}. Exits: north, east.")
+    hits = index.search("You need a key to open the door.", k=3)
+    assert hits[0][0] == 1
+    assert index.search("key", k=3, limit=1) == []
+
+def test_history_recalls_early_turn_outside_recent_window(tmp_path):
+    log_file = tmp_path / "game.log"
+    lines = ["[10:00:00.000] The old man whispers: the brass key is under the rug.",
+             "[10:00:00.001] [AGENT] thank man"]
+    for turn in range(30):
+        lines += [f"[10:00:01.000] Kitchen. A clock ticks on the wall. Turn {turn}.",
+                  "[10:00:01.001] [AGENT] look"]
+    log_file.write_text('\n'.join(lines[:20]) + '\n', encoding='utf-8')
+    history = GameHistory(str(log_file), recent_turns=5)
+    history.update()
+    with open(log_file, 'a', encoding='utf-8') as f:
+        f.write('\n'.join(lines[20:]) + "\n[10:00:02.000] A locked door blocks the way. Where is the key?\n")
+    history.update()
+
+    assert len(history.index) == 31
+    assert history.current_screen == "A locked door blocks the way. Where is the key?"
+    relevant = history.relevant_turns(2)
+    assert relevant[0].startswith("The old man whispers")
+    assert all(turn not in history.recent for turn in relevant)
+
+def test_history_starts_with_the_rotated_segments(tmp_path):
+    log_file = tmp_path / "game.log"
+    log_file.write_text("[10:00:00.000] The old man whispers: the brass key is under the rug.\n"
+                        "[10:00:00.001] [AGENT] thank man\n", encoding='utf-8')
+    rotate_file(str(log_file), compression='gzip')
+    log_file.write_text("[10:00:01.000] Kitchen. A clock ticks on the wall.\n[10:00:01.001] [AGENT] look\n",
+                        encoding='utf-8')
+    rotate_file(str(log_file), compression='none')
+    log_file.write_text("[10:00:02.000] A locked door blocks the way. Where is the key?\n", encoding='utf-8')
+    wait_for_compression()
+
+    history = GameHistory(str(log_file), recent_turns=1)
+    history.update()
+    assert len(history.index) == 2
+    assert history.current_screen == "A locked door blocks the way. Where is the key?"
+    assert history.relevant_turns(1)[0].startswith("The old man whispers")
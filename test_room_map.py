@@ -0,0 +1,40 @@
+from benchmarks.game_loop import run_benchmark
+from agents import agent
+from agents.agent import get_agent_instruction
+from game.room_map import RoomMap, normalize_direction, parse_goto
+
+def test_map_records_exits_visits_and_routes():
+    room_map = RoomMap()
+    for room, command in [("Kitchen", None), ("Hallway", "n"), ("Attic", "go up"), ("Attic", "west"),
+                          ("Hallway", "down"), ("Kitchen", "south")]:
+        room_map.observe(room, command)
+    assert room_map.exits["Kitchen"] == {"north": "Hallway"}
+    assert room_map.blocked["Attic"] == {"west"}
+    assert room_map.visits == {"Kitchen": 2, "Hallway": 2, "Attic": 1}
+    assert room_map.shortest_path("Kitchen", "Attic") == [("north", "Hallway"), ("up", "Attic")]
+    assert room_map.shortest_path("Attic", "Nowhere") is None
+    assert room_map.summary().startswith("- Kitchen (visited 2x): north -> Hallway")
+    assert normalize_direction("take lamp") is None
+    assert parse_goto("GOTO the attic") == "the attic"
+
+def test_goto_walks_the_route_without_model_calls():
+    """Turns 9 and 10 finish the GOTO route from the Garden to the Attic."""
+    commands = ["east", "west", "north", "up", "down", "south", "east", "GOTO attic", "look"]
+    results = run_benchmark(turns=10, windows=1, commands=commands)
+    assert results["turns"] == 10
+    assert results["calls"]["game_agent"] == 8
+
+def test_moves_are_mapped_across_more_screens(monkeypatch):
+    """Every move shows a ***MORE*** screen of the previous room first; GOTO still finds its route."""
+    monkeypatch.setenv('FAKE_DFROTZ_MORE', 'true')
+    commands = ["east", "west", "north", "up", "down", "south", "GOTO attic", "look"]
+    results = run_benchmark(turns=17, windows=1, commands=commands)
+    assert results["turns"] == 17
+    assert results["calls"]["game_agent"] == 8
+
+def test_goto_is_only_advertised_with_a_room_map(monkeypatch):
+    assert 'GOTO' in get_agent_instruction('game_agent')
+    monkeypatch.setattr(agent, 'ROOM_MAP', False)
+    instruction = get_agent_instruction('game_agent')
+    assert 'GOTO' not in instruction
+    assert 'IMPORTANT: Output ONLY the raw JSON object' in instruction
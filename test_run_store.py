@@ -0,0 +1,42 @@
+# Imported first: it turns off waiting for a key press before game.game_io is loaded
+from benchmarks.game_loop import FAKE_DFROTZ
+import main
+from agents.agent_runner import set_agent_backend
+from benchmarks.stub_llm import StubLLM
+from runner.frotz_runner import FrotzRunner
+from utils.run_store import RunStore, open_run_store, close_run_store
+
+def test_run_store_records_and_imports_runs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    set_agent_backend(StubLLM(commands=["look", "look", "look", "look", "north", "south"], update_every=3))
+    store = open_run_store(str(tmp_path / 'runs.sqlite'))
+    try:
+        story_log_file, json_log_file = main.init_log_files('fake.z5')
+        store.start_run('live', 'fake.z5', config={"narration_mode": "separate"})
+        runner = FrotzRunner('fake.z5', frotz_path=FAKE_DFROTZ, log_file=json_log_file[:-len('.json')] + '.log')
+        runner.start()
+        played = main.run_game(runner, story_log_file, json_log_file, max_turns=12, poll_interval=0.001)
+        runner.quit()
+        store.end_run()
+    finally:
+        set_agent_backend(None)
+
+    (name, turns, calls, per_turn), = store.calls_per_turn()
+    assert (name, turns) == ('live', played)
+    # A game agent and an update decider call per turn, plus the story agent every third turn
+    assert calls == 2 * played + played // 3
+    assert set(store.latency_percentiles()) == {'game_agent', 'update_decidor_agent', 'story_agent'}
+    loop = store.stuck_loops()[0]
+    assert loop[:3] == ('live', 'Kitchen', 'look') and loop[3] >= 4
+    close_run_store()
+
+    # Importing the run's logs gives the same turns, commands and narrations
+    imported = RunStore(str(tmp_path / 'imported.sqlite'))
+    run_id = imported.import_json_log(json_log_file)
+    live = RunStore(str(tmp_path / 'runs.sqlite'))
+    query = 'SELECT turn, room, moves, command, story_updated FROM turns WHERE run_id = ? ORDER BY turn'
+    assert imported.db.execute(query, (run_id,)).fetchall() == live.db.execute(query, (1,)).fetchall()
+    narrations = 'SELECT turn, text FROM narrations WHERE run_id = ? ORDER BY turn'
+    assert imported.db.execute(narrations, (run_id,)).fetchall() == live.db.execute(narrations, (1,)).fetchall()
+    imported.close()
+    live.close()
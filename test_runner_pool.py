@@ -0,0 +1,36 @@
+import time
+from benchmarks.runner_pool import FAKE_DFROTZ, first_screen
+from runner.pool import RunnerPool
+
+def wait_until_full(pool, timeout=10):
+    deadline = time.monotonic() + timeout
+    while pool._ready.qsize() < pool.size and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def test_pool_hands_out_warm_runners_and_refills(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with RunnerPool('fake.z5', size=1, frotz_path=FAKE_DFROTZ, intro_commands=['north']) as pool:
+        wait_until_full(pool)
+        runner = pool.acquire(str(tmp_path / 'episode.log'))
+        # The pooled runner already played the intro commands
+        screen = first_screen(runner, timeout=1)
+        assert 'Hallway' in screen
+        assert runner.command_history == ['north']
+        assert 'Hallway' in (tmp_path / 'episode.log').read_text()
+        runner.send_command('up')
+        assert 'Attic' in first_screen(runner)
+        runner.quit()
+
+        wait_until_full(pool)
+        assert pool._ready.qsize() == 1
+        assert pool.stats == {"acquired": 1, "warm": 1, "cold": 0, "discarded": 0}
+    assert pool._ready.qsize() == 0
+
+def test_pool_starts_cold_runner_when_empty(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pool = RunnerPool('fake.z5', size=0, frotz_path=FAKE_DFROTZ).start()
+    runner = pool.acquire()
+    assert 'Kitchen' in first_screen(runner)
+    runner.quit()
+    pool.close()
+    assert pool.stats["cold"] == 1
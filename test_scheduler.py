@@ -0,0 +1,80 @@
+import os
+import asyncio
+import pytest
+from agents import scheduler
+from agents.scheduler import LLMScheduler
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+def test_token_buckets_refill_over_time(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scheduler, 'time', clock)
+    limiter = LLMScheduler(max_rpm=60, max_tpm=1000)
+    assert [limiter._try_acquire(f't{i}', 0, 10) for i in range(60)] == [0] * 60
+    # The request bucket is empty: one request comes back per second
+    assert limiter._try_acquire('late', 0, 10) == pytest.approx(1.0)
+    clock.now += 1.0
+    assert limiter._try_acquire('late', 0, 10) == 0
+    # 400 tokens are left; 600 more take 12 seconds to refill
+    clock.now += 60
+    assert limiter._try_acquire('big', 0, 600) == 0
+    assert limiter._try_acquire('bigger', 0, 600) == pytest.approx(12.0)
+    clock.now += 12
+    assert limiter._try_acquire('bigger', 0, 600) == 0
+
+def test_quota_errors_back_off_and_retry(monkeypatch):
+    monkeypatch.setattr(scheduler.random, 'uniform', lambda low, high: high)
+    limiter = LLMScheduler(max_retries=2, backoff_base=0.01, backoff_max=0.03)
+    assert [limiter.backoff_delay(attempt) for attempt in range(4)] == [0.01, 0.02, 0.03, 0.03]
+
+    errors = [RuntimeError('429 RESOURCE_EXHAUSTED'), RuntimeError('quota exceeded')]
+    async def flaky():
+        if errors:
+            raise errors.pop(0)
+        return 'answer'
+    assert asyncio.run(limiter.run('game_agent', flaky)) == 'answer'
+    with limiter.state.transaction() as state:
+        assert state['paused_until'] > 0 and not state['in_flight'] and not state['waiting']
+
+    async def always_quota():
+        raise RuntimeError('rate limit')
+    with pytest.raises(RuntimeError):
+        asyncio.run(limiter.run('game_agent', always_quota))
+    async def broken():
+        raise ValueError('bad request')
+    with pytest.raises(ValueError):
+        asyncio.run(limiter.run('game_agent', broken))
+
+def test_priority_orders_calls_across_processes(tmp_path):
+    state_file = str(tmp_path / 'scheduler.json')
+    game_session = LLMScheduler(max_in_flight=1, state_file=state_file)
+    story_session = LLMScheduler(max_in_flight=1, state_file=state_file)
+    # Another live process sharing the state file
+    story_session._pid = str(os.getppid())
+    order = []
+
+    def call(name):
+        async def run():
+            order.append(name)
+        return run
+
+    async def scenario():
+        # Hold the only slot, then queue a story call before a game command
+        await game_session._acquire(0, 1)
+        story = asyncio.ensure_future(story_session.run('story_agent', call('story')))
+        await asyncio.sleep(0.2)
+        game = asyncio.ensure_future(game_session.run('game_agent', call('game')))
+        await asyncio.sleep(0.2)
+        assert (game_session.waiting(), story_session.waiting()) == (1, 1)
+        game_session._release()
+        await asyncio.gather(story, game)
+
+    asyncio.run(scenario())
+    assert order == ['game', 'story']
+    with game_session.state.transaction() as state:
+        assert state['waiting'] == {} and state['in_flight'] == {}
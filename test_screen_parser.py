@@ -0,0 +1,18 @@
+from game.screen_parser import parse_screen, PROMPT_COMMAND, PROMPT_MORE, PROMPT_GAME_OVER, PROMPT_NONE
+from utils.text_utils import clean_log_text
+
+def test_status_line_and_command_prompt():
+    turn = parse_screen(" West of House                        Score: 10       Moves: 3\n\n"
+                        "West of House\nThere is a small mailbox here.\n\n>")
+    assert (turn.room, turn.score, turn.moves, turn.prompt) == ("West of House", 10, 3, PROMPT_COMMAND)
+    assert turn.body == "West of House\nThere is a small mailbox here."
+
+def test_prompt_types_without_status_line():
+    more = parse_screen("The troll [angrily] swings his axe.\n***MORE***")
+    assert (more.room, more.prompt, more.body) == (None, PROMPT_MORE, "The troll [angrily] swings his axe.")
+    assert parse_screen("\n    *** You have died ***\n\nWould you like to RESTART?\n>").prompt == PROMPT_GAME_OVER
+    assert parse_screen("Half a screen with no prompt yet").prompt == PROMPT_NONE
+
+def test_clean_log_text_keeps_brackets_in_game_text():
+    log = "[10:00:00.000] A sign [faded] reads: [EXIT]\n\n[10:00:00.001] [AGENT] read sign\n"
+    assert clean_log_text(log) == "A sign [faded] reads: [EXIT]\n[AGENT] read sign"
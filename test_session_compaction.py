@@ -0,0 +1,35 @@
+import asyncio
+from google.adk.sessions import InMemorySessionService
+from google.adk.events import Event
+from google.genai import types
+from agents.session_compaction import SUMMARY_PREFIX, compact_session
+
+def _message(author: str, text: str) -> Event:
+    role = 'user' if author == 'user' else 'model'
+    return Event(author=author, invocation_id='test', content=types.Content(role=role, parts=[types.Part(text=text)]))
+
+async def _play(turns: int, keep_exchanges: int, max_bytes: int):
+    service = InMemorySessionService()
+    session = await service.create_session(app_name='app', user_id='user', session_id='session')
+    sizes = []
+    for turn in range(turns):
+        await service.append_event(session, _message('user', 'transcript line\n' * 200))
+        await service.append_event(session, _message('game_agent', f'{{"command": "north {turn}"}}'))
+        stats = await compact_session(service, 'app', 'user', 'session', keep_exchanges, max_bytes)
+        sizes.append(stats['bytes'])
+        session = await service.get_session(app_name='app', user_id='user', session_id='session')
+    return session, sizes
+
+def test_keeps_last_exchanges_and_summarizes_older_ones():
+    session, _ = asyncio.run(_play(10, keep_exchanges=3, max_bytes=0))
+    texts = [event.content.parts[0].text for event in session.events]
+    assert texts[0].startswith(SUMMARY_PREFIX)
+    assert '"north 6"' in texts[0] and '"north 7"' not in texts[0]
+    assert texts[1:] == ['transcript line\n' * 200, '{"command": "north 7"}',
+                         'transcript line\n' * 200, '{"command": "north 8"}',
+                         'transcript line\n' * 200, '{"command": "north 9"}']
+
+def test_session_size_stays_flat_under_byte_cap():
+    session, sizes = asyncio.run(_play(60, keep_exchanges=4, max_bytes=8000))
+    assert max(sizes) <= 8000
+    assert len(session.events) <= 1 + 2 * 4
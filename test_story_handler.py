@@ -0,0 +1,65 @@
+import json
+import asyncio
+import pytest
+# Imported first: it turns off waiting for a key press before game.game_io is loaded
+from benchmarks.game_loop import FAKE_DFROTZ
+import main
+from agents.agent_runner import set_agent_backend, agent_fallbacks
+from agents.story_handler import get_update_and_narration
+from benchmarks.stub_llm import StubLLM
+from runner.frotz_runner import FrotzRunner
+
+class CannedBackend:
+    """Answers every call with the same text."""
+
+    def __init__(self, answer: str):
+        self.answer = answer
+
+    async def __call__(self, agent_key, session_id, query, default_response):
+        return self.answer
+
+@pytest.fixture
+def log_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    yield main.init_log_files('fake.z5')
+    set_agent_backend(None)
+
+@pytest.mark.parametrize("answer, expected", [
+    ('{"should_update": true, "narration": " The door opens. "}', {"should_update": True, "narration": "The door opens."}),
+    ('{"should_update": "true", "narration": "The door opens."}', {"should_update": True, "narration": "The door opens."}),
+    ('{"should_update": "false", "narration": "The door opens."}', {"should_update": False, "narration": ""}),
+    ('{"should_update": false, "narration": "The door opens."}', {"should_update": False, "narration": ""}),
+])
+def test_combined_call_decides_and_narrates(log_files, answer, expected):
+    set_agent_backend(CannedBackend(answer))
+    assert asyncio.run(get_update_and_narration(*reversed(log_files))) == expected
+
+@pytest.mark.parametrize("answer", [
+    'The door opens.',
+    '{"narration": "The door opens."}',
+    '{"should_update": "maybe", "narration": "The door opens."}',
+    '["should_update"]',
+])
+def test_malformed_combined_response_skips_narration(log_files, answer):
+    set_agent_backend(CannedBackend(answer))
+    fallbacks = agent_fallbacks.total(agent='narration_agent', reason='invalid_response')
+    assert asyncio.run(get_update_and_narration(*reversed(log_files))) == {"should_update": False, "narration": ""}
+    assert agent_fallbacks.total(agent='narration_agent', reason='invalid_response') == fallbacks + 1
+
+def test_combined_mode_narrates_in_one_call_per_turn(log_files):
+    story_log_file, json_log_file = log_files
+    stub = StubLLM(update_every=3)
+    set_agent_backend(stub)
+    runner = FrotzRunner('fake.z5', frotz_path=FAKE_DFROTZ)
+    runner.start()
+    try:
+        main.run_game(runner, story_log_file, json_log_file, max_turns=6, poll_interval=0.001,
+                      narration_mode='combined')
+    finally:
+        runner.quit()
+    assert stub.calls == {"game_agent": 6, "narration_agent": 6}
+    with open(json_log_file, 'r', encoding='utf-8') as f:
+        narrated = [entry.get('story_updated', False) for entry in json.load(f)]
+    assert narrated == [False, False, True, False, False, True]
+    with open(story_log_file, 'r', encoding='utf-8') as f:
+        assert f.read().count("The story moves on") == 2
@@ -0,0 +1,23 @@
+import tts_pool
+from tts_handler import TTSHandler
+
+def test_cleanup_stops_the_synthesis_workers(tmp_path):
+    pool = tts_pool.get_synthesis_pool('null')
+    futures = pool.map(["One.", "Two."], [str(tmp_path / 'a.wav'), str(tmp_path / 'b.wav')])
+    # The null engine stands in for a model: it loads in each worker and writes no audio
+    assert [future.result(timeout=60) for future in futures] == [False, False]
+    processes = list(pool.executor._processes.values())
+
+    handler = TTSHandler('null')
+    handler.pool = pool
+    handler.cleanup()
+    assert tts_pool._shared_pools == {}
+    assert processes and not any(process.is_alive() for process in processes)
+
+def test_default_pool_size_is_a_share_of_the_host(monkeypatch):
+    monkeypatch.setattr(tts_pool.os, 'cpu_count', lambda: 16)
+    monkeypatch.setattr(tts_pool, 'TTS_SESSIONS', 4)
+    monkeypatch.setattr(tts_pool, 'TTS_WORKERS', 0)
+    monkeypatch.setattr(tts_pool, 'ProcessPoolExecutor', lambda **kwargs: kwargs)
+    pool = tts_pool.SynthesisPool('null')
+    assert (pool.workers, pool.torch_threads) == (2, 2)
@@ -0,0 +1,37 @@
+from utils.text_utils import IncrementalJSONParser, parse_json_fields, extract_json
+
+def test_command_available_before_object_closes():
+    """The command field is complete as soon as its closing quote arrives."""
+    text = 'Sure! {"command": "take \\"red\\" key", "explanation": "The key opens the'
+    parser = IncrementalJSONParser()
+    seen_at = None
+    for i, char in enumerate(text):
+        if 'command' in parser.feed(char):
+            seen_at = i
+            break
+    assert parser.fields['command'] == 'take "red" key'
+    assert seen_at == text.index('key",') + len('key"') - 1
+    assert not parser.complete
+
+def test_fields_with_markdown_and_trailing_text():
+    """Fences, nested values and braces inside strings do not confuse the parser."""
+    text = (
+        '```json\n{"should_update": true, "meta": {"a": [1, "}"]}, "reason": "new room {x}"}\n```\n'
+        'Let me know if you need anything {else}.'
+    )
+    assert parse_json_fields(text) == {
+        "should_update": True,
+        "meta": {"a": [1, "}"]},
+        "reason": "new room {x}"
+    }
+
+def test_extract_json_ignores_trailing_braces():
+    """The first complete object is extracted, not everything up to the last brace."""
+    text = 'Here: {"command": "north", "explanation": "explore"} and {"other": 1}'
+    assert extract_json(text) == '{"command": "north", "explanation": "explore"}'
+
+if __name__ == "__main__":
+    test_command_available_before_object_closes()
+    test_fields_with_markdown_and_trailing_text()
+    test_extract_json_ignores_trailing_braces()
+    print("Text utils tests passed!")
@@ -0,0 +1,40 @@
+import asyncio
+import pytest
+from utils.tracing import Tracer
+
+def test_failed_and_cancelled_calls_are_recorded():
+    tracer = Tracer(enabled=True)
+    tracer.start_turn(41)
+    tracer.start_turn()
+
+    @tracer.traced('agent.call')
+    async def call(delay):
+        await asyncio.sleep(delay)
+        raise TimeoutError("no answer")
+
+    @tracer.traced('logger.write')
+    def write():
+        raise OSError("disk full")
+
+    async def cancel_slow_call():
+        task = asyncio.ensure_future(call(10))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(call(0))
+    asyncio.run(cancel_slow_call())
+    with pytest.raises(OSError):
+        write()
+    with pytest.raises(KeyError):
+        with tracer.span('stage', room='Kitchen'):
+            raise KeyError('x')
+
+    assert [(span['stage'], span['turn'], span['args']) for span in tracer.spans] == [
+        ('agent.call', 42, {'error': 'TimeoutError'}),
+        ('agent.call', 42, {'error': 'CancelledError'}),
+        ('logger.write', 42, {'error': 'OSError'}),
+        ('stage', 42, {'room': 'Kitchen', 'error': 'KeyError'}),
+    ]
@@ -0,0 +1,45 @@
+import pytest
+import tts_engines
+from tts_engines import TTSEngine, CoquiEngine, NullEngine, register_engine, list_engines, create_engine
+
+class FakeEngine(TTSEngine):
+    """Writes the text instead of audio."""
+
+    def __init__(self):
+        self.loaded = False
+
+    def load(self):
+        self.loaded = True
+
+    def synthesize_to_file(self, text: str, file_path: str) -> bool:
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return True
+
+def test_registered_engine_is_listed_and_created(tmp_path, monkeypatch):
+    monkeypatch.setattr(tts_engines, '_ENGINES', dict(tts_engines._ENGINES))
+    register_engine('fake', FakeEngine, 'fast', "Fake engine for tests")
+    assert ('fake', 'fast', "Fake engine for tests") in list_engines()
+
+    engine = create_engine('fake')
+    assert isinstance(engine, FakeEngine)
+    assert (engine.name, engine.tier) == ('fake', 'fast')
+    # Every call creates a new engine
+    assert create_engine('fake') is not engine
+    assert engine.synthesize_to_file("Hello.", str(tmp_path / 'out.wav'))
+    assert (tmp_path / 'out.wav').read_text(encoding='utf-8') == "Hello."
+
+def test_default_engine_comes_from_the_setting(monkeypatch):
+    monkeypatch.setattr(tts_engines, 'DEFAULT_TTS_ENGINE', 'null')
+    engine = create_engine()
+    assert isinstance(engine, NullEngine) and engine.tier == 'none'
+    assert not engine.synthesize_to_file("Hello.", 'unused.wav')
+
+def test_unknown_engine_lists_the_available_ones():
+    with pytest.raises(ValueError, match=r"Unknown TTS engine 'nope'\. Available: .*\bnull\b"):
+        create_engine('nope')
+
+def test_coqui_engines_load_their_model_lazily():
+    engine = create_engine('vits')
+    assert isinstance(engine, CoquiEngine)
+    assert engine.model_name == "tts_models/en/ljspeech/vits" and engine.tts is None
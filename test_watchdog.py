@@ -0,0 +1,81 @@
+import json
+import pytest
+# Imported first: it turns off waiting for a key press before game.game_io is loaded
+from benchmarks.game_loop import FAKE_DFROTZ
+import main
+from agents.agent_runner import set_agent_backend
+from benchmarks.stub_llm import StubLLM
+from runner.frotz_runner import FrotzRunner
+from runner.watchdog import InterpreterWatchdog, InterpreterFailedError
+
+@pytest.mark.parametrize("mode", ["crash", "hang"])
+def test_watchdog_restarts_and_restores_state(tmp_path, monkeypatch, mode):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('FAKE_DFROTZ_FAIL_AT', '6')
+    monkeypatch.setenv('FAKE_DFROTZ_FAIL_MODE', mode)
+    monkeypatch.setenv('FAKE_DFROTZ_FAIL_ONCE', str(tmp_path / 'failed'))
+    set_agent_backend(StubLLM(commands=["north", "up", "down", "south", "east"]))
+    try:
+        story_log_file, json_log_file = main.init_log_files('fake.z5')
+        runner = FrotzRunner('fake.z5', frotz_path=FAKE_DFROTZ)
+        runner.start()
+        watchdog = InterpreterWatchdog(runner, output_deadline=0.5)
+        played = main.run_game(runner, story_log_file, json_log_file, max_turns=10, poll_interval=0.01,
+                               watchdog=watchdog)
+        runner.quit()
+    finally:
+        set_agent_backend(None)
+
+    assert played == 10
+    assert watchdog.restarts == 1
+    with open(json_log_file, 'r', encoding='utf-8') as f:
+        assert [entry.get('moves') for entry in json.load(f)] == [None] + list(range(1, 10))
+
+def test_game_loop_stops_when_interpreter_exits(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('FAKE_DFROTZ_MAX_MOVES', '3')
+    set_agent_backend(StubLLM())
+    try:
+        story_log_file, json_log_file = main.init_log_files('fake.z5')
+        runner = FrotzRunner('fake.z5', frotz_path=FAKE_DFROTZ)
+        runner.start()
+        played = main.run_game(runner, story_log_file, json_log_file, max_turns=10, poll_interval=0.01)
+    finally:
+        set_agent_backend(None)
+    assert played == 4
+
+def test_watchdog_leaves_a_finished_game_alone(tmp_path, monkeypatch):
+    """The interpreter exits with status 0 after three moves, like after QUIT."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('FAKE_DFROTZ_MAX_MOVES', '3')
+    set_agent_backend(StubLLM())
+    try:
+        story_log_file, json_log_file = main.init_log_files('fake.z5')
+        runner = FrotzRunner('fake.z5', frotz_path=FAKE_DFROTZ)
+        runner.start()
+        watchdog = InterpreterWatchdog(runner, output_deadline=0.5)
+        played = main.run_game(runner, story_log_file, json_log_file, max_turns=10, poll_interval=0.01,
+                               watchdog=watchdog)
+    finally:
+        set_agent_backend(None)
+    assert played == 4
+    assert watchdog.restarts == 0
+    assert watchdog.problem() is None
+
+def test_failed_replay_counts_as_failed_restart(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = FrotzRunner('fake.z5', frotz_path=FAKE_DFROTZ)
+    runner.start()
+    try:
+        runner.wait_for_prompt()
+        runner.send_command('north')
+        runner.wait_for_prompt()
+        monkeypatch.setattr(runner, 'replay', lambda commands: False)
+        watchdog = InterpreterWatchdog(runner, max_restarts=2)
+        runner.process.kill()
+        runner.process.wait()
+        with pytest.raises(InterpreterFailedError, match='replay failed after 2 restarts'):
+            watchdog.check()
+        assert watchdog.restarts == 2
+    finally:
+        runner.quit()
@@ -0,0 +1,27 @@
+import os
+from game import zmachine
+from game.zmachine import CommandValidator, Vocabulary, load_vocabulary, parse_dictionary
+
+GAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'games', '905.z5')
+
+def test_parse_dictionary_of_story_file():
+    with open(GAME, 'rb') as f:
+        table = parse_dictionary(f.read())
+    assert (table["version"], table["word_length"], table["separators"]) == (5, 9, '.,"')
+    assert {"wallet", "telephone", "automobil", "take", "examine"} <= set(table["words"])
+
+def test_vocabulary_is_cached_per_file_hash(tmp_path, monkeypatch):
+    monkeypatch.setattr(zmachine, 'VOCABULARY_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(zmachine, '_vocabularies', {})
+    vocabulary = load_vocabulary(GAME)
+    assert len(os.listdir(tmp_path)) == 1
+    monkeypatch.setattr(zmachine, '_vocabularies', {})
+    assert load_vocabulary(GAME).words == vocabulary.words
+
+def test_validator_truncates_corrects_and_reports_unknown_words():
+    validator = CommandValidator(Vocabulary(["take", "the", "telephone", "automobil", "look"], word_length=9))
+    assert validator.validate("take the automobile") == ("take the automobile", [])
+    assert validator.validate("take telphone") == ("take telephone", [])
+    assert validator.validate("xyzzy, look") == ("xyzzy, look", ["xyzzy"])
+    assert validator.validate('take "anything goes" 42') == ('take "anything goes" 42', [])
+    assert validator.validate("ENTER") == ("ENTER", [])
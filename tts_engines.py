@@ -0,0 +1,131 @@
+import os
+import shutil
+import subprocess
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Get the default TTS engine from environment
+DEFAULT_TTS_ENGINE = os.getenv('TTS_ENGINE', 'tacotron2-ddc')
+
+class TTSEngine:
+    """Base class for text-to-speech engines that render text to a WAV file."""
+    name = None
+    tier = None
+
+    def load(self):
+        """Load the engine's model or check its dependencies."""
+
+    def synthesize_to_file(self, text: str, file_path: str) -> bool:
+        """Render text to a WAV file. Returns False if no audio was produced."""
+        raise NotImplementedError
+
+class CoquiEngine(TTSEngine):
+    """Coqui TTS model, loaded on first use."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.tts = None
+
+    def load(self):
+        if self.tts is None:
+            # Import lazily: TTS pulls in torch
+            from TTS.api import TTS
+            logger.info(f"Loading Coqui model {self.model_name}...")
+            self.tts = TTS(self.model_name)
+            logger.info("Coqui model loaded successfully!")
+
+    def synthesize_to_file(self, text: str, file_path: str) -> bool:
+        self.load()
+        self.tts.tts_to_file(text=text, file_path=file_path)
+        return True
+
+class EspeakEngine(TTSEngine):
+    """Minimal fallback engine using the espeak-ng (or espeak) command line tool."""
+
+    def __init__(self, voice: str = 'en', words_per_minute: int = 170):
+        self.voice = voice
+        self.words_per_minute = words_per_minute
+        self.executable = None
+
+    def load(self):
+        if self.executable is None:
+            self.executable = shutil.which('espeak-ng') or shutil.which('espeak')
+            if self.executable is None:
+                raise RuntimeError("Neither espeak-ng nor espeak is installed")
+
+    def synthesize_to_file(self, text: str, file_path: str) -> bool:
+        self.load()
+        subprocess.run(
+            [self.executable, '-v', self.voice, '-s', str(self.words_per_minute), '-w', file_path, text],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        return True
+
+class NullEngine(TTSEngine):
+    """No-op sink that produces no audio."""
+
+    def synthesize_to_file(self, text: str, file_path: str) -> bool:
+        return False
+
+# Registry of available engines: name -> (factory, tier, description)
+_ENGINES = {}
+
+def register_engine(name: str, factory, tier: str, description: str):
+    """Register a TTS engine factory under a name selectable via TTS_ENGINE."""
+    _ENGINES[name] = (factory, tier, description)
+
+def list_engines() -> list:
+    """List registered engines as (name, tier, description) tuples."""
+    return [(name, tier, description) for name, (_, tier, description) in _ENGINES.items()]
+
+def create_engine(name: str = None) -> TTSEngine:
+    """Create a TTS engine by name, defaulting to the TTS_ENGINE setting."""
+    name = name or DEFAULT_TTS_ENGINE
+    if name not in _ENGINES:
+        raise ValueError(f"Unknown TTS engine '{name}'. Available: {', '.join(_ENGINES)}")
+    factory, tier, _ = _ENGINES[name]
+    engine = factory()
+    engine.name = name
+    engine.tier = tier
+    return engine
+
+register_engine(
+    'tacotron2-ddc',
+    lambda: CoquiEngine("tts_models/en/ljspeech/tacotron2-DDC"),
+    'quality',
+    "Coqui Tacotron2-DDC, natural but slow on CPU"
+)
+register_engine(
+    'vits',
+    lambda: CoquiEngine("tts_models/en/ljspeech/vits"),
+    'balanced',
+    "Coqui VITS, end-to-end model with good quality and moderate CPU cost"
+)
+register_engine(
+    'glow-tts',
+    lambda: CoquiEngine("tts_models/en/ljspeech/glow-tts"),
+    'balanced',
+    "Coqui Glow-TTS, parallel decoder"
+)
+register_engine(
+    'fast-pitch',
+    lambda: CoquiEngine("tts_models/en/ljspeech/fast_pitch"),
+    'fast',
+    "Coqui FastPitch, non-autoregressive and fastest of the Coqui models"
+)
+register_engine(
+    'espeak',
+    EspeakEngine,
+    'fast',
+    "espeak-ng formant synthesis, tiny footprint, robotic voice"
+)
+register_engine(
+    'null',
+    NullEngine,
+    'none',
+    "No audio output"
+)
@@ -1,90 +1,160 @@
-from TTS.api import TTS
 import os
+import shutil
 import tempfile
-import pygame
 import logging
+from tts_engines import create_engine
+from tts_pool import TTS_WORKERS, get_synthesis_pool, shutdown_pools
+from utils.text_utils import split_sentences
+from utils.tracing import traced
+from utils.metrics import registry
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+_narrations_spoken = registry.counter('tts_narrations_total', 'Narrations spoken')
+_speak_seconds = registry.histogram('tts_speak_seconds', 'Time to synthesize and play a narration')
+
 class TTSHandler:
-    def __init__(self):
+    def __init__(self, engine_name: str = None, use_pool: bool = None):
         try:
-            logger.info("Initializing TTS with English model...")
-            # Initialize TTS with a simple English model
-            self.tts = TTS("tts_models/en/ljspeech/tacotron2-DDC")
-            logger.info("TTS model loaded successfully!")
-            
-            # Initialize pygame mixer for audio playback
-            logger.info("Initializing pygame mixer...")
-            pygame.mixer.init()
-            logger.info("Pygame mixer initialized successfully!")
-            
+            # Create the configured TTS engine (TTS_ENGINE, default tacotron2-ddc)
+            self.engine = create_engine(engine_name)
+            logger.info(f"Initializing TTS with engine '{self.engine.name}' ({self.engine.tier})...")
+
+            # With a synthesis pool the model lives in the worker processes
+            if use_pool is None:
+                use_pool = TTS_WORKERS > 0
+            self.pool = None
+            if use_pool and self.engine.tier != 'none':
+                self.pool = get_synthesis_pool(self.engine.name)
+            else:
+                self.engine.load()
+            logger.info("TTS engine loaded successfully!")
+
+            # The no-op sink never produces audio, so skip the mixer entirely
+            self.pygame = None
+            if self.engine.tier != 'none':
+                # Initialize pygame mixer for audio playback
+                logger.info("Initializing pygame mixer...")
+                import pygame
+                pygame.mixer.init()
+                self.pygame = pygame
+                logger.info("Pygame mixer initialized successfully!")
+
         except Exception as e:
             logger.error(f"Error initializing TTS Handler: {str(e)}")
             raise
-        
+
+    @traced('tts.speak')
     def speak(self, text):
         """
         Convert text to speech and play it
         """
+        _narrations_spoken.inc()
+        with _speak_seconds.time():
+            self._speak(text)
+
+    def _speak(self, text):
+        if self.pool is not None:
+            self._speak_pooled(text)
+            return
         try:
             logger.info(f"Generating speech for text: {text[:50]}...")
             # Create a temporary file for the audio
             with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
+                temp_path = temp_file.name
+            try:
                 # Generate speech
-                self.tts.tts_to_file(
-                    text=text,
-                    file_path=temp_file.name
-                )
+                if not self.engine.synthesize_to_file(text, temp_path) or self.pygame is None:
+                    return
                 logger.info("Speech generated successfully!")
-                
+
                 # Play the audio
                 logger.info("Loading audio file...")
-                pygame.mixer.music.load(temp_file.name)
+                self.pygame.mixer.music.load(temp_path)
                 logger.info("Playing audio...")
-                pygame.mixer.music.play()
-                
+                self.pygame.mixer.music.play()
+
                 # Wait for the audio to finish playing
-                while pygame.mixer.music.get_busy():
-                    pygame.time.Clock().tick(10)
-                
+                while self.pygame.mixer.music.get_busy():
+                    self.pygame.time.Clock().tick(10)
+
                 logger.info("Audio playback completed!")
-                
+            finally:
                 # Clean up the temporary file
-                os.unlink(temp_file.name)
+                os.unlink(temp_path)
                 logger.info("Temporary file cleaned up!")
-                
+
         except Exception as e:
             logger.error(f"Error in speak method: {str(e)}")
             raise
-    
+
+    def _speak_pooled(self, text):
+        """
+        Synthesize sentences in parallel on the pool and play them in order
+        as soon as each one is ready
+        """
+        temp_dir = tempfile.mkdtemp(prefix="tts_")
+        try:
+            chunks = split_sentences(text)
+            logger.info(f"Submitting {len(chunks)} chunks to the synthesis pool...")
+            file_paths = [os.path.join(temp_dir, f"chunk_{i}.wav") for i in range(len(chunks))]
+            futures = self.pool.map(chunks, file_paths)
+
+            for future, file_path in zip(futures, file_paths):
+                if not future.result() or self.pygame is None:
+                    continue
+                self.pygame.mixer.music.load(file_path)
+                self.pygame.mixer.music.play()
+                while self.pygame.mixer.music.get_busy():
+                    self.pygame.time.Clock().tick(10)
+
+            logger.info("Audio playback completed!")
+        except Exception as e:
+            logger.error(f"Error in speak method: {str(e)}")
+            raise
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
     def stop(self):
         """
         Stop any currently playing audio
         """
+        if self.pygame is None:
+            return
         try:
             logger.info("Stopping audio playback...")
-            pygame.mixer.music.stop()
+            self.pygame.mixer.music.stop()
             logger.info("Audio playback stopped!")
         except Exception as e:
             logger.error(f"Error stopping audio: {str(e)}")
             raise
 
+    def cleanup(self):
+        """
+        Stop playback, release the audio device and stop the synthesis workers
+        """
+        if self.pygame is not None:
+            self.stop()
+            self.pygame.mixer.quit()
+        if self.pool is not None:
+            shutdown_pools()
+            self.pool = None
+
 # Test code that runs when the file is executed directly
 if __name__ == "__main__":
     print("Starting TTS test...")
     try:
         tts = TTSHandler()
         print("TTS Handler initialized successfully!")
-        
+
         test_text = "Hello! This is a test of the text to speech system."
         print(f"\nTesting with text: {test_text}")
         tts.speak(test_text)
-        
+
         print("\nTest completed!")
     except Exception as e:
         print(f"\nError occurred: {str(e)}")
         import traceback
-        traceback.print_exc() 
\ No newline at end of file
+        traceback.print_exc()
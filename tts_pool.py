@@ -0,0 +1,96 @@
+import os
+import atexit
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from tts_engines import create_engine
+from utils.metrics import registry
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Get synthesis pool configuration from environment
+# TTS_WORKERS=0 keeps synthesis in the game process
+TTS_WORKERS = int(os.getenv('TTS_WORKERS', '0'))
+# Torch intra-op threads per worker; 0 leaves torch's default
+TTS_TORCH_THREADS = int(os.getenv('TTS_TORCH_THREADS', '0'))
+# Game sessions sharing this host; each process sizes its default pool from
+# its share of the cores, so parallel sessions don't oversubscribe the CPU
+TTS_SESSIONS = max(1, int(os.getenv('TTS_SESSIONS', '1')))
+
+def get_core_share() -> int:
+    """Get the cores this process may use for synthesis: the host's cores split between TTS_SESSIONS sessions."""
+    return max(1, (os.cpu_count() or 1) // TTS_SESSIONS)
+
+# Engine instance owned by each worker process
+_worker_engine = None
+
+def _init_worker(engine_name: str, torch_threads: int):
+    """Load one engine instance in a freshly started worker process."""
+    global _worker_engine
+    if torch_threads:
+        try:
+            import torch
+            torch.set_num_threads(torch_threads)
+        except ImportError:
+            pass
+    _worker_engine = create_engine(engine_name)
+    _worker_engine.load()
+
+def _synthesize(text: str, file_path: str) -> bool:
+    """Synthesize text to a file in a worker process."""
+    return _worker_engine.synthesize_to_file(text, file_path)
+
+_queue_depth = registry.gauge('tts_queue_depth', 'Text chunks queued or being synthesized')
+
+class SynthesisPool:
+    """Process pool that synthesizes text chunks in parallel, one model per worker."""
+
+    def __init__(self, engine_name: str = None, workers: int = None, torch_threads: int = None):
+        self.engine_name = engine_name
+        self.workers = workers or TTS_WORKERS or max(1, get_core_share() // 2)
+        self.torch_threads = TTS_TORCH_THREADS if torch_threads is None else torch_threads
+        if not self.torch_threads:
+            # Split the cores between workers so they don't oversubscribe the CPU
+            self.torch_threads = max(1, get_core_share() // self.workers)
+        logger.info(f"Starting synthesis pool: {self.workers} workers x {self.torch_threads} torch threads")
+        # Use spawn: torch and audio libraries are not fork-safe
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(engine_name, self.torch_threads)
+        )
+
+    def submit(self, text: str, file_path: str):
+        """Queue a chunk for synthesis. Returns a future resolving to True if audio was written."""
+        _queue_depth.inc()
+        future = self.executor.submit(_synthesize, text, file_path)
+        future.add_done_callback(lambda _: _queue_depth.dec())
+        return future
+
+    def map(self, texts: list, file_paths: list) -> list:
+        """Queue several chunks at once and return their futures in order."""
+        return [self.submit(text, file_path) for text, file_path in zip(texts, file_paths)]
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker processes."""
+        self.executor.shutdown(wait=wait, cancel_futures=not wait)
+
+# Pools shared by every TTSHandler in this process, keyed by engine name
+_shared_pools = {}
+
+def get_synthesis_pool(engine_name: str = None) -> SynthesisPool:
+    """Get the process-wide synthesis pool for an engine, starting it on first use."""
+    if engine_name not in _shared_pools:
+        _shared_pools[engine_name] = SynthesisPool(engine_name)
+    return _shared_pools[engine_name]
+
+def shutdown_pools():
+    """Shut down all shared synthesis pools."""
+    for pool in _shared_pools.values():
+        pool.shutdown()
+    _shared_pools.clear()
+
+# Stop the workers of a game that exits without cleaning up its handler
+atexit.register(shutdown_pools)
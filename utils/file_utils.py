@@ -1,48 +1,161 @@
 import os
 import json
 from datetime import datetime
+from utils.logging_utils import main_logger as logger
+from utils.log_rotation import list_segments, read_segment
 
 def get_story_log_filename(game_path: str) -> str:
-    """Get the story log filename for a given game path."""
-    game_name = os.path.basename(game_path)
+    """Generate a story log filename based on game name and current timestamp."""
+    # Extract game name from path (remove extension and path)
+    game_name = os.path.splitext(os.path.basename(game_path))[0]
+
+    # Create timestamp
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    # Create logs directory if it doesn't exist
+    os.makedirs('logs', exist_ok=True)
+
+    # Return the full path
     return f'logs/{game_name}_{timestamp}_story.log'
 
 def get_json_log_filename(game_path: str) -> str:
-    """Get the JSON log filename for a given game path."""
-    game_name = os.path.basename(game_path)
-    return f'logs/{game_name}_updates.json'
+    """Generate a JSON log filename based on game name and current timestamp."""
+    # Extract game name from path (remove extension and path)
+    game_name = os.path.splitext(os.path.basename(game_path))[0]
+
+    # Create timestamp
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    # Create logs directory if it doesn't exist
+    os.makedirs('logs', exist_ok=True)
+
+    # Return the full path
+    return f'logs/{game_name}_{timestamp}.json'
+
+def read_segments_text(log_file: str) -> str:
+    """Read the segments rotated out of a text log (compressed or not), oldest first."""
+    return ''.join(read_segment(segment) for segment in list_segments(log_file))
+
+def read_log_text(log_file: str) -> str:
+    """Read a text log, including the segments rotated out of it (compressed or not)."""
+    with open(log_file, 'r', encoding='utf-8') as f:
+        return read_segments_text(log_file) + f.read()
+
+def _json_segments_newest_first(json_log_file: str):
+    """Yield the entry lists of a JSON log: the open file first, then its rotated segments, newest first."""
+    with open(json_log_file, 'r', encoding='utf-8') as f:
+        yield json.load(f)
+    for segment in reversed(list_segments(json_log_file)):
+        yield json.loads(read_segment(segment))
+
+def read_json_entries(json_log_file: str) -> list:
+    """Read every entry of a JSON log, including the segments rotated out of it."""
+    entries = []
+    for segment_entries in _json_segments_newest_first(json_log_file):
+        entries[:0] = segment_entries
+    return entries
+
+def _last_n_updates(lines: list, n: int) -> tuple:
+    """Find the last N updates in log lines. Returns (their text, how many were found)."""
+    # Find the last N updates (each update starts with a timestamp)
+    updates = []
+    current_update = []
+    update_count = 0
+
+    # Process lines in reverse to find the last N updates
+    for line in reversed(lines):
+        if line.strip() and line[0] == '[':  # New update starts with timestamp
+            if current_update:
+                updates.append(''.join(reversed(current_update)))
+                current_update = []
+                update_count += 1
+                if update_count >= n:
+                    break
+        current_update.append(line)
+
+    # Add the last update if we haven't reached N yet
+    if current_update and update_count < n:
+        updates.append(''.join(reversed(current_update)))
+        update_count += 1
+
+    # Return the updates in chronological order
+    return ''.join(reversed(updates)), update_count
 
 def get_last_n_updates(log_file: str, n: int = 3) -> str:
-    """Get the last n updates from a log file."""
+    """Get the last N updates from the log file."""
     try:
-        # Create the logs directory if it doesn't exist
-        os.makedirs(os.path.dirname(log_file), exist_ok=True)
-        
-        # Create the file if it doesn't exist
-        if not os.path.exists(log_file):
-            with open(log_file, 'w', encoding='utf-8') as f:
-                pass
-            return ""
-            
-        # Read the file
         with open(log_file, 'r', encoding='utf-8') as f:
             lines = f.readlines()
-            # Get the last n non-empty lines
-            last_lines = [line for line in lines if line.strip()][-n:]
-            return ''.join(last_lines)
-    except (FileNotFoundError, PermissionError, OSError) as e:
-        # Log the error but don't raise it
-        print(f"Warning: Could not read log file {log_file}: {e}")
+        text, count = _last_n_updates(lines, n)
+
+        # The log was just rotated and nothing was written since: look into its
+        # last closed segment. (Story log narrations carry no timestamp, so the
+        # open file counts as one update and any count below n is normal.)
+        segments = list_segments(log_file) if count == 0 else []
+        if segments:
+            lines = read_segment(segments[-1]).splitlines(keepends=True) + lines
+            text, _ = _last_n_updates(lines, n)
+        return text
+    except Exception as e:
+        logger.error(f"Error reading log file: {e}")
         return ""
 
 def get_last_n_json_updates(json_log_file: str, n: int = 3) -> str:
-    """Get the last n updates from a JSON log file."""
+    """Get the last N updates from the JSON log file."""
     try:
-        with open(json_log_file, 'r', encoding='utf-8') as f:
-            entries = json.load(f)
-            # Get the last n entries
-            last_entries = entries[-n:]
-            return json.dumps(last_entries, indent=2)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return "[]" 
\ No newline at end of file
+        # Get the last N updates, from the rotated segments if the open file has fewer
+        last_updates = []
+        for updates in _json_segments_newest_first(json_log_file):
+            last_updates[:0] = updates[-(n - len(last_updates)):]
+            if len(last_updates) >= n:
+                break
+
+        # Format each update
+        formatted_updates = []
+        for update in last_updates:
+            formatted_update = f"[{update['timestamp']}] {update['game_output']}"
+            if 'if_agent_action' in update:
+                formatted_update += f"\n[AGENT] {update['if_agent_action']}"
+            formatted_updates.append(formatted_update)
+
+        return '\n\n'.join(formatted_updates)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        logger.error(f"Error reading JSON log file: {e}")
+        return ""
+
+def get_updates_since_last_story(json_log_file: str) -> str:
+    """Get the updates logged since the last story update, formatted for an agent prompt."""
+    try:
+        # Collect updates back to the last story update, across rotated segments if needed
+        updates_since_last_story = []
+        for updates in _json_segments_newest_first(json_log_file):
+            last_story_index = next((i for i in range(len(updates) - 1, -1, -1)
+                                     if updates[i].get('story_updated', False)), None)
+            if last_story_index is not None:
+                updates_since_last_story[:0] = updates[last_story_index + 1:]
+                break
+            updates_since_last_story[:0] = updates
+
+        # Format the updates for the agent
+        formatted_updates = []
+        for update in updates_since_last_story:
+            formatted_update = f"[{update['timestamp']}] {update['game_output']}"
+            if 'if_agent_action' in update:
+                formatted_update += f"\n[AGENT] {update['if_agent_action']}"
+            formatted_updates.append(formatted_update)
+
+        return '\n\n'.join(formatted_updates)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        logger.error(f"Error reading JSON log file: {e}")
+        return ""
+
+def read_story_narrations(story_log_file: str) -> list:
+    """Read the narrations from a story log, one per blank-line separated paragraph."""
+    text = read_log_text(story_log_file)
+    return [paragraph.strip() for paragraph in text.split('\n\n') if paragraph.strip()]
+
+def read_json_narrations(json_log_file: str) -> list:
+    """Read the narrations recorded in a JSON game log."""
+    updates = read_json_entries(json_log_file)
+    return [update['story_narration'].strip() for update in updates
+            if update.get('story_updated') and update.get('story_narration')]
@@ -0,0 +1,256 @@
+import os
+import glob
+import gzip
+import lzma
+import json
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from utils.logging_utils import main_logger as logger
+from utils.metrics import registry
+
+# Get log rotation configuration from environment
+# Close a log segment once any of the run's logs reaches this size (0 = no size limit)
+LOG_ROTATE_BYTES = int(os.getenv('LOG_ROTATE_BYTES', str(4 * 1024 * 1024)))
+# Close a log segment every N turns (0 = no turn limit)
+LOG_ROTATE_TURNS = int(os.getenv('LOG_ROTATE_TURNS', '0'))
+# Compression of closed segments: gzip, lzma or none
+LOG_COMPRESSION = os.getenv('LOG_COMPRESSION', 'gzip').lower()
+
+MANIFEST_VERSION = 1
+
+# File suffix and opener per compression method
+_COMPRESSED_SUFFIXES = {'gzip': '.gz', 'lzma': '.xz'}
+_OPENERS = {'.gz': gzip.open, '.xz': lzma.open}
+
+# Compresses closed segments off the game loop
+_executor = None
+
+_rotations = registry.counter('log_rotations_total', 'Log segments closed')
+_pending_compressions = registry.gauge('log_compression_queue', 'Closed log segments waiting to be compressed')
+
+def segment_path(path: str, index: int) -> str:
+    """Get the (uncompressed) file name of a log's closed segment, e.g. logs/run.0001.json."""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{index:04d}{ext}"
+
+def _segment_index(path: str, name: str) -> int:
+    """Get the index of a closed segment file of a log."""
+    stem = os.path.splitext(path)[0]
+    return int(name[len(stem) + 1:len(stem) + 5])
+
+def list_segments(path: str) -> list:
+    """Get the closed segments of a log, oldest first.
+
+    A segment still being compressed is listed under its uncompressed name.
+    """
+    stem, ext = os.path.splitext(path)
+    found = {}
+    for name in glob.glob(f"{glob.escape(stem)}.[0-9][0-9][0-9][0-9]{glob.escape(ext)}*"):
+        suffix = name[len(stem) + 5 + len(ext):]
+        if suffix not in ('', *_OPENERS):
+            continue
+        index = _segment_index(path, name)
+        # Prefer the uncompressed file while compression is in progress
+        if index not in found or suffix == '':
+            found[index] = name
+    return [found[index] for index in sorted(found)]
+
+def open_log(path: str):
+    """Open a log file or closed segment for reading text, decompressing if needed."""
+    opener = _OPENERS.get(os.path.splitext(path)[1])
+    if opener is None:
+        return open(path, 'r', encoding='utf-8')
+    return opener(path, 'rt', encoding='utf-8')
+
+def read_segment(path: str) -> str:
+    """Read a closed segment, following it to its compressed file if compression just finished."""
+    try:
+        with open_log(path) as f:
+            return f.read()
+    except FileNotFoundError:
+        for suffix in _OPENERS:
+            if os.path.exists(path + suffix):
+                with open_log(path + suffix) as f:
+                    return f.read()
+        raise
+
+def compress_file(path: str, method: str = None) -> str:
+    """Compress a closed segment and remove the original. Returns the compressed file name."""
+    method = method or LOG_COMPRESSION
+    suffix = _COMPRESSED_SUFFIXES.get(method)
+    if suffix is None:
+        return path
+    target = path + suffix
+    temp_file = target + '.tmp'
+    opener = _OPENERS[suffix]
+    with open(path, 'rb') as source, opener(temp_file, 'wb') as compressed:
+        shutil.copyfileobj(source, compressed, 1024 * 1024)
+    os.replace(temp_file, target)
+    os.remove(path)
+    return target
+
+def _compress_logged(path: str, method: str):
+    try:
+        compress_file(path, method)
+    except OSError as e:
+        logger.error(f"Could not compress log segment {path}: {e}")
+    finally:
+        _pending_compressions.dec()
+
+def compress_in_background(path: str, method: str = None):
+    """Queue a closed segment for compression on the background thread."""
+    global _executor
+    method = method or LOG_COMPRESSION
+    if method not in _COMPRESSED_SUFFIXES:
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='log-compress')
+    _pending_compressions.inc()
+    _executor.submit(_compress_logged, path, method)
+
+def wait_for_compression():
+    """Wait until every queued segment is compressed."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+def rotate_file(path: str, initial: str = '', compression: str = None) -> str:
+    """Close a log's current contents as its next segment and start the log afresh.
+
+    `initial` is the content of the new empty log ('[]' for JSON logs).
+    Returns the segment's file name, compressed in the background.
+    """
+    segments = list_segments(path)
+    index = _segment_index(path, segments[-1]) + 1 if segments else 1
+    closed = segment_path(path, index)
+    os.replace(path, closed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(initial)
+    compress_in_background(closed, compression)
+    _rotations.inc()
+    return closed
+
+def rotate_if_larger(path: str, max_bytes: int = None, initial: str = '') -> bool:
+    """Rotate a log once it reaches max_bytes (default LOG_ROTATE_BYTES). Returns True if it was rotated."""
+    max_bytes = LOG_ROTATE_BYTES if max_bytes is None else max_bytes
+    try:
+        if not max_bytes or os.path.getsize(path) < max_bytes:
+            return False
+    except OSError:
+        return False
+    closed = rotate_file(path, initial)
+    logger.info(f"Rotated {path} to {closed}")
+    return True
+
+class RunLogs:
+    """The log files of one run (JSON log, story log, game transcript), rotated together.
+
+    Segments close at turn boundaries, so segment N of every log covers the
+    same turns. Closed segments are compressed in the background and listed
+    in the run's manifest (<run>_manifest.json) with their turn range.
+    """
+
+    def __init__(self, json_log_file: str, story_log_file: str, transcript_file: str = None,
+                 max_bytes: int = None, max_turns: int = None, compression: str = None):
+        self.json_log_file = json_log_file
+        self.story_log_file = story_log_file
+        self.transcript_file = transcript_file
+        self.max_bytes = LOG_ROTATE_BYTES if max_bytes is None else max_bytes
+        self.max_turns = LOG_ROTATE_TURNS if max_turns is None else max_turns
+        self.compression = compression or LOG_COMPRESSION
+        self.manifest_file = json_log_file[:-len('.json')] + '_manifest.json'
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.manifest = {"version": MANIFEST_VERSION, "run": os.path.basename(json_log_file[:-len('.json')]),
+                             "logs": self.logs(), "segments": []}
+
+    @property
+    def segments(self) -> list:
+        return self.manifest["segments"]
+
+    @property
+    def first_turn(self) -> int:
+        """Get the first turn of the open segment."""
+        return self.segments[-1]["last_turn"] + 1 if self.segments else 1
+
+    def logs(self) -> list:
+        """Get the run's log files."""
+        return [path for path in (self.json_log_file, self.story_log_file, self.transcript_file) if path]
+
+    def closed_entries(self) -> int:
+        """Get the number of JSON log entries in closed segments."""
+        return sum(segment["json_entries"] for segment in self.segments)
+
+    def _write_manifest(self):
+        temp_file = self.manifest_file + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(temp_file, self.manifest_file)
+
+    def should_rotate(self, turn: int) -> bool:
+        """Check whether the open segment is full after `turn`."""
+        if turn < self.first_turn:
+            return False
+        if self.max_turns and turn - self.first_turn + 1 >= self.max_turns:
+            return True
+        return bool(self.max_bytes) and any(
+            os.path.exists(path) and os.path.getsize(path) >= self.max_bytes for path in self.logs())
+
+    def rotate(self, turn: int):
+        """Close the open segment of every log after `turn`."""
+        try:
+            with open(self.json_log_file, 'r', encoding='utf-8') as f:
+                json_entries = len(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            json_entries = 0
+        index = len(self.segments) + 1
+        segment = {"index": index, "first_turn": self.first_turn, "last_turn": turn,
+                   "json_entries": json_entries, "compression": self.compression, "files": {}, "bytes": {}}
+        for path in self.logs():
+            if not os.path.exists(path):
+                continue
+            closed = segment_path(path, index)
+            segment["bytes"][path] = os.path.getsize(path)
+            os.replace(path, closed)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('[]' if path == self.json_log_file else '')
+            compress_in_background(closed, self.compression)
+            segment["files"][path] = closed + _COMPRESSED_SUFFIXES.get(self.compression, '')
+        self.segments.append(segment)
+        self._write_manifest()
+        _rotations.inc(len(segment["files"]))
+        logger.info(f"Closed log segment {index} (turns {segment['first_turn']}-{turn})")
+
+    def maybe_rotate(self, turn: int) -> bool:
+        """Rotate the logs if the open segment is full after `turn`. Returns True if they were rotated."""
+        if not self.should_rotate(turn):
+            return False
+        self.rotate(turn)
+        return True
+
+    def rollback(self, segment_count: int):
+        """Reopen the logs as they were when `segment_count` segments were closed.
+
+        The first segment closed after that point becomes the open segment
+        again (its content was the open segment back then); later segments
+        are deleted. Used when resuming from a checkpoint.
+        """
+        if len(self.segments) <= segment_count:
+            return
+        wait_for_compression()
+        for segment in self.segments[segment_count:]:
+            for path in segment["files"]:
+                closed = segment_path(path, segment["index"])
+                existing = [name for name in (closed, *(closed + suffix for suffix in _OPENERS))
+                            if os.path.exists(name)]
+                if segment["index"] == segment_count + 1 and existing:
+                    with open(path, 'w', encoding='utf-8') as f:
+                        f.write(read_segment(existing[0]))
+                for name in existing:
+                    os.remove(name)
+        del self.segments[segment_count:]
+        self._write_manifest()
+        logger.info(f"Rolled the logs back to {segment_count} closed segments")
@@ -2,6 +2,8 @@ import logging
 import os
 from datetime import datetime
 import json
+from utils.tracing import traced
+from utils.metrics import registry
 
 # Create logs directory if it doesn't exist
 os.makedirs('logs', exist_ok=True)
@@ -27,6 +29,10 @@ def get_logger(name: str) -> logging.Logger:
     logger.propagate = False
     return logger
 
+# Bytes written per log, rewrites included (shared with game.game_logger)
+_log_bytes = registry.counter('log_bytes_written_total', 'Bytes written to the game logs', ('log',))
+
+@traced('log.agent_interaction')
 def log_agent_interaction(agent_name: str, system_message: str, prompt: str, response: str):
     """Log agent interactions to a JSON file."""
     timestamp = datetime.now().strftime('%H:%M:%S.%f')[:-3]
@@ -41,6 +47,11 @@ def log_agent_interaction(agent_name: str, system_message: str, prompt: str, res
     
     # Get the log file path
     log_file = f'logs/{agent_name}_interactions.json'
+
+    # Close the file as a compressed segment once it is too large to rewrite on every call
+    # (imported here: utils.log_rotation logs through this module)
+    from utils.log_rotation import rotate_if_larger
+    rotate_if_larger(log_file, initial='[]')
     
     # Read existing entries or create new list
     try:
@@ -54,4 +65,5 @@ def log_agent_interaction(agent_name: str, system_message: str, prompt: str, res
     
     # Write back to file
     with open(log_file, 'w', encoding='utf-8') as f:
-        json.dump(entries, f, indent=2) 
\ No newline at end of file
+        json.dump(entries, f, indent=2)
+        _log_bytes.inc(f.tell(), log='agent_interactions') 
\ No newline at end of file
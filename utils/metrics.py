@@ -0,0 +1,287 @@
+import os
+import math
+import time
+import threading
+from contextlib import contextmanager
+
+# Get metrics configuration from environment
+# Port of the Prometheus text endpoint on METRICS_HOST (0 = no endpoint)
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+# File the metrics are written to every METRICS_INTERVAL seconds ('{session}' is
+# replaced by the session label), e.g. for node_exporter's textfile collector
+METRICS_FILE = os.getenv('METRICS_FILE', '')
+METRICS_INTERVAL = float(os.getenv('METRICS_INTERVAL', '15'))
+# Label telling parallel sessions apart (default: the run's log name)
+METRICS_SESSION = os.getenv('METRICS_SESSION', '')
+
+# Histogram buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    """A named metric with one value per combination of label values."""
+    type = 'untyped'
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, '')) for name in self.labels)
+
+    def samples(self) -> list:
+        """Get the metric's samples as (suffix, labels, value)."""
+        with self._lock:
+            return [('', dict(zip(self.labels, key)), value) for key, value in self._values.items()]
+
+class Counter(_Metric):
+    """A value that only goes up."""
+    type = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def total(self, **labels) -> float:
+        """Sum the values of every label combination matching the labels given."""
+        wanted = {self.labels.index(name): str(value) for name, value in labels.items()}
+        with self._lock:
+            return sum(value for key, value in self._values.items()
+                       if all(key[i] == value_ for i, value_ in wanted.items()))
+
+class Gauge(_Metric):
+    """A value that goes up and down, or is read from a function when scraped."""
+    type = 'gauge'
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        super().__init__(name, help_text, labels)
+        self._function = None
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        """Read the (unlabelled) value from function() at each scrape."""
+        self._function = function
+
+    def value(self, **labels) -> float:
+        if self._function is not None:
+            return self._function()
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> list:
+        if self._function is not None:
+            try:
+                return [('', {}, self._function())]
+            except Exception:
+                return []
+        return super().samples()
+
+class Histogram(_Metric):
+    """Counts observations into cumulative buckets, with their sum and count."""
+    type = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the enclosed block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        counts, _ = self._values.get(self._key(labels), ([0], 0.0))
+        return sum(counts)
+
+    def samples(self) -> list:
+        samples = []
+        with self._lock:
+            for key, (counts, total) in self._values.items():
+                labels = dict(zip(self.labels, key))
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    samples.append(('_bucket', dict(labels, le=_format_value(bound)), cumulative))
+                samples.append(('_sum', labels, total))
+                samples.append(('_count', labels, cumulative))
+        return samples
+
+class MetricsRegistry:
+    """Process-wide metrics, rendered in the Prometheus text exposition format.
+
+    Metrics are created on first use by the module that feeds them; asking
+    again for the same name returns the same metric.
+    """
+
+    def __init__(self):
+        self.const_labels = {}
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, help_text: str, labels: tuple, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labels, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str, labels: tuple = ()) -> Counter:
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str, labels: tuple = ()) -> Gauge:
+        return self._get(Gauge, name, help_text, labels)
+
+    def histogram(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def render(self) -> str:
+        """Get every metric in the Prometheus text format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            samples = metric.samples()
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, labels, value in samples:
+                labels = dict(self.const_labels, **labels)
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def write_file(self, path: str):
+        """Write the metrics to a file atomically, so a collector never reads half a file."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_file = path + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(temp_file, path)
+
+# Registry shared by the whole process
+registry = MetricsRegistry()
+
+def _resident_memory_bytes() -> float:
+    """Get this process's resident memory (current on Linux, peak elsewhere)."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS, kilobytes on Linux
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+registry.gauge('process_resident_memory_bytes', 'Resident memory of the game process').set_function(
+    _resident_memory_bytes)
+_start_time = time.time()
+registry.gauge('process_start_time_seconds', 'Start time of the game process (Unix time)').set_function(
+    lambda: _start_time)
+
+def serve_metrics(port: int = None, host: str = None):
+    """Serve /metrics on host:port from a background thread. Returns the server (server_port is the bound port)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    port = METRICS_PORT if port is None else port
+    host = host or METRICS_HOST
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/metrics', '/'):
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+class MetricsFileWriter:
+    """Writes the metrics to a file every `interval` seconds from a background thread."""
+
+    def __init__(self, path: str, interval: float = None):
+        self.path = path
+        self.interval = METRICS_INTERVAL if interval is None else interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='metrics-file', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            registry.write_file(self.path)
+
+    def close(self):
+        """Stop the writer after a final write."""
+        self._stop.set()
+        self._thread.join()
+        registry.write_file(self.path)
+
+def start_metrics(session: str, port: int = None, metrics_file: str = None) -> tuple:
+    """Label the metrics with the session and start the endpoint and file writer that are configured.
+
+    Returns (HTTP server or None, file writer or None).
+    """
+    registry.const_labels['session'] = METRICS_SESSION or session
+    port = METRICS_PORT if port is None else port
+    metrics_file = METRICS_FILE if metrics_file is None else metrics_file
+    server = serve_metrics(port) if port else None
+    writer = None
+    if metrics_file:
+        writer = MetricsFileWriter(metrics_file.replace('{session}', registry.const_labels['session']))
+    return server, writer
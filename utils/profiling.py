@@ -0,0 +1,201 @@
+import os
+import io
+import sys
+import time
+from utils.logging_utils import main_logger as logger
+
+# Get profiling configuration from environment: 'cpu', 'memory', 'cpu,memory'
+# or 'true' for both (empty = off)
+PROFILE = os.getenv('PROFILE', '')
+# Turns per report window
+PROFILE_EVERY = int(os.getenv('PROFILE_EVERY', '50'))
+# Functions and allocation sites listed per report
+PROFILE_TOP = int(os.getenv('PROFILE_TOP', '25'))
+# Stack frames kept per allocation (more frames cost more memory and time)
+PROFILE_FRAMES = int(os.getenv('PROFILE_FRAMES', '1'))
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_STDLIB_ROOT = os.path.dirname(os.__file__)
+
+def parse_profile_modes(value: str) -> set:
+    """Get the profilers selected by a PROFILE value."""
+    modes = {mode.strip().lower() for mode in value.split(',') if mode.strip()}
+    if modes & {'true', '1', 'all'}:
+        return {'cpu', 'memory'}
+    return modes & {'cpu', 'memory'}
+
+def code_area(filename: str) -> str:
+    """Name the part of the code a file belongs to: a project module, a third-party package or the stdlib."""
+    if filename.startswith('<') or filename == '~':
+        return 'builtins'
+    path = os.path.abspath(filename)
+    if '-packages' + os.sep in path:
+        package = path.split('-packages' + os.sep, 1)[1].split(os.sep)
+        # Namespace packages (google.adk, google.genai) are told apart by their second level
+        return '.'.join(package[:2]) if package[0] == 'google' and len(package) > 1 else package[0].split('.')[0]
+    if path.startswith(_PROJECT_ROOT + os.sep):
+        return os.path.relpath(path, _PROJECT_ROOT)
+    if path.startswith(_STDLIB_ROOT + os.sep):
+        return 'stdlib:' + os.path.relpath(path, _STDLIB_ROOT).split(os.sep)[0].replace('.py', '')
+    return path
+
+def builtin_area(function: str) -> str:
+    """Name the module or type of a C function as cProfile reports it, e.g. "<built-in method _json.encode>"."""
+    if function.startswith('<built-in method ') and '.' in function:
+        return 'builtins:' + function[len('<built-in method '):].split('.')[0]
+    if function.startswith('<method ') and " of '" in function:
+        return 'builtins:' + function.split(" of '")[1].split("'")[0]
+    return 'builtins'
+
+def time_by_area(stats: 'pstats.Stats') -> list:
+    """Sum the time spent in each code area's own functions. Returns [(area, seconds, calls)], slowest first."""
+    areas = {}
+    for (filename, _, function), (_, calls, own_time, _, _) in stats.stats.items():
+        area = builtin_area(function) if filename == '~' else code_area(filename)
+        seconds, count = areas.get(area, (0.0, 0))
+        areas[area] = (seconds + own_time, count + calls)
+    return sorted(((area, seconds, calls) for area, (seconds, calls) in areas.items()),
+                  key=lambda item: item[1], reverse=True)
+
+class TurnProfiler:
+    """Profiles the game loop in windows of turns.
+
+    CPU time is recorded with cProfile (the main thread, where the game loop
+    and the agents' event loops run) and allocations with tracemalloc. Each
+    window writes a text report (time per code area, slowest functions, top
+    allocation growth since the previous window) and a .prof file for
+    pstats or snakeviz into report_dir. The profilers are imported when
+    profiling starts, so runs without profiling do not load them.
+    """
+
+    def __init__(self, report_dir: str, every: int = None, cpu: bool = True, memory: bool = True,
+                 top: int = None):
+        self.report_dir = report_dir
+        self.every = PROFILE_EVERY if every is None else max(1, every)
+        self.cpu = cpu
+        self.memory = memory
+        self.top = PROFILE_TOP if top is None else top
+        self.reports = []
+        self._profile = None
+        self._snapshot = None
+        self._window_start = None
+        self._first_turn = 1
+        self._last_turn = 0
+        self._started_tracemalloc = False
+
+    def start(self, turn: int = 0):
+        """Start profiling; the first window begins after `turn`."""
+        import cProfile
+        import tracemalloc
+        os.makedirs(self.report_dir, exist_ok=True)
+        self._first_turn = turn + 1
+        self._last_turn = turn
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(PROFILE_FRAMES)
+                self._started_tracemalloc = True
+            self._snapshot = self._take_snapshot()
+        self._window_start = time.perf_counter()
+        if self.cpu:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        logger.info(f"Profiling ({'cpu' if self.cpu else ''}{',' if self.cpu and self.memory else ''}"
+                    f"{'memory' if self.memory else ''}) every {self.every} turns into {self.report_dir}")
+        return self
+
+    def _take_snapshot(self) -> 'tracemalloc.Snapshot':
+        import pstats
+        import cProfile
+        import tracemalloc
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            # The profiler's own bookkeeping
+            tracemalloc.Filter(False, cProfile.__file__),
+            tracemalloc.Filter(False, pstats.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        ))
+
+    def on_turn(self, turn: int):
+        """Call after each turn; writes a report when a window is complete."""
+        self._last_turn = turn
+        if turn - self._first_turn + 1 >= self.every:
+            self._report(turn)
+
+    def stop(self):
+        """Write the report of the last (partial) window and stop profiling."""
+        if self._profile is not None:
+            self._profile.disable()
+        if self._last_turn >= self._first_turn:
+            self._report(self._last_turn, restart=False)
+        self._profile = None
+        if self._started_tracemalloc:
+            import tracemalloc
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _report(self, turn: int, restart: bool = True) -> str:
+        """Write the report of the window ending at `turn` and start the next window."""
+        import pstats
+        import cProfile
+        import tracemalloc
+        elapsed = time.perf_counter() - self._window_start
+        turns = turn - self._first_turn + 1
+        name = f"turns_{self._first_turn:05d}-{turn:05d}"
+        lines = [f"Turns {self._first_turn}-{turn}: {elapsed:.2f}s wall, {elapsed / turns * 1000:.1f} ms/turn"]
+
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(os.path.join(self.report_dir, name + '.prof'))
+            stream = io.StringIO()
+            stats = pstats.Stats(self._profile, stream=stream)
+            lines.append(f"\nCPU time by code area (own time, ms/turn):")
+            for area, seconds, calls in time_by_area(stats)[:self.top]:
+                lines.append(f"  {seconds / turns * 1000:10.2f}  {calls / turns:10.1f} calls/turn  {area}")
+            stats.sort_stats('cumulative').print_stats(self.top)
+            lines.append("\nSlowest functions (cumulative):")
+            # Drop pstats' own header lines up to the column titles
+            text = stream.getvalue()
+            lines.append(text[text.find('   ncalls'):].rstrip() if '   ncalls' in text else text.rstrip())
+
+        if self._snapshot is not None:
+            snapshot = self._take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            lines.append(f"\nTraced memory: {current / 1024 / 1024:.1f} MiB now, {peak / 1024 / 1024:.1f} MiB peak")
+            lines.append("Top allocation growth since the previous window:")
+            for stat in snapshot.compare_to(self._snapshot, 'lineno')[:self.top]:
+                if stat.size_diff <= 0:
+                    break
+                frame = stat.traceback[0]
+                lines.append(f"  {stat.size_diff / 1024:+10.1f} KiB  {stat.count_diff:+8d} blocks  "
+                             f"{code_area(frame.filename)}:{frame.lineno}")
+            self._snapshot = snapshot
+            tracemalloc.reset_peak()
+
+        report_file = os.path.join(self.report_dir, name + '.txt')
+        with open(report_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        self.reports.append(report_file)
+        logger.info(f"Profile of turns {self._first_turn}-{turn} written to {report_file}")
+
+        self._first_turn = turn + 1
+        if restart:
+            self._window_start = time.perf_counter()
+            if self.cpu:
+                self._profile = cProfile.Profile()
+                self._profile.enable()
+        return report_file
+
+def get_profile_dir(json_log_file: str) -> str:
+    """Get the directory of a run's profile reports, next to its JSON log."""
+    return json_log_file[:-len('.json')] + '_profile'
+
+def create_profiler(report_dir: str, modes: str = None) -> TurnProfiler:
+    """Create a profiler for the modes given (default PROFILE), or return None if profiling is off."""
+    selected = parse_profile_modes(PROFILE if modes is None else modes)
+    if not selected:
+        return None
+    if 'cpu' in selected and sys.getprofile() is not None:
+        logger.warning("Another profiler is active; CPU profiling is disabled")
+        selected.discard('cpu')
+    return TurnProfiler(report_dir, cpu='cpu' in selected, memory='memory' in selected) if selected else None
@@ -0,0 +1,163 @@
+import os
+import re
+import zlib
+from collections import deque
+from utils.text_utils import clean_log_text
+from utils.file_utils import read_segments_text
+
+# Size of the hashed feature space (word unigrams and bigrams)
+HASH_DIMS = 1 << 16
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+_STOP_WORDS = frozenset(
+    "a an the and or of to in on at is are was it you your i me my this that with for as be "
+    "there here can see".split()
+)
+
+def hashed_features(text: str, dims: int = HASH_DIMS) -> dict:
+    """Count the hashed word unigrams and bigrams of a text. Returns {feature index: count}."""
+    words = [word for word in _TOKEN_PATTERN.findall(text.lower()) if word not in _STOP_WORDS]
+    grams = words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+    counts = {}
+    for gram in grams:
+        index = zlib.crc32(gram.encode('utf-8')) % dims
+        counts[index] = counts.get(index, 0) + 1
+    return counts
+
+class TurnIndex:
+    """TF-IDF index over hashed n-gram vectors of past turns.
+
+    Turns are stored sparsely as L2-normalised sublinear term frequencies
+    (parallel arrays of turn, feature and weight). A query weights its terms
+    by IDF squared, so a search is one pass over the stored non-zeros.
+    """
+
+    def __init__(self, dims: int = HASH_DIMS):
+        # Imported on first use so startup does not pay for numpy
+        import numpy as np
+        self.dims = dims
+        self.texts = []
+        self._size = 0
+        self._turns = np.zeros(1024, dtype=np.int32)
+        self._features = np.zeros(1024, dtype=np.int32)
+        self._weights = np.zeros(1024, dtype=np.float32)
+        self._doc_freq = np.zeros(dims, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def _reserve(self, count: int):
+        """Grow the arrays geometrically so adding stays amortised O(1)."""
+        capacity = len(self._weights)
+        if self._size + count <= capacity:
+            return
+        import numpy as np
+        while self._size + count > capacity:
+            capacity *= 2
+        for name in ('_turns', '_features', '_weights'):
+            array = getattr(self, name)
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            setattr(self, name, grown)
+
+    def add(self, text: str) -> int:
+        """Index a turn's text. Returns its position."""
+        position = len(self.texts)
+        counts = hashed_features(text, self.dims)
+        if counts:
+            import numpy as np
+            features = np.fromiter(counts, dtype=np.int32)
+            weights = 1 + np.log(np.fromiter(counts.values(), dtype=np.float32))
+            self._reserve(len(features))
+            end = self._size + len(features)
+            self._turns[self._size:end] = position
+            self._features[self._size:end] = features
+            self._weights[self._size:end] = weights / np.linalg.norm(weights)
+            self._size = end
+            self._doc_freq[features] += 1
+        self.texts.append(text)
+        return position
+
+    def search(self, query: str, k: int = 5, limit: int = None) -> list:
+        """Get the k turns most similar to the query as (position, score), best first.
+
+        Only the first `limit` turns are searched (default: all).
+        """
+        limit = len(self.texts) if limit is None else min(limit, len(self.texts))
+        counts = hashed_features(query, self.dims)
+        if not counts or limit <= 0 or k <= 0:
+            return []
+        import numpy as np
+        features = np.fromiter(counts, dtype=np.int64)
+        idf = np.log((1 + len(self.texts)) / (1 + self._doc_freq[features])) + 1
+        query_weights = np.zeros(self.dims, dtype=np.float32)
+        query_weights[features] = (1 + np.log(np.fromiter(counts.values(), dtype=np.float32))) * idf * idf
+
+        # Turns are added in order, so the first `limit` turns are a prefix of the arrays
+        end = int(np.searchsorted(self._turns[:self._size], limit))
+        contributions = self._weights[:end] * query_weights[self._features[:end]]
+        scores = np.bincount(self._turns[:end], weights=contributions, minlength=limit)
+        k = min(k, limit)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [(int(position), float(scores[position])) for position in best if scores[position] > 0]
+
+class GameHistory:
+    """Turns of a game log, read incrementally and indexed for retrieval.
+
+    A turn is the game output up to and including the agent's command. Each
+    call to update() only reads what was appended to the log since the last call;
+    the first also reads the segments rotated out of it before (e.g. on a resume).
+    The log is kept open, so a rotated log is read to its end before the new one.
+    """
+
+    def __init__(self, log_file: str, recent_turns: int = 10):
+        self.log_file = log_file
+        self.index = TurnIndex()
+        self.recent = deque(maxlen=max(1, recent_turns))
+        self._file = None
+        self._partial = ''
+        self._current = []
+
+    def update(self):
+        """Read new log lines and index the turns they complete."""
+        text = ''
+        if self._file is None:
+            self._file = open(self.log_file, 'r', encoding='utf-8')
+            text = read_segments_text(self.log_file)
+        text += self._file.read()
+        # Follow the log to its new file once it was rotated
+        try:
+            rotated = os.stat(self.log_file).st_ino != os.fstat(self._file.fileno()).st_ino
+        except FileNotFoundError:
+            rotated = False
+        if rotated:
+            text += self._file.read()
+            self._file.close()
+            self._file = open(self.log_file, 'r', encoding='utf-8')
+            text += self._file.read()
+        lines = (self._partial + text).split('\n')
+        self._partial = lines.pop()
+        for line in lines:
+            if not line.strip():
+                continue
+            self._current.append(line)
+            if '] [AGENT] ' in line:
+                turn = clean_log_text('\n'.join(self._current))
+                self.index.add(turn)
+                self.recent.append(turn)
+                self._current = []
+
+    @property
+    def current_screen(self) -> str:
+        """Get the game output received since the agent's last command."""
+        return clean_log_text('\n'.join(self._current))
+
+    def relevant_turns(self, k: int) -> list:
+        """Get the k earlier turns most relevant to the current screen, in game order.
+
+        Turns still in the recent window are left out: the prompt already has them.
+        """
+        earlier = len(self.index) - len(self.recent)
+        hits = self.index.search(self.current_screen, k, limit=earlier)
+        return [self.index.texts[position] for position, _ in sorted(hits)]
@@ -0,0 +1,335 @@
+"""
+SQLite store of game runs for cross-run analytics.
+
+When RUN_STORE names a database file, each run records its metadata,
+turns (room, score, moves, command), agent calls (latency, prompt and
+response sizes) and narrations there. Existing JSON logs can be imported,
+and a few canned queries cover the usual questions.
+
+Usage:
+    python -m utils.run_store import logs/*.json [--db logs/runs.sqlite]
+    python -m utils.run_store calls-per-turn | latency | loops | efficiency [--db logs/runs.sqlite]
+"""
+import os
+import re
+import json
+import glob
+import argparse
+from datetime import datetime
+from utils.logging_utils import main_logger as logger
+from utils.tracing import percentile
+from utils.file_utils import read_json_entries, read_log_text
+
+# Get run store configuration from environment: database file, or empty to disable
+RUN_STORE = os.getenv('RUN_STORE', '')
+
+DEFAULT_DB = os.path.join('logs', 'runs.sqlite')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    game TEXT,
+    started_at TEXT,
+    ended_at TEXT,
+    turns INTEGER NOT NULL DEFAULT 0,
+    final_score INTEGER,
+    final_moves INTEGER,
+    config TEXT
+);
+CREATE TABLE IF NOT EXISTS turns (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    turn INTEGER NOT NULL,
+    timestamp TEXT,
+    room TEXT,
+    score INTEGER,
+    moves INTEGER,
+    prompt TEXT,
+    command TEXT,
+    story_updated INTEGER NOT NULL DEFAULT 0,
+    output_bytes INTEGER,
+    game_output TEXT,
+    PRIMARY KEY (run_id, turn)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS agent_calls (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    turn INTEGER,
+    agent TEXT NOT NULL,
+    status TEXT NOT NULL,
+    latency_ms REAL,
+    prompt_bytes INTEGER,
+    response_bytes INTEGER
+);
+CREATE TABLE IF NOT EXISTS narrations (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    turn INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (run_id, turn)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS efficiency (
+    run_id INTEGER PRIMARY KEY REFERENCES runs(id) ON DELETE CASCADE,
+    score_gained INTEGER NOT NULL DEFAULT 0,
+    game_over INTEGER NOT NULL DEFAULT 0,
+    llm_calls INTEGER NOT NULL DEFAULT 0,
+    estimated_tokens INTEGER NOT NULL DEFAULT 0,
+    wall_seconds REAL NOT NULL DEFAULT 0,
+    fallback_turns INTEGER NOT NULL DEFAULT 0,
+    loop_turns INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS runs_game ON runs(game, started_at);
+CREATE INDEX IF NOT EXISTS turns_loops ON turns(run_id, room, command);
+CREATE INDEX IF NOT EXISTS turns_command ON turns(command);
+CREATE INDEX IF NOT EXISTS agent_calls_run ON agent_calls(run_id, turn);
+CREATE INDEX IF NOT EXISTS agent_calls_latency ON agent_calls(agent, latency_ms);
+"""
+
+# JSON files in logs/ that are not game logs
+_NON_GAME_LOG = re.compile(r'(_interactions|_trace|_checkpoint|_manifest|_efficiency|\.\d{4})\.json$')
+
+class RunStore:
+    """Writes runs to a SQLite database and answers the canned queries."""
+
+    def __init__(self, path: str = DEFAULT_DB):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Imported here so that runs without a store do not load sqlite3
+        import sqlite3
+        self.db = sqlite3.connect(path)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('PRAGMA foreign_keys=ON')
+        self.db.executescript(SCHEMA)
+        self.run_id = None
+        self.turn = None
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def start_run(self, name: str, game: str = None, config: dict = None, started_at: str = None) -> int:
+        """Record a new run (replacing an earlier one of the same name) and make it the current run."""
+        with self.db:
+            self.db.execute('DELETE FROM runs WHERE name = ?', (name,))
+            cursor = self.db.execute(
+                'INSERT INTO runs (name, game, started_at, config) VALUES (?, ?, ?, ?)',
+                (name, game, started_at or datetime.now().isoformat(timespec='seconds'),
+                 json.dumps(config, sort_keys=True) if config else None))
+        self.run_id = cursor.lastrowid
+        self.turn = None
+        return self.run_id
+
+    def resume_run(self, name: str, turn: int) -> int:
+        """Continue a recorded run from a checkpoint turn, dropping what was recorded after it."""
+        row = self.db.execute('SELECT id FROM runs WHERE name = ?', (name,)).fetchone()
+        if row is None:
+            return self.start_run(name)
+        with self.db:
+            for table in ('turns', 'agent_calls', 'narrations'):
+                self.db.execute(f'DELETE FROM {table} WHERE run_id = ? AND turn > ?', (row[0], turn))
+        self.run_id = row[0]
+        self.turn = turn
+        return self.run_id
+
+    def begin_turn(self, turn: int):
+        """Attribute the agent calls that follow to a turn of the current run."""
+        self.turn = turn
+
+    def record_turn(self, turn: int, entry: dict, command: str = None, narration: str = None):
+        """Record a finished turn of the current run from its JSON log entry."""
+        if self.run_id is None:
+            return
+        game_output = entry.get('game_output') or ''
+        timestamp = entry.get('timestamp') or datetime.now().strftime('%H:%M:%S.%f')[:-3]
+        self.db.execute(
+            'INSERT OR REPLACE INTO turns VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (self.run_id, turn, timestamp, entry.get('room'), entry.get('score'), entry.get('moves'),
+             entry.get('prompt'), command, int(bool(narration)), len(game_output.encode('utf-8')), game_output))
+        if narration:
+            self.db.execute('INSERT OR REPLACE INTO narrations VALUES (?, ?, ?)', (self.run_id, turn, narration))
+        # One transaction per turn keeps the sink cheap next to the agent calls
+        self.db.commit()
+
+    def record_agent_call(self, agent: str, status: str, latency_ms: float, prompt_bytes: int,
+                          response_bytes: int = None):
+        """Record an agent call of the current turn (committed with the turn)."""
+        if self.run_id is None:
+            return
+        self.db.execute(
+            'INSERT INTO agent_calls (run_id, turn, agent, status, latency_ms, prompt_bytes, response_bytes) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (self.run_id, self.turn, agent, status, latency_ms, prompt_bytes, response_bytes))
+
+    def end_run(self, turns: int = None):
+        """Record the current run's turn count and final score and moves."""
+        if self.run_id is None:
+            return
+        with self.db:
+            last = self.db.execute(
+                'SELECT MAX(turn), (SELECT score FROM turns WHERE run_id = ?1 AND score IS NOT NULL '
+                'ORDER BY turn DESC LIMIT 1), (SELECT moves FROM turns WHERE run_id = ?1 AND moves IS NOT NULL '
+                'ORDER BY turn DESC LIMIT 1) FROM turns WHERE run_id = ?1', (self.run_id,)).fetchone()
+            self.db.execute(
+                'UPDATE runs SET ended_at = ?, turns = ?, final_score = ?, final_moves = ? WHERE id = ?',
+                (datetime.now().isoformat(timespec='seconds'), turns if turns is not None else (last[0] or 0),
+                 last[1], last[2], self.run_id))
+
+    def record_efficiency(self, report: dict):
+        """Record the current run's efficiency report (see game.efficiency)."""
+        if self.run_id is None:
+            return
+        with self.db:
+            self.db.execute(
+                'INSERT OR REPLACE INTO efficiency VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (self.run_id, report['score_gained'], int(report['game_over']), report['llm_calls'],
+                 report['estimated_tokens'], report['wall_seconds'], report['fallback_turns'], report['loop_turns']))
+
+    def import_json_log(self, json_log_file: str) -> int:
+        """Import a run from its JSON game log (and the commands from its transcript). Returns its run id."""
+        name = os.path.splitext(os.path.basename(json_log_file))[0]
+        entries = read_json_entries(json_log_file)
+        # The transcript next to the JSON log holds the commands, one [AGENT] line per turn
+        transcript = json_log_file[:-len('.json')] + '.log'
+        commands = []
+        if os.path.exists(transcript):
+            commands = re.findall(r'^\[[\d:.]+\] \[AGENT\] (.*)$', read_log_text(transcript), re.MULTILINE)
+        started_at = None
+        match = re.search(r'_(\d{8})_(\d{6})$', name)
+        if match:
+            started_at = datetime.strptime(''.join(match.groups()), '%Y%m%d%H%M%S').isoformat()
+        game = name[:match.start()] if match else name
+
+        self.start_run(name, game, started_at=started_at)
+        with self.db:
+            self.db.executemany(
+                'INSERT OR REPLACE INTO turns VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(self.run_id, turn, entry.get('timestamp'), entry.get('room'), entry.get('score'),
+                  entry.get('moves'), entry.get('prompt'), commands[turn - 1] if turn <= len(commands) else None,
+                  int(bool(entry.get('story_updated'))), len((entry.get('game_output') or '').encode('utf-8')),
+                  entry.get('game_output'))
+                 for turn, entry in enumerate(entries, 1)])
+            self.db.executemany(
+                'INSERT OR REPLACE INTO narrations VALUES (?, ?, ?)',
+                [(self.run_id, turn, entry['story_narration']) for turn, entry in enumerate(entries, 1)
+                 if entry.get('story_updated') and entry.get('story_narration')])
+        self.end_run(len(entries))
+        return self.run_id
+
+    def calls_per_turn(self) -> list:
+        """Get agent calls per turn for each run, as (run, turns, calls, calls per turn)."""
+        return self.db.execute(
+            'SELECT runs.name, runs.turns, COUNT(agent_calls.id), '
+            'ROUND(1.0 * COUNT(agent_calls.id) / MAX(runs.turns, 1), 2) '
+            'FROM runs LEFT JOIN agent_calls ON agent_calls.run_id = runs.id '
+            'GROUP BY runs.id ORDER BY runs.started_at').fetchall()
+
+    def latency_percentiles(self, agent: str = None) -> dict:
+        """Get the number of calls and p50/p95/p99 latency in ms per agent (successful calls)."""
+        query = 'SELECT agent, latency_ms FROM agent_calls WHERE status = ?'
+        params = ['ok']
+        if agent:
+            query += ' AND agent = ?'
+            params.append(agent)
+        latencies = {}
+        # The (agent, latency_ms) index returns the rows already sorted
+        for name, latency in self.db.execute(query + ' ORDER BY agent, latency_ms', params):
+            latencies.setdefault(name, []).append(latency)
+        return {name: {"calls": len(values), "p50": percentile(values, 50), "p95": percentile(values, 95),
+                       "p99": percentile(values, 99)}
+                for name, values in latencies.items()}
+
+    def stuck_loops(self, min_repeats: int = 3, limit: int = 20) -> list:
+        """Get commands repeated in the same room, as (run, room, command, repeats, first turn, last turn)."""
+        return self.db.execute(
+            'SELECT runs.name, turns.room, turns.command, COUNT(*) AS repeats, MIN(turns.turn), MAX(turns.turn) '
+            'FROM turns JOIN runs ON runs.id = turns.run_id '
+            'WHERE turns.command IS NOT NULL AND turns.room IS NOT NULL '
+            'GROUP BY turns.run_id, turns.room, turns.command HAVING repeats >= ? '
+            'ORDER BY repeats DESC LIMIT ?', (min_repeats, limit)).fetchall()
+
+    def efficiency_by_config(self) -> list:
+        """Get score per agent call, per 1k tokens and per second, and the share of wasted turns, per run config.
+
+        Returns (config, runs, turns, score gained, score/call, score/1k tokens, score/s, wasted turn ratio),
+        most score per call first.
+        """
+        rows = self.db.execute(
+            'SELECT runs.config, COUNT(*), SUM(runs.turns), SUM(e.score_gained), SUM(e.llm_calls), '
+            'SUM(e.estimated_tokens), SUM(e.wall_seconds), SUM(e.fallback_turns + e.loop_turns) '
+            'FROM efficiency e JOIN runs ON runs.id = e.run_id GROUP BY runs.config').fetchall()
+        results = []
+        for config, runs, turns, gained, calls, tokens, seconds, wasted in rows:
+            results.append((config or '{}', runs, turns, gained,
+                            gained / calls if calls else None,
+                            gained / tokens * 1000 if tokens else None,
+                            gained / seconds if seconds else None,
+                            wasted / turns if turns else None))
+        return sorted(results, key=lambda row: row[4] or 0, reverse=True)
+
+# Store the running game writes to, if enabled
+_store = None
+
+def open_run_store(path: str = None) -> RunStore:
+    """Open the run store (default: RUN_STORE) as the sink of this process, or return None if disabled."""
+    global _store
+    path = path or RUN_STORE
+    if not path:
+        return None
+    if _store is None:
+        _store = RunStore(path)
+    return _store
+
+def get_run_store() -> RunStore:
+    """Get the open run store, or None."""
+    return _store
+
+def close_run_store():
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
+
+def main():
+    parser = argparse.ArgumentParser(description='Import game logs into the run store and query it')
+    parser.add_argument('action', choices=['import', 'calls-per-turn', 'latency', 'loops', 'efficiency'])
+    parser.add_argument('paths', nargs='*', help='JSON game logs to import (default: logs/*.json)')
+    parser.add_argument('--db', default=RUN_STORE or DEFAULT_DB, help=f'Database file (default: {DEFAULT_DB})')
+    parser.add_argument('--min-repeats', type=int, default=3, help='Repeats that count as a loop (default: 3)')
+    args = parser.parse_args()
+
+    store = RunStore(args.db)
+    try:
+        if args.action == 'import':
+            paths = args.paths or sorted(glob.glob(os.path.join('logs', '*.json')))
+            for path in paths:
+                if _NON_GAME_LOG.search(path):
+                    continue
+                try:
+                    store.import_json_log(path)
+                    print(f"Imported {path}")
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Could not import {path}: {e}")
+                    print(f"Skipped {path}: {e}")
+        elif args.action == 'calls-per-turn':
+            for name, turns, calls, per_turn in store.calls_per_turn():
+                print(f"{name:40} {turns:6} turns {calls:7} calls {per_turn:6} calls/turn")
+        elif args.action == 'latency':
+            for agent, stats in store.latency_percentiles().items():
+                print(f"{agent:25} {stats['calls']:7} calls  p50 {stats['p50']:8.1f}  p95 {stats['p95']:8.1f}  "
+                      f"p99 {stats['p99']:8.1f} ms")
+        elif args.action == 'efficiency':
+            def number(value):
+                return f"{value:8.3f}" if value is not None else '       -'
+            for config, runs, turns, gained, per_call, per_tokens, per_second, wasted in store.efficiency_by_config():
+                print(f"{config}\n  {runs} runs {turns} turns +{gained} score  per call {number(per_call)}  "
+                      f"per 1k tokens {number(per_tokens)}  per s {number(per_second)}  wasted {number(wasted)}")
+        else:
+            for name, room, command, repeats, first, last in store.stuck_loops(args.min_repeats):
+                print(f"{name:40} {room:25} {command!r:20} x{repeats} (turns {first}-{last})")
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,144 @@
 import re
+import json
+
+# Timestamp at the start of a log line, e.g. [12:34:56.789]
+TIMESTAMP_PATTERN = re.compile(r'^\[\d{2}:\d{2}:\d{2}(?:\.\d+)?\]\s*')
 
 def clean_log_text(log_text: str) -> str:
-    """Remove timestamps and clean up the log text."""
-    # Split into lines and remove timestamps
-    lines = []
-    for line in log_text.split('\n'):
-        # Remove timestamp pattern [HH:MM:SS.mmm]
-        if line.strip():
-            # Find the first ']' after a timestamp
-            if ']' in line:
-                timestamp_end = line.find(']') + 1
-                line = line[timestamp_end:].strip()
-            lines.append(line)
-    
-    return '\n'.join(lines)
+    """Remove timestamps and empty lines from the log text."""
+    # Only a leading [HH:MM:SS.mmm] is removed; brackets in the game text are kept
+    return '\n'.join(
+        TIMESTAMP_PATTERN.sub('', line).strip()
+        for line in log_text.split('\n') if line.strip()
+    )
 
 def extract_json(text: str) -> str:
     """Extract JSON from text, handling markdown formatting."""
     text = text.strip()
     # Remove triple backticks and optional 'json'
     text = re.sub(r'^```json\s*|^```|```$', '', text, flags=re.MULTILINE).strip()
-    # Extract the first {...} block if extra text is present
+    # Extract the first complete {...} object, ignoring any preamble or trailing text
+    decoder = json.JSONDecoder()
+    start = text.find('{')
+    while start != -1:
+        try:
+            _, end = decoder.raw_decode(text, start)
+            return text[start:end]
+        except json.JSONDecodeError:
+            start = text.find('{', start + 1)
+    # Fall back to the outermost {...} block
     match = re.search(r'\{[\s\S]*\}', text)
     if match:
         return match.group(0)
-    return text 
\ No newline at end of file
+    return text
+
+class IncrementalJSONParser:
+    """Incrementally parse the first top-level JSON object in a stream of text.
+
+    Feed text as it arrives; each top-level field is available in `fields` as
+    soon as its value is complete, before the object itself is closed. Text
+    before the opening brace (preamble, markdown fences) is ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.fields = {}
+        self.complete = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._key = None
+        self._value_start = None
+        self._expect = 'key'
+
+    def _flush_value(self, end: int):
+        """Store a pending non-string top-level value ending before `end`."""
+        if self._key is not None and self._value_start is not None:
+            try:
+                self.fields[self._key] = json.loads(self.buffer[self._value_start:end])
+            except ValueError:
+                pass
+        self._key = None
+        self._value_start = None
+
+    def feed(self, chunk: str) -> dict:
+        """Consume more text and return the fields completed so far."""
+        self.buffer += chunk
+        buf = self.buffer
+        i = self._pos
+        while i < len(buf) and not self.complete:
+            c = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expect == 'key':
+                        self._key = json.loads(buf[self._string_start:i + 1])
+                        self._expect = 'colon'
+                    elif self._depth == 1 and self._value_start == self._string_start:
+                        # String values are complete as soon as the quote closes
+                        self.fields[self._key] = json.loads(buf[self._value_start:i + 1])
+                        self._key = None
+                        self._value_start = None
+            elif c == '"':
+                if self._depth > 0:
+                    self._in_string = True
+                    self._string_start = i
+                    if self._depth == 1 and self._expect == 'value' and self._value_start is None:
+                        self._value_start = i
+            elif c in '{[':
+                if self._depth == 0:
+                    if c == '{':
+                        self._depth = 1
+                        self._expect = 'key'
+                else:
+                    if self._depth == 1 and self._expect == 'value' and self._value_start is None:
+                        self._value_start = i
+                    self._depth += 1
+            elif c in '}]':
+                if self._depth > 0:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        self._flush_value(i)
+                        self.complete = True
+            elif self._depth == 1:
+                if c == ':' and self._expect == 'colon':
+                    self._expect = 'value'
+                elif c == ',':
+                    self._flush_value(i)
+                    self._expect = 'key'
+                elif not c.isspace() and self._expect == 'value' and self._value_start is None:
+                    self._value_start = i
+            i += 1
+        self._pos = i
+        return self.fields
+
+def parse_json_fields(text: str) -> dict:
+    """Get the top-level fields of the first JSON object in text, even if it is truncated."""
+    parser = IncrementalJSONParser()
+    return parser.feed(text) 
+
+# Sentence boundary: terminal punctuation (optionally followed by a closing quote) and whitespace
+_SENTENCE_END = re.compile(r'(?:(?<=[.!?])|(?<=[.!?]["\')\]]))\s+')
+
+def split_sentences(text: str, max_chars: int = 300) -> list:
+    """Split text into sentence chunks of at most roughly max_chars characters."""
+    chunks = []
+    current = ''
+    for sentence in _SENTENCE_END.split(text.strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
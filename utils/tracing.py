@@ -0,0 +1,174 @@
+import os
+import json
+import math
+import time
+import threading
+import functools
+import inspect
+from contextlib import contextmanager
+
+# Get tracing configuration from environment
+TRACE_ENABLED = os.getenv('TRACE', 'false').lower() == 'true'
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Get a nearest-rank percentile from an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+class Tracer:
+    """Collects timed spans per game turn and exports them as a Chrome trace."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.turn = 0
+        self.spans = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def start_turn(self, turn: int = None) -> int:
+        """Start a new turn (the next one, or `turn`, e.g. after a resume); subsequent spans are attributed to it."""
+        self.turn = self.turn + 1 if turn is None else turn
+        return self.turn
+
+    def reset(self):
+        """Drop all recorded spans and restart the turn counter."""
+        with self._lock:
+            self.spans = []
+            self.turn = 0
+            self._origin = time.perf_counter()
+
+    def record(self, stage: str, start: float, duration: float, **args):
+        """Record a finished span. Times are perf_counter seconds."""
+        with self._lock:
+            self.spans.append({
+                "stage": stage,
+                "turn": self.turn,
+                "start": start - self._origin,
+                "duration": duration,
+                "tid": threading.get_ident(),
+                "args": args
+            })
+
+    @contextmanager
+    def span(self, stage: str, **args):
+        """Time the enclosed block as a span of the current turn."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            if error:
+                args = dict(args, error=error)
+            self.record(stage, start, time.perf_counter() - start, **args)
+
+    def traced(self, stage: str, skip_empty: bool = False):
+        """Decorator that records a span for each call of a sync or async function.
+
+        With skip_empty, calls returning a falsy result (e.g. an empty poll) are not recorded.
+        Calls that raise (including timeouts and cancellations) are recorded with the error's type.
+        """
+        def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await func(*args, **kwargs)
+                    start = time.perf_counter()
+                    try:
+                        result = await func(*args, **kwargs)
+                    except BaseException as e:
+                        self.record(stage, start, time.perf_counter() - start, error=type(e).__name__)
+                        raise
+                    if result or not skip_empty:
+                        self.record(stage, start, time.perf_counter() - start)
+                    return result
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    result = func(*args, **kwargs)
+                except BaseException as e:
+                    self.record(stage, start, time.perf_counter() - start, error=type(e).__name__)
+                    raise
+                if result or not skip_empty:
+                    self.record(stage, start, time.perf_counter() - start)
+                return result
+            return wrapper
+        return decorator
+
+    def export_chrome_trace(self, trace_file: str):
+        """Write the spans in Chrome trace event format (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        with self._lock:
+            events = [{
+                "name": span["stage"],
+                "cat": span["stage"].split('.')[0],
+                "ph": "X",
+                "ts": round(span["start"] * 1e6, 1),
+                "dur": round(span["duration"] * 1e6, 1),
+                "pid": pid,
+                "tid": span["tid"],
+                "args": dict(span["args"], turn=span["turn"])
+            } for span in self.spans]
+        with open(trace_file, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def stage_summary(self) -> dict:
+        """Get count, total and p50/p95/p99 durations in milliseconds per stage."""
+        durations = {}
+        with self._lock:
+            for span in self.spans:
+                durations.setdefault(span["stage"], []).append(span["duration"] * 1000)
+        summary = {}
+        for stage, values in durations.items():
+            values.sort()
+            summary[stage] = {
+                "count": len(values),
+                "total_ms": sum(values),
+                "p50_ms": percentile(values, 50),
+                "p95_ms": percentile(values, 95),
+                "p99_ms": percentile(values, 99)
+            }
+        return summary
+
+    def turn_breakdown(self) -> dict:
+        """Get the total milliseconds spent per stage for each turn."""
+        turns = {}
+        with self._lock:
+            for span in self.spans:
+                stages = turns.setdefault(span["turn"], {})
+                stages[span["stage"]] = stages.get(span["stage"], 0.0) + span["duration"] * 1000
+        return turns
+
+    def format_summary(self) -> str:
+        """Format the per-stage summary as a text table."""
+        lines = [f"{'stage':<32} {'count':>6} {'total ms':>10} {'p50':>9} {'p95':>9} {'p99':>9}"]
+        summary = self.stage_summary()
+        for stage in sorted(summary, key=lambda s: summary[s]["total_ms"], reverse=True):
+            s = summary[stage]
+            lines.append(f"{stage:<32} {s['count']:>6} {s['total_ms']:>10.1f} "
+                         f"{s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} {s['p99_ms']:>9.2f}")
+        return '\n'.join(lines)
+
+# Process-wide tracer used by the runner, agents, loggers and TTS
+tracer = Tracer(enabled=TRACE_ENABLED)
+
+def traced(stage: str, skip_empty: bool = False):
+    """Decorator recording a span on the process-wide tracer."""
+    return tracer.traced(stage, skip_empty=skip_empty)
+
+def span(stage: str, **args):
+    """Context manager recording a span on the process-wide tracer."""
+    return tracer.span(stage, **args)